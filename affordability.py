@@ -0,0 +1,95 @@
+"""
+Inverse solver: the largest house or vehicle a gross income can pay for.
+
+The required income is linear in house_cost and vehicle_cost, so both are solved in
+closed form. max_affordable_bisect is a vectorized bracketed root finder with a fixed
+iteration count for models without a closed-form inverse; it also serves as a check.
+"""
+import numpy as np
+
+from engine import calculate_batch, calculate_mortgage_payment_batch
+from tax import income_tax
+
+SOLVABLE_FIELDS = ("house_cost", "vehicle_cost")
+
+def _columns(inputs, field, annual_income):
+    """
+    Float column arrays for all inputs and the income broadcast to one batch shape,
+    with the solved field set to zero.
+    """
+    arrays = {name: np.asarray(values, dtype=np.float64) for name, values in inputs.items()}
+    annual_income = np.asarray(annual_income, dtype=np.float64)
+    shape = np.broadcast_shapes((1,), annual_income.shape, *(values.shape for values in arrays.values()))
+    columns = {name: np.broadcast_to(values, shape) for name, values in arrays.items()}
+    columns[field] = np.zeros(shape)
+    return columns, np.broadcast_to(annual_income, shape)
+
+def _monthly_cost_per_unit(columns, field):
+    """
+    Monthly expenses added by each unit of house_cost or vehicle_cost.
+    """
+    # tax_rate is not needed with a tax system, size the array from a required column
+    ones = np.ones_like(columns["house_cost"])
+    if field == "house_cost":
+        mortgage = calculate_mortgage_payment_batch(
+            ones * (1 - columns["down_payment_percent"] / 100),
+            columns["mortgage_rate"] / 100 / 12, columns["mortgage_years"] * 12)
+        return mortgage + (columns["property_tax_rate"] / 100) / 12
+    return calculate_mortgage_payment_batch(
+        ones, columns["vehicle_loan_rate"] / 100 / 12, columns["vehicle_loan_years"] * 12)
+
+def max_affordable(inputs, annual_income, field="house_cost", tax_system=None):
+    """
+    Largest house_cost or vehicle_cost the gross annual income covers, in closed form.
+    inputs: mapping of column name to array (see engine.INPUT_FIELDS); the solved field is ignored
+    tax_system: country whose progressive tax brackets replace the flat tax_rate
+    Returns an array; 0 where the other expenses alone exceed the income and inf where
+    the solved field adds no monthly cost.
+    """
+    if field not in SOLVABLE_FIELDS:
+        raise ValueError(f"Can only solve for {', '.join(SOLVABLE_FIELDS)}, not {field}")
+    columns, annual_income = _columns(inputs, field, annual_income)
+    if tax_system is None:
+        available = annual_income / 12 * (1 - columns["tax_rate"] / 100)
+    else:
+        available = (annual_income - income_tax(annual_income, tax_system)) / 12
+    remaining = available - calculate_batch(columns, tax_system)["total_monthly_expenses"]
+    per_unit = _monthly_cost_per_unit(columns, field)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        amount = np.where(per_unit > 0, remaining / per_unit, np.inf)
+    return np.where(remaining > 0, amount, 0.0)
+
+def max_affordable_bisect(inputs, annual_income, field="house_cost", high=None, iterations=64, tax_system=None):
+    """
+    Largest affordable field value found by vectorized bisection on calculate_batch.
+    The bracket starts at [0, high] (default: 100 times the annual income) and is doubled
+    where still affordable; both phases use at most `iterations` steps, so the cost is
+    bounded for any batch size.
+    """
+    if field not in SOLVABLE_FIELDS:
+        raise ValueError(f"Can only solve for {', '.join(SOLVABLE_FIELDS)}, not {field}")
+    columns, annual_income = _columns(inputs, field, annual_income)
+
+    def affordable(value):
+        columns[field] = value
+        return calculate_batch(columns, tax_system)["required_annual_income"] <= annual_income
+
+    affordable_at_zero = affordable(np.zeros_like(annual_income))
+    low = np.zeros_like(annual_income)
+    if high is None:
+        high = np.maximum(100 * annual_income, 1.0)
+    high = np.broadcast_to(np.asarray(high, dtype=np.float64), low.shape).copy()
+
+    for _ in range(iterations):
+        expand = affordable(high) & affordable_at_zero
+        if not expand.any():
+            break
+        low = np.where(expand, high, low)
+        high = np.where(expand, high * 2, high)
+
+    for _ in range(iterations):
+        middle = (low + high) / 2
+        below = affordable(middle)
+        low = np.where(below, middle, low)
+        high = np.where(below, high, middle)
+    return np.where(affordable_at_zero, low, 0.0)
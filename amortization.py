@@ -0,0 +1,92 @@
+"""
+Amortization schedules for the mortgage and the vehicle loan.
+
+All functions use the same units as utils.calculate_mortgage_payment:
+P is the loan amount, r the monthly interest rate and n the term in months.
+"""
+import numpy as np
+from engine import calculate_mortgage_payment_batch
+from utils import calculate_mortgage_payment
+
+def iter_schedule(P, r, n, extra_payment=0, rate_resets=None):
+    """
+    Lazily yield (month, payment, principal, interest, balance) for each month of a loan.
+    extra_payment: additional principal paid every month
+    rate_resets: {month: new monthly rate}; from that month the level payment is
+    recalculated over the remaining term
+    """
+    rate_resets = rate_resets or {}
+    balance = P
+    payment = calculate_mortgage_payment(P, r, n)
+    for month in range(1, n + 1):
+        if balance <= 0:
+            return
+        if month in rate_resets:
+            r = rate_resets[month]
+            payment = calculate_mortgage_payment(balance, r, n - month + 1)
+        interest = balance * r
+        principal = min(payment + extra_payment - interest, balance)
+        if month == n:
+            principal = balance
+        balance -= principal
+        yield (month, principal + interest, principal, interest, balance)
+
+def _balance_after(P, r, payment, k):
+    """
+    Closed-form remaining balance after k level payments, not clipped at zero.
+    """
+    with np.errstate(over="ignore", invalid="ignore"):
+        growth = np.float_power(1 + r, k)
+        return np.where(r == 0, P - payment * k, P * growth - payment * (growth - 1) / np.where(r == 0, 1, r))
+
+def payoff_month(P, r, n, extra_payment=0):
+    """
+    Month in which the loan is paid off, computed in closed form.
+    """
+    P, r, n = np.broadcast_arrays(*(np.asarray(x, dtype=np.float64) for x in (P, r, n)))
+    payment = calculate_mortgage_payment_batch(P, r, n) + extra_payment
+    with np.errstate(divide="ignore", invalid="ignore"):
+        months = np.where(
+            r == 0,
+            P / payment,
+            -np.log1p(-r * P / payment) / np.log1p(r),
+        )
+    # Level payments land on n up to rounding, do not round that up to n + 1
+    months = np.ceil(months - 1e-9)
+    return np.where(P > 0, np.minimum(months, n), 0).astype(np.int64)
+
+def total_interest(P, r, n, extra_payment=0):
+    """
+    Total interest paid over the life of the loan, computed in closed form.
+    """
+    P, r, n = np.broadcast_arrays(*(np.asarray(x, dtype=np.float64) for x in (P, r, n)))
+    payment = calculate_mortgage_payment_batch(P, r, n) + extra_payment
+    months = payoff_month(P, r, n, extra_payment)
+    # Every month but the last pays the full amount; the last clears the balance left
+    final_payment = _balance_after(P, r, payment, months - 1) * (1 + r)
+    total_paid = payment * (months - 1) + final_payment
+    return np.where(months > 0, total_paid - P, 0.0)
+
+def schedule_arrays(P, r, n, extra_payment=0):
+    """
+    Month-by-month schedules for a batch of fixed-rate loans as preallocated arrays.
+    Returns a dict of 'payment', 'principal', 'interest' and 'balance' arrays of shape
+    (loans, months); months after payoff are zero.
+    """
+    P, r, n = np.broadcast_arrays(*(np.atleast_1d(np.asarray(x, dtype=np.float64)) for x in (P, r, n)))
+    payment = (calculate_mortgage_payment_batch(P, r, n) + extra_payment)[:, None]
+    months = np.arange(int(n.max()) + 1 if n.size else 1, dtype=np.float64)[None, :]
+    balance = np.empty((P.size, months.shape[1]))
+    balance[:] = _balance_after(P[:, None], r[:, None], payment, months)
+    # The term ends at n even when rounding leaves a few cents on the balance
+    balance[(balance <= 1e-6) | (months >= n[:, None])] = 0.0
+    balance[:, 0] = P
+
+    interest = balance[:, :-1] * r[:, None]
+    principal = balance[:, :-1] - balance[:, 1:]
+    return {
+        "payment": principal + interest,
+        "principal": principal,
+        "interest": interest,
+        "balance": balance[:, 1:],
+    }
@@ -0,0 +1,418 @@
+"""
+HTTP API for the calculator, built on asyncio streams from the standard library.
+
+    python api.py --port 8000 --workers 4
+
+Endpoints (JSON in and out):
+
+    GET  /health
+    GET  /stats                        coalescing counters
+    POST /v1/required-income           {"country": "USA", "tax_system": null, "inputs": {...}}
+    POST /v1/required-income/batch     {"country": "USA", "tax_system": null, "breakdown": false,
+                                        "scenarios": [{...}, ...]} or "columns": {field: [...]}
+
+Inputs are named as in engine.INPUT_FIELDS. With "country", missing inputs take that
+country's defaults; "tax_system" names a country whose progressive brackets replace
+tax_rate. Batch requests are parsed, calculated with engine.calculate_batch and
+serialized in a worker process, so the event loop only moves bytes. Single-scenario
+requests arriving within a short window are coalesced into one batch, and identical
+scenarios within a window are calculated once.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+
+import numpy as np
+
+from countries import COUNTRIES
+from engine import DIRECT_CATEGORIES, INPUT_FIELDS, OPTIONAL_FIELDS, calculate_batch
+from tax import TAX_SYSTEMS
+
+MAX_BODY_BYTES = 64 * 2**20
+MAX_BATCH_SCENARIOS = 200_000
+DEFAULT_WINDOW = 0.002
+DEFAULT_MAX_COALESCED = 1024
+
+# Expense categories that only exist when their optional input is given
+OPTIONAL_CATEGORIES = {
+    category: field for category, field in DIRECT_CATEGORIES.items() if field in OPTIONAL_FIELDS
+}
+
+class RequestError(ValueError):
+    """
+    A problem with the request, reported to the client with a 4xx status.
+    """
+
+    def __init__(self, message, status=HTTPStatus.BAD_REQUEST):
+        super().__init__(message)
+        self.status = status
+
+def _options(payload):
+    """
+    Validate the 'country' and 'tax_system' of a request payload.
+    Returns (defaults for missing inputs, tax system).
+    """
+    if not isinstance(payload, dict):
+        raise RequestError("The request body must be a JSON object")
+    country = payload.get("country")
+    if country is not None and country not in COUNTRIES:
+        raise RequestError(f"Unknown country: {country!r}")
+    tax_system = payload.get("tax_system")
+    if tax_system is not None and tax_system not in TAX_SYSTEMS:
+        raise RequestError(f"Unknown tax system: {tax_system!r}")
+    return (COUNTRIES[country]["defaults"] if country else {}), tax_system
+
+def _fields(tax_system):
+    return [field for field in INPUT_FIELDS if field != "tax_rate" or tax_system is None]
+
+def parse_scenario(payload):
+    """
+    Turn a single-scenario payload into (row of float inputs, tax system).
+    Optional inputs are only part of the row when given or defaulted by the country.
+    """
+    defaults, tax_system = _options(payload)
+    inputs = payload.get("inputs", {})
+    if not isinstance(inputs, dict):
+        raise RequestError("'inputs' must be a JSON object")
+    row = {}
+    for field in _fields(tax_system) + OPTIONAL_FIELDS:
+        value = inputs.get(field, defaults.get(field))
+        if value is None:
+            if field in OPTIONAL_FIELDS:
+                continue
+            raise RequestError(f"Missing input: {field}")
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise RequestError(f"Input {field} must be a number")
+        try:
+            row[field] = float(value)
+        except OverflowError:
+            raise RequestError(f"Input {field} is out of range") from None
+    return row, tax_system
+
+def parse_batch(payload):
+    """
+    Turn a batch payload into (engine columns, tax system).
+    """
+    defaults, tax_system = _options(payload)
+    if "columns" in payload:
+        data = payload["columns"]
+        if not isinstance(data, dict):
+            raise RequestError("'columns' must map input names to lists")
+        lengths = {len(values) for values in data.values() if isinstance(values, list)}
+        if len(lengths) > 1:
+            raise RequestError("All columns must have the same length")
+        size = lengths.pop() if lengths else 0
+
+        def column(field):
+            values = data.get(field)
+            return [values] * size if not isinstance(values, list) and values is not None else values
+    elif "scenarios" in payload:
+        scenarios = payload["scenarios"]
+        if not isinstance(scenarios, list) or not all(isinstance(scenario, dict) for scenario in scenarios):
+            raise RequestError("'scenarios' must be a list of JSON objects")
+        size = len(scenarios)
+
+        def column(field):
+            if not any(field in scenario for scenario in scenarios):
+                return None
+            return [scenario.get(field, defaults.get(field)) for scenario in scenarios]
+    else:
+        raise RequestError("Provide either 'scenarios' or 'columns'")
+
+    if size > MAX_BATCH_SCENARIOS:
+        raise RequestError(f"At most {MAX_BATCH_SCENARIOS:,} scenarios per request",
+                           HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+    columns = {}
+    for field in _fields(tax_system) + OPTIONAL_FIELDS:
+        values = column(field)
+        if values is None:
+            if field in defaults:
+                columns[field] = np.full(size, defaults[field], dtype=np.float64)
+            elif field not in OPTIONAL_FIELDS:
+                raise RequestError(f"Missing input: {field}")
+            continue
+        try:
+            columns[field] = np.array(values, dtype=np.float64)
+        except (TypeError, ValueError, OverflowError):
+            raise RequestError(f"Input {field} must be numbers") from None
+        if columns[field].shape != (size,):
+            raise RequestError(f"Input {field} must be a flat list with one number per scenario")
+        if field in OPTIONAL_FIELDS:
+            columns[field] = np.nan_to_num(columns[field])
+        elif np.isnan(columns[field]).any():
+            raise RequestError(f"Missing input: {field}")
+    return columns, tax_system
+
+def _json_list(values):
+    """
+    Array to a JSON-ready list; infinite and NaN amounts (a 100% tax rate) become null.
+    """
+    finite = np.isfinite(values)
+    if finite.all():
+        return values.tolist()
+    values = values.astype(object)
+    values[~finite] = None
+    return values.tolist()
+
+def _respond(status, body):
+    return int(status), json.dumps(body, separators=(",", ":")).encode()
+
+def evaluate_batch(body):
+    """
+    Handle a batch request body end to end. Runs in a worker process.
+    Returns (status, response bytes).
+    """
+    try:
+        payload = json.loads(body)
+        columns, tax_system = parse_batch(payload)
+        results = calculate_batch(columns, tax_system)
+    except RequestError as error:
+        return _respond(error.status, {"error": str(error)})
+    except ValueError as error:
+        return _respond(HTTPStatus.BAD_REQUEST, {"error": f"Invalid JSON: {error}"})
+
+    response = {
+        "count": len(results["total_monthly_expenses"]),
+        "total_monthly_expenses": _json_list(results["total_monthly_expenses"]),
+        "required_monthly_income": _json_list(results["required_monthly_income"]),
+        "required_annual_income": _json_list(results["required_annual_income"]),
+    }
+    if payload.get("breakdown"):
+        response["monthly_expenses"] = {
+            category: _json_list(amounts)
+            for category, amounts in results["monthly_expenses"].items()
+            if category not in OPTIONAL_CATEGORIES or OPTIONAL_CATEGORIES[category] in columns
+        }
+    return _respond(HTTPStatus.OK, response)
+
+def evaluate_rows(rows, tax_system):
+    """
+    Calculate coalesced single scenarios as one batch. Runs in a worker process.
+    Returns one result dict per row.
+    """
+    columns = {
+        field: np.array([row.get(field, 0.0) for row in rows], dtype=np.float64)
+        for field in _fields(tax_system) + OPTIONAL_FIELDS
+    }
+    results = calculate_batch(columns, tax_system)
+    monthly_expenses = {category: _json_list(amounts) for category, amounts in results["monthly_expenses"].items()}
+    totals = _json_list(results["total_monthly_expenses"])
+    monthly_incomes = _json_list(results["required_monthly_income"])
+    annual_incomes = _json_list(results["required_annual_income"])
+    return [
+        {
+            "monthly_expenses": {
+                category: amounts[i]
+                for category, amounts in monthly_expenses.items()
+                if category not in OPTIONAL_CATEGORIES or OPTIONAL_CATEGORIES[category] in row
+            },
+            "total_monthly_expenses": totals[i],
+            "required_monthly_income": monthly_incomes[i],
+            "required_annual_income": annual_incomes[i],
+        }
+        for i, row in enumerate(rows)
+    ]
+
+class Coalescer:
+    """
+    Merge single-scenario requests that arrive within `window` seconds into one batch.
+    A group is flushed when its window ends or it reaches max_batch distinct scenarios;
+    identical scenarios in a group share one result. A window of 0 disables coalescing.
+    """
+
+    def __init__(self, executor, window=DEFAULT_WINDOW, max_batch=DEFAULT_MAX_COALESCED):
+        self.executor = executor
+        self.window = window
+        self.max_batch = max_batch
+        self.requests = 0
+        self.batches = 0
+        self.duplicates = 0
+        self._groups = {}
+        self._timers = {}
+        # The event loop only keeps weak references to tasks; hold the running batches
+        self._tasks = set()
+
+    async def submit(self, row, tax_system):
+        loop = asyncio.get_running_loop()
+        self.requests += 1
+        if self.window <= 0:
+            self.batches += 1
+            return (await loop.run_in_executor(self.executor, evaluate_rows, [row], tax_system))[0]
+
+        group = self._groups.get(tax_system)
+        if group is None:
+            group = self._groups[tax_system] = {}
+            self._timers[tax_system] = loop.call_later(self.window, self._flush, tax_system)
+        key = tuple(row.items())
+        if key in group:
+            self.duplicates += 1
+            future = group[key][1]
+        else:
+            future = loop.create_future()
+            group[key] = (row, future)
+            if len(group) >= self.max_batch:
+                self._timers[tax_system].cancel()
+                self._flush(tax_system)
+        # Several requests may wait on one future; a client going away must not cancel it
+        return await asyncio.shield(future)
+
+    def _flush(self, tax_system):
+        group = self._groups.pop(tax_system)
+        del self._timers[tax_system]
+        self.batches += 1
+        task = asyncio.get_running_loop().create_task(self._run(list(group.values()), tax_system))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, entries, tax_system):
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(
+                self.executor, evaluate_rows, [row for row, _ in entries], tax_system)
+        except Exception as error:
+            for _, future in entries:
+                future.set_exception(error)
+        else:
+            for (_, future), result in zip(entries, results):
+                future.set_result(result)
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "duplicates": self.duplicates,
+            "requests_per_batch": self.requests / self.batches if self.batches else 0.0,
+        }
+
+class CalculatorAPI:
+    """
+    Route HTTP requests to the calculator.
+    """
+
+    def __init__(self, workers=None, window=DEFAULT_WINDOW, max_batch=DEFAULT_MAX_COALESCED):
+        self.executor = ProcessPoolExecutor(max_workers=workers)
+        self.coalescer = Coalescer(self.executor, window, max_batch)
+        self.started = time.time()
+
+    async def dispatch(self, method, path, body):
+        """
+        Return (status, response bytes) for one request.
+        """
+        routes = {
+            "/health": ("GET", self.health),
+            "/stats": ("GET", self.stats),
+            "/v1/required-income": ("POST", self.required_income),
+            "/v1/required-income/batch": ("POST", self.required_income_batch),
+        }
+        if path not in routes:
+            return _respond(HTTPStatus.NOT_FOUND, {"error": f"No such endpoint: {path}"})
+        expected, handler = routes[path]
+        if method != expected:
+            return _respond(HTTPStatus.METHOD_NOT_ALLOWED, {"error": f"Use {expected} for {path}"})
+        try:
+            return await handler(body)
+        except Exception as error:
+            # Answer rather than dropping the connection
+            return _respond(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"{type(error).__name__}: {error}"})
+
+    async def health(self, body):
+        return _respond(HTTPStatus.OK, {"status": "ok", "uptime_seconds": time.time() - self.started})
+
+    async def stats(self, body):
+        return _respond(HTTPStatus.OK, self.coalescer.stats())
+
+    async def required_income(self, body):
+        try:
+            row, tax_system = parse_scenario(json.loads(body))
+        except RequestError as error:
+            return _respond(error.status, {"error": str(error)})
+        except ValueError as error:
+            return _respond(HTTPStatus.BAD_REQUEST, {"error": f"Invalid JSON: {error}"})
+        return _respond(HTTPStatus.OK, await self.coalescer.submit(row, tax_system))
+
+    async def required_income_batch(self, body):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, evaluate_batch, body)
+
+    async def handle_connection(self, reader, writer):
+        """
+        Serve HTTP/1.1 requests on one connection, keeping it open between requests.
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, version = request_line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                length = int(headers.get("content-length", "0"))
+                if "transfer-encoding" in headers:
+                    status, response = _respond(HTTPStatus.LENGTH_REQUIRED, {"error": "Send a Content-Length"})
+                    keep_alive = False
+                elif length > MAX_BODY_BYTES:
+                    status, response = _respond(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": "Request body too large"})
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length)
+                    status, response = await self.dispatch(method, target.split("?", 1)[0], body)
+
+                writer.write(
+                    f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(response)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1")
+                    + response
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host, port, ready=None):
+        server = await asyncio.start_server(self.handle_connection, host, port, limit=2**20)
+        if ready is not None:
+            ready(server)
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        self.executor.shutdown(cancel_futures=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the calculator over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("API_PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument("--coalesce-window-ms", type=float, default=DEFAULT_WINDOW * 1000,
+                        help="how long single-scenario requests wait to be batched; 0 disables coalescing")
+    parser.add_argument("--max-coalesced", type=int, default=DEFAULT_MAX_COALESCED,
+                        help="largest batch of coalesced single-scenario requests")
+    args = parser.parse_args(argv)
+
+    api = CalculatorAPI(args.workers, args.coalesce_window_ms / 1000, args.max_coalesced)
+    try:
+        asyncio.run(api.serve(
+            args.host, args.port,
+            ready=lambda server: print(f"Serving on http://{args.host}:{args.port}", flush=True)))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        api.close()
+
+if __name__ == "__main__":
+    main()
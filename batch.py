@@ -0,0 +1,162 @@
+"""
+Command-line entry point that streams scenario files through the calculator.
+
+    python batch.py scenarios.csv results.parquet --chunk-size 500000 --workers 4
+
+Input and output can be CSV or Parquet (picked from the file extension). The input
+needs one column per field in engine.INPUT_FIELDS; 'private_security' and
+'public_transportation' are optional. Rows are processed in fixed-size chunks and
+written as they finish, so memory stays flat regardless of the file size.
+"""
+import argparse
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from engine import INPUT_FIELDS, OPTIONAL_FIELDS, calculate_batch
+from money import CURRENCIES, calculate_batch_minor, to_minor_inputs
+from tax import TAX_BRACKETS
+
+DEFAULT_CHUNK_SIZE = 250_000
+
+def _file_format(path):
+    """
+    Determine the file format from the extension.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".parquet", ".pq"):
+        return "parquet"
+    if extension in (".csv", ".txt") or path.endswith(".csv.gz"):
+        return "csv"
+    raise ValueError(f"Unsupported file type: {path}")
+
+def read_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE, all_columns=False):
+    """
+    Yield DataFrames of at most chunk_size rows from a CSV or Parquet file.
+    Parquet files are read column by column, so only the input fields are loaded
+    unless all_columns is set (to pass columns such as an id through to the output).
+    """
+    if _file_format(path) == "parquet":
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(path)
+        available = set(parquet_file.schema_arrow.names)
+        columns = None if all_columns else [field for field in INPUT_FIELDS + OPTIONAL_FIELDS if field in available]
+        for record_batch in parquet_file.iter_batches(batch_size=chunk_size, columns=columns):
+            yield record_batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size, float_precision="round_trip")
+
+def process_chunk(chunk, keep_inputs=False, tax_system=None, currency=None):
+    """
+    Run the calculation over one chunk and return the results as a DataFrame.
+    currency: calculate in fixed point and return int64 amounts in its minor units
+    """
+    if currency is None:
+        results = calculate_batch(chunk, tax_system)
+    else:
+        results = calculate_batch_minor(to_minor_inputs(chunk, currency), currency, tax_system)
+    output = pd.DataFrame(results["monthly_expenses"], index=chunk.index)
+    output["Total Monthly Expenses"] = results["total_monthly_expenses"]
+    output["Required Monthly Income"] = results["required_monthly_income"]
+    output["Required Annual Income"] = results["required_annual_income"]
+    if keep_inputs:
+        # CSV chunks infer int64 or float64 per chunk; write the inputs with one schema
+        inputs = chunk.astype({field: "float64" for field in INPUT_FIELDS + OPTIONAL_FIELDS if field in chunk})
+        output = pd.concat([inputs, output], axis=1)
+    return output
+
+class ResultWriter:
+    """
+    Append result chunks to a CSV or Parquet file as they arrive.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.format = _file_format(path)
+        self._parquet_writer = None
+        self._wrote_header = False
+
+    def write(self, frame):
+        if self.format == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(self.path, table.schema)
+            else:
+                # CSV chunks may infer different dtypes, keep the first chunk's schema
+                table = table.cast(self._parquet_writer.schema)
+            self._parquet_writer.write_table(table)
+        else:
+            frame.to_csv(self.path, mode="a" if self._wrote_header else "w",
+                         header=not self._wrote_header, index=False)
+            self._wrote_header = True
+
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def run(input_path, output_path, chunk_size=DEFAULT_CHUNK_SIZE, workers=1, keep_inputs=False, tax_system=None,
+        currency=None):
+    """
+    Stream input_path through the calculator into output_path.
+    With workers > 1 chunks are spread across a process pool; at most two chunks per
+    worker are in flight and results are written in input order.
+    Returns the number of rows processed.
+    """
+    rows = 0
+    chunks = read_chunks(input_path, chunk_size, all_columns=keep_inputs)
+    with ResultWriter(output_path) as writer:
+        if workers <= 1:
+            for chunk in chunks:
+                writer.write(process_chunk(chunk, keep_inputs, tax_system, currency))
+                rows += len(chunk)
+            return rows
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for chunk in chunks:
+                pending.append(pool.submit(process_chunk, chunk, keep_inputs, tax_system, currency))
+                if len(pending) >= 2 * workers:
+                    result = pending.popleft().result()
+                    writer.write(result)
+                    rows += len(result)
+            while pending:
+                result = pending.popleft().result()
+                writer.write(result)
+                rows += len(result)
+    return rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Calculate the required income for a file of scenarios.")
+    parser.add_argument("input", help="CSV or Parquet file with one scenario per row")
+    parser.add_argument("output", help="CSV or Parquet file to write the results to")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="rows per chunk")
+    parser.add_argument("--workers", type=int, default=1, help="number of worker processes")
+    parser.add_argument("--keep-inputs", action="store_true", help="copy the input columns to the output")
+    parser.add_argument("--tax-system", choices=sorted(TAX_BRACKETS),
+                        help="gross up with this country's progressive tax brackets instead of the tax_rate column")
+    parser.add_argument("--fixed-point", choices=sorted(CURRENCIES), metavar="CURRENCY",
+                        help="calculate exactly in this currency and write amounts as integer minor units (cents)")
+    args = parser.parse_args(argv)
+
+    try:
+        rows = run(args.input, args.output, args.chunk_size, args.workers, args.keep_inputs, args.tax_system,
+                   args.fixed_point)
+    except (KeyError, ValueError) as error:
+        parser.exit(1, f"error: {error}\n")
+    print(f"Processed {rows:,} scenarios into {args.output}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
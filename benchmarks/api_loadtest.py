@@ -0,0 +1,211 @@
+"""
+Local load test for the HTTP API.
+
+    python -m benchmarks.api_loadtest --concurrency 1 16 64 --requests 200 --batch-sizes 1000 10000 100000
+
+Starts `python api.py` on a free localhost port (or uses --url) and measures:
+
+- single: N concurrent keep-alive clients each sending --requests single-scenario
+  requests back to back; reports requests/sec, latency percentiles and how many
+  requests the server coalesced into each batch. With --compare-uncoalesced a second
+  server with coalescing disabled is measured the same way.
+- batch: one request per batch size, repeated --repeats times; reports scenarios/sec.
+
+Scenarios are random but reproducible variations of the USA defaults.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import urllib.request
+
+import numpy as np
+
+from benchmarks.loadtest import _free_port
+from countries import COUNTRIES
+
+API_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "api.py")
+
+# Inputs varied by the generated scenarios
+VARIED_FIELDS = ("house_cost", "vehicle_cost", "daily_food", "entertainment", "utilities", "travel_budget")
+
+def start_server(port, workers, window_ms):
+    """
+    Start the API on localhost and wait until it reports healthy.
+    """
+    process = subprocess.Popen(
+        [sys.executable, API_PATH, "--port", str(port), "--coalesce-window-ms", str(window_ms)]
+        + (["--workers", str(workers)] if workers else []),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1):
+                return process
+        except OSError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("The API did not start within 30 seconds")
+
+def _scenario(rng):
+    defaults = COUNTRIES["USA"]["defaults"]
+    return {field: round(defaults[field] * rng.uniform(0.5, 1.5)) for field in VARIED_FIELDS}
+
+class Client:
+    """
+    One keep-alive HTTP/1.1 connection.
+    """
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+
+    async def __aenter__(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port, limit=2**24)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.writer.close()
+
+    async def request(self, method, path, payload=None):
+        body = json.dumps(payload).encode() if payload is not None else b""
+        self.writer.write(
+            f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+        await self.writer.drain()
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode().partition(":")
+            if name.lower() == "content-length":
+                length = int(value)
+        response = json.loads(await self.reader.readexactly(length))
+        if status != 200:
+            raise RuntimeError(f"{method} {path} failed with {status}: {response}")
+        return response
+
+async def run_single(host, port, concurrency, requests, seed):
+    """
+    Return the latencies of `concurrency` clients sending `requests` requests each.
+    """
+    async def one(index):
+        rng = random.Random(seed * 100_003 + index)
+        latencies = []
+        async with Client(host, port) as client:
+            for _ in range(requests):
+                start = time.perf_counter()
+                await client.request("POST", "/v1/required-income", {"country": "USA", "inputs": _scenario(rng)})
+                latencies.append(time.perf_counter() - start)
+        return latencies
+
+    results = await asyncio.gather(*(one(index) for index in range(concurrency)))
+    return [latency for latencies in results for latency in latencies]
+
+async def run_batch(host, port, size, repeats, seed):
+    """
+    Return the latencies of `repeats` batch requests of `size` scenarios.
+    """
+    rng = np.random.default_rng(seed)
+    defaults = COUNTRIES["USA"]["defaults"]
+    payload = {
+        "country": "USA",
+        "columns": {field: np.round(defaults[field] * rng.uniform(0.5, 1.5, size)).tolist() for field in VARIED_FIELDS},
+    }
+    latencies = []
+    async with Client(host, port) as client:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            response = await client.request("POST", "/v1/required-income/batch", payload)
+            latencies.append(time.perf_counter() - start)
+            assert response["count"] == size
+    return latencies
+
+async def _stats(host, port):
+    async with Client(host, port) as client:
+        return await client.request("GET", "/stats")
+
+def measure_single(host, port, concurrency_levels, requests, seed, label):
+    rows = []
+    for concurrency in concurrency_levels:
+        before = asyncio.run(_stats(host, port))
+        start = time.perf_counter()
+        latencies = asyncio.run(run_single(host, port, concurrency, requests, seed))
+        elapsed = time.perf_counter() - start
+        after = asyncio.run(_stats(host, port))
+        batches = after["batches"] - before["batches"]
+        row = {
+            "server": label,
+            "concurrency": concurrency,
+            "requests": len(latencies),
+            "requests_per_sec": len(latencies) / elapsed,
+            "p50_seconds": float(np.percentile(latencies, 50)),
+            "p95_seconds": float(np.percentile(latencies, 95)),
+            "requests_per_batch": (after["requests"] - before["requests"]) / batches if batches else 0.0,
+        }
+        rows.append(row)
+        print(f"{label:>12} {concurrency:>11} {row['requests']:>8} {row['requests_per_sec']:>10.0f} "
+              f"{row['p50_seconds'] * 1000:>8.2f} {row['p95_seconds'] * 1000:>8.2f} {row['requests_per_batch']:>10.1f}")
+    return rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the throughput of the HTTP API on localhost.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64], help="concurrent single-scenario clients")
+    parser.add_argument("--requests", type=int, default=200, help="requests per single-scenario client")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeats", type=int, default=5, help="requests per batch size")
+    parser.add_argument("--workers", type=int, help="API worker processes (default: one per CPU)")
+    parser.add_argument("--compare-uncoalesced", action="store_true", help="also measure a server without coalescing")
+    parser.add_argument("--url", help="base URL of a running API instead of starting one, e.g. http://127.0.0.1:8000")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    servers = []
+    if args.url:
+        host, _, port = args.url.split("://", 1)[-1].rstrip("/").partition(":")
+        targets = [("running", host, int(port or 80))]
+    else:
+        targets = []
+        for label, window_ms in [("coalesced", 2)] + ([("uncoalesced", 0)] if args.compare_uncoalesced else []):
+            port = _free_port()
+            servers.append(start_server(port, args.workers, window_ms))
+            targets.append((label, "127.0.0.1", port))
+
+    report = {"single": [], "batch": []}
+    try:
+        print(f"{'server':>12} {'concurrency':>11} {'requests':>8} {'requests/s':>10} {'p50 ms':>8} {'p95 ms':>8} {'per batch':>10}")
+        for label, host, port in targets:
+            # Start the worker processes before measuring
+            asyncio.run(run_single(host, port, 1, 5, args.seed))
+            report["single"] += measure_single(host, port, args.concurrency, args.requests, args.seed, label)
+
+        label, host, port = targets[0]
+        print(f"\n{'batch size':>10} {'p50 ms':>9} {'scenarios/s':>12}")
+        for size in args.batch_sizes:
+            latencies = asyncio.run(run_batch(host, port, size, args.repeats, args.seed))
+            row = {
+                "batch_size": size,
+                "p50_seconds": float(np.percentile(latencies, 50)),
+                "scenarios_per_sec": size / float(np.percentile(latencies, 50)),
+            }
+            report["batch"].append(row)
+            print(f"{size:>10} {row['p50_seconds'] * 1000:>9.1f} {row['scenarios_per_sec']:>12,.0f}")
+    finally:
+        for server in servers:
+            server.terminate()
+            server.wait()
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+if __name__ == "__main__":
+    main()
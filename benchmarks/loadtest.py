@@ -0,0 +1,246 @@
+"""
+Local load generator for the Streamlit app.
+
+    python -m benchmarks.loadtest --sessions 1 5 10 25 50 --interactions 20
+
+Starts `streamlit run main.py` on a free localhost port (or uses --url) and, for every
+session count N, opens N concurrent websocket sessions that behave like the browser:
+each runs the page, then moves sliders, edits number inputs and now and then switches
+the country tab, waiting a random think time between interactions. Widget changes are
+sent as fragment reruns when the widget lives in a fragment, like the frontend does.
+
+For every N it reports the rerun latency distribution, rerun throughput, the server's
+CPU use (in cores) and its resident memory per connected session. Server statistics come
+from /proc and are only available when the script starts the server itself on Linux.
+Everything runs on localhost; no external services are involved.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+import numpy as np
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+from countries import COUNTRIES
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_server(port):
+    """
+    Start the app headless on localhost and wait until it reports healthy.
+    """
+    process = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", APP_PATH,
+         "--server.port", str(port), "--server.address", "127.0.0.1",
+         "--server.headless", "true", "--browser.gatherUsageStats", "false"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1):
+                return process
+        except OSError:
+            time.sleep(0.25)
+    process.terminate()
+    raise RuntimeError("Streamlit did not start within 60 seconds")
+
+def process_stats(pid):
+    """
+    CPU seconds used and resident memory in bytes of a process, read from /proc.
+    """
+    try:
+        with open(f"/proc/{pid}/stat") as file:
+            fields = file.read().rsplit(")", 1)[1].split()
+        with open(f"/proc/{pid}/status") as file:
+            rss_kb = next(int(line.split()[1]) for line in file if line.startswith("VmRSS:"))
+    except (OSError, StopIteration):
+        return None
+    cpu_seconds = (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+    return cpu_seconds, rss_kb * 1024
+
+class Session:
+    """
+    One simulated browser session speaking Streamlit's websocket protocol.
+    """
+
+    def __init__(self, url, rng):
+        self.url = url
+        self.rng = rng
+        self.widget_states = {}
+        self.widgets = {}
+        self.menu_id = None
+        self.latencies = []
+
+    async def __aenter__(self):
+        self.connection = await websockets.connect(self.url, max_size=None)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.connection.close()
+
+    async def rerun(self, fragment_id=""):
+        """
+        Send the current widget states and wait for the script run to finish.
+        """
+        message = BackMsg()
+        message.rerun_script.query_string = ""
+        message.rerun_script.page_script_hash = ""
+        message.rerun_script.fragment_id = fragment_id
+        message.rerun_script.widget_states.widgets.extend(self.widget_states.values())
+
+        start = time.perf_counter()
+        await self.connection.send(message.SerializeToString())
+        while True:
+            forward = ForwardMsg()
+            forward.ParseFromString(await self.connection.recv())
+            kind = forward.WhichOneof("type")
+            if kind == "delta":
+                self._track(forward.delta)
+            elif kind == "script_finished":
+                break
+        self.latencies.append(time.perf_counter() - start)
+
+    def _track(self, delta):
+        """
+        Remember the interactive widgets rendered by the page.
+        """
+        if delta.WhichOneof("type") != "new_element":
+            return
+        element = delta.new_element
+        kind = element.WhichOneof("type")
+        if kind == "component_instance":
+            self.menu_id = element.component_instance.id
+        elif kind in ("slider", "number_input"):
+            widget = getattr(element, kind)
+            self.widgets[widget.id] = (kind, widget, delta.fragment_id)
+
+    def _interaction(self):
+        """
+        Pick a widget change: mostly sliders and number inputs, sometimes the country tab.
+        Returns the fragment to rerun ("" for a full rerun).
+        """
+        if self.menu_id and self.rng.random() < 0.1:
+            state = WidgetState(id=self.menu_id, json_value=json.dumps(self.rng.choice(list(COUNTRIES))))
+            self.widget_states[self.menu_id] = state
+            # The new page renders a different set of widgets
+            self.widgets = {}
+            return ""
+        if not self.widgets:
+            return ""
+
+        widget_id = self.rng.choice(list(self.widgets))
+        kind, widget, fragment_id = self.widgets[widget_id]
+        state = WidgetState(id=widget_id)
+        if kind == "slider":
+            steps = int(round((widget.max - widget.min) / widget.step)) if widget.step else 0
+            state.double_array_value.data.append(widget.min + widget.step * self.rng.randint(0, max(steps, 0)))
+        else:
+            base = widget.default
+            value = max(0, base + widget.step * self.rng.randint(-5, 5))
+            if widget.data_type == widget.INT:
+                state.int_value = int(value)
+            else:
+                state.double_value = float(value)
+        self.widget_states[widget_id] = state
+        return fragment_id
+
+    async def run(self, interactions, think_time):
+        await self.rerun()
+        for _ in range(interactions):
+            await asyncio.sleep(self.rng.expovariate(1 / think_time) if think_time > 0 else 0)
+            await self.rerun(self._interaction())
+
+async def run_level(url, sessions, interactions, think_time, seed):
+    """
+    Run `sessions` concurrent sessions and return their rerun latencies.
+    """
+    async def one(index):
+        async with Session(url, random.Random(seed * 100_003 + index)) as session:
+            await session.run(interactions, think_time)
+            return session.latencies
+
+    results = await asyncio.gather(*(one(index) for index in range(sessions)))
+    return [latency for latencies in results for latency in latencies]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate concurrent sessions against the app on localhost.")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 5, 10, 25], help="session counts to test")
+    parser.add_argument("--interactions", type=int, default=20, help="widget changes per session")
+    parser.add_argument("--think-time", type=float, default=0.5, help="mean seconds between interactions")
+    parser.add_argument("--url", help="websocket URL of a running app instead of starting one")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    server = None
+    if args.url:
+        url = args.url
+    else:
+        port = _free_port()
+        server = start_server(port)
+        url = f"ws://127.0.0.1:{port}/_stcore/stream"
+
+    report = []
+    try:
+        # Import the app modules and fill the process caches before measuring
+        asyncio.run(run_level(url, 1, 0, 0, args.seed))
+        print(f"{'sessions':>8} {'reruns':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} "
+              f"{'reruns/s':>9} {'cpu cores':>9} {'rss MB':>8} {'MB/session':>10}")
+        for sessions in args.sessions:
+            before = process_stats(server.pid) if server else None
+            start = time.perf_counter()
+            latencies = asyncio.run(run_level(url, sessions, args.interactions, args.think_time, args.seed))
+            elapsed = time.perf_counter() - start
+            after = process_stats(server.pid) if server else None
+
+            row = {
+                "sessions": sessions,
+                "reruns": len(latencies),
+                "p50_seconds": float(np.percentile(latencies, 50)),
+                "p95_seconds": float(np.percentile(latencies, 95)),
+                "p99_seconds": float(np.percentile(latencies, 99)),
+                "max_seconds": float(np.max(latencies)),
+                "reruns_per_sec": len(latencies) / elapsed,
+            }
+            if before and after:
+                row["cpu_cores"] = (after[0] - before[0]) / elapsed
+                row["rss_bytes"] = after[1]
+                row["rss_bytes_per_session"] = (after[1] - before[1]) / sessions
+            report.append(row)
+
+            def mb(key):
+                return f"{row[key] / 2**20:.1f}" if key in row else "n/a"
+
+            cores = f"{row['cpu_cores']:.2f}" if "cpu_cores" in row else "n/a"
+            print(f"{sessions:>8} {row['reruns']:>7} {row['p50_seconds'] * 1000:>8.1f} "
+                  f"{row['p95_seconds'] * 1000:>8.1f} {row['p99_seconds'] * 1000:>8.1f} "
+                  f"{row['max_seconds'] * 1000:>8.1f} {row['reruns_per_sec']:>9.1f} {cores:>9} "
+                  f"{mb('rss_bytes'):>8} {mb('rss_bytes_per_session'):>10}")
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+"""
+Reproducible benchmarks for the calculation core and the country page reruns.
+
+    python -m benchmarks.run_benchmarks                      # run and compare with the baseline
+    python -m benchmarks.run_benchmarks --output results.json
+    python -m benchmarks.run_benchmarks --update-baseline    # accept the current numbers
+
+Every benchmark reports throughput (scenarios/sec) or rerun latency (p50/p95 seconds)
+plus peak traced memory. Results are JSON, keyed by benchmark and metric, so two runs
+can be compared directly. A metric regresses when it is worse than the baseline by more
+than the baseline's tolerance; the script then exits with status 1.
+
+Timings on a shared machine drift by more than any fixed tolerance, so the whole suite
+runs --rounds times and each metric keeps its best round. When the baseline is updated,
+every metric also stores its own tolerance: the spread measured between its best and
+worst round plus DEFAULT_TOLERANCE.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from affordability import max_affordable
+from countries import COUNTRIES
+from engine import DIRECT_CATEGORIES, EXPENSE_CATEGORIES, INPUT_FIELDS, OPTIONAL_FIELDS, calculate_batch
+from money import calculate_batch_minor, to_minor_inputs
+from projection import Projection
+from utils import calculate_mortgage_payment, calculate_monthly_income, calculate_annual_income
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_TOLERANCE = 0.25
+REPEATS = 5
+ROUNDS = 3
+
+# Metrics where a larger value is better; everything else should go down
+HIGHER_IS_BETTER = ("scenarios_per_sec",)
+
+def _scenarios(size, seed=0):
+    """
+    Random but reproducible scenario columns around the USA defaults.
+    """
+    rng = np.random.default_rng(seed)
+    defaults = COUNTRIES["USA"]["defaults"]
+    columns = {field: rng.uniform(0.5, 1.5, size) * defaults[field] for field in INPUT_FIELDS}
+    columns["mortgage_rate"] = rng.integers(0, 101, size) / 10
+    columns["tax_rate"] = rng.integers(0, 51, size).astype(np.float64)
+    return columns
+
+def _peak_memory(func):
+    """
+    Peak memory traced while running func once, in bytes.
+    """
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def _throughput(func, scenarios):
+    """
+    Best-of-REPEATS throughput of func, which handles `scenarios` scenarios per call.
+    """
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return {
+        "scenarios_per_sec": scenarios / best,
+        "peak_memory_bytes": _peak_memory(func),
+    }
+
+def bench_scalar(size=20_000):
+    """
+    The scalar functions from utils.py, one scenario at a time.
+    """
+    columns = _scenarios(size)
+    rows = [
+        (loan, rate / 100 / 12, years * 12, other, tax)
+        for loan, rate, years, other, tax in zip(
+            columns["house_cost"].tolist(), columns["mortgage_rate"].tolist(),
+            np.rint(columns["mortgage_years"]).tolist(), columns["utilities"].tolist(),
+            columns["tax_rate"].tolist())
+    ]
+
+    def run():
+        for loan, rate, months, other, tax in rows:
+            total = calculate_mortgage_payment(loan, rate, months) + other
+            calculate_annual_income(calculate_monthly_income(total, tax))
+
+    return _throughput(run, size)
+
+def bench_batch(size=1_000_000):
+    """
+    engine.calculate_batch over one large batch.
+    """
+    columns = _scenarios(size)
+    return _throughput(lambda: calculate_batch(columns), size)
+
+def bench_batch_progressive_tax(size=1_000_000):
+    """
+    engine.calculate_batch with the progressive tax gross-up.
+    """
+    columns = _scenarios(size)
+    return _throughput(lambda: calculate_batch(columns, "USA"), size)
+
+def bench_batch_fixed_point(size=1_000_000):
+    """
+    money.calculate_batch_minor over one large batch already in minor units.
+    """
+    columns = to_minor_inputs(_scenarios(size), "USD")
+    return _throughput(lambda: calculate_batch_minor(columns, "USD"), size)
+
+def bench_affordability(size=1_000_000):
+    """
+    Closed-form maximum affordable house over one large batch.
+    """
+    columns = _scenarios(size)
+    income = calculate_batch(columns)["required_annual_income"]
+    return _throughput(lambda: max_affordable(columns, income), size)
+
+def bench_projection(years=40, repeats=200):
+    """
+    40-year projection: a full computation and an incremental one after one input changed.
+    """
+    defaults = COUNTRIES["USA"]["defaults"]
+    categories = [category for category in EXPENSE_CATEGORIES if DIRECT_CATEGORIES.get(category) not in OPTIONAL_FIELDS]
+    parameters = {"years": years}
+
+    def full():
+        Projection(categories).compute(defaults, parameters)
+
+    projection = Projection(categories)
+    projection.compute(defaults, parameters)
+    changed = [dict(defaults, daily_food=defaults["daily_food"] + index % 2) for index in range(2)]
+
+    def timings(func):
+        # Sub-millisecond medians follow the machine's load; keep the best of REPEATS rounds
+        best = float("inf")
+        for _ in range(REPEATS):
+            latencies = []
+            for index in range(repeats):
+                start = time.perf_counter()
+                func(index)
+                latencies.append(time.perf_counter() - start)
+            best = min(best, float(np.percentile(latencies, 50)))
+        return best
+
+    return {
+        "full_p50_seconds": timings(lambda index: full()),
+        "incremental_p50_seconds": timings(lambda index: projection.compute(changed[index % 2], parameters)),
+        "peak_memory_bytes": _peak_memory(full),
+    }
+
+def bench_page(country, reruns=30):
+    """
+    Headless reruns of one country page through Streamlit's app-testing harness.
+    Each rerun moves the first slider, alternating between fresh and revisited values.
+    """
+    from streamlit.testing.v1 import AppTest
+
+    script = (
+        "import main\n"
+        f"main.country_page(main.COUNTRIES[{country!r}])\n"
+    )
+    app = AppTest.from_string(script, default_timeout=60)
+    app.run()
+    slider = app.slider[0]
+    values = list(range(int(slider.min), int(slider.max) + 1, 5))
+
+    latencies = []
+    for index in range(reruns):
+        app.slider[0].set_value(values[index % len(values)])
+        start = time.perf_counter()
+        app.run()
+        latencies.append(time.perf_counter() - start)
+        if app.exception:
+            raise RuntimeError(f"{country} page failed: {app.exception[0].message}")
+
+    def rerun_once():
+        app.slider[0].set_value(values[0])
+        app.run()
+
+    return {
+        "p50_seconds": float(np.percentile(latencies, 50)),
+        "p95_seconds": float(np.percentile(latencies, 95)),
+        "peak_memory_bytes": _peak_memory(rerun_once),
+    }
+
+def run_all(include_pages=True):
+    results = {
+        "core.scalar": bench_scalar(),
+        "core.batch": bench_batch(),
+        "core.batch_progressive_tax": bench_batch_progressive_tax(),
+        "core.batch_fixed_point": bench_batch_fixed_point(),
+        "core.affordability": bench_affordability(),
+        "core.projection": bench_projection(),
+    }
+    if include_pages:
+        for country in COUNTRIES:
+            results[f"page.{COUNTRIES[country]['code']}"] = bench_page(country)
+    return results
+
+def _best(metric, values):
+    return max(values) if metric in HIGHER_IS_BETTER else min(values)
+
+def best_of(rounds):
+    """
+    Collapse several run_all results into one, keeping each metric's best round.
+    """
+    return {
+        name: {metric: _best(metric, [result[name][metric] for result in rounds]) for metric in metrics}
+        for name, metrics in rounds[0].items()
+    }
+
+def measured_tolerances(rounds):
+    """
+    Per-metric tolerance: how much worse than its best round a metric's worst round was,
+    plus DEFAULT_TOLERANCE.
+    """
+    tolerances = {}
+    for name, metrics in rounds[0].items():
+        tolerances[name] = {}
+        for metric in metrics:
+            values = [result[name][metric] for result in rounds]
+            spread = max(values) / min(values) - 1 if min(values) > 0 else 0.0
+            tolerances[name][metric] = round(spread + DEFAULT_TOLERANCE, 2)
+    return tolerances
+
+def compare(results, baseline):
+    """
+    Return a list of (benchmark, metric, baseline, current) for every regression.
+    """
+    default = baseline.get("tolerance", DEFAULT_TOLERANCE)
+    tolerances = baseline.get("tolerances", {})
+    regressions = []
+    for name, metrics in baseline["results"].items():
+        for metric, expected in metrics.items():
+            current = results.get(name, {}).get(metric)
+            if current is None:
+                continue
+            tolerance = tolerances.get(name, {}).get(metric, default)
+            if metric in HIGHER_IS_BETTER:
+                regressed = current < expected / (1 + tolerance)
+            else:
+                regressed = current > expected * (1 + tolerance)
+            if regressed:
+                regressions.append((name, metric, expected, current))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the calculator core and page reruns.")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline JSON to compare against")
+    parser.add_argument("--update-baseline", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--skip-pages", action="store_true", help="only benchmark the calculation core")
+    parser.add_argument("--rounds", type=int, default=ROUNDS, help="run the suite this many times and keep the best")
+    args = parser.parse_args(argv)
+    if args.rounds < 1:
+        parser.error("--rounds must be at least 1")
+    if args.update_baseline and args.rounds < ROUNDS:
+        parser.error(f"--update-baseline needs at least {ROUNDS} rounds to measure each metric's spread")
+
+    rounds = [run_all(include_pages=not args.skip_pages) for _ in range(args.rounds)]
+    results = best_of(rounds)
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "rounds": args.rounds,
+        "results": results,
+    }
+
+    for name, metrics in results.items():
+        formatted = ", ".join(f"{metric}={value:,.4g}" for metric, value in metrics.items())
+        print(f"{name:<32} {formatted}")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+    if args.update_baseline:
+        report["tolerance"] = DEFAULT_TOLERANCE
+        report["tolerances"] = measured_tolerances(rounds)
+        with open(args.baseline, "w") as file:
+            json.dump(report, file, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare against; run with --update-baseline first.")
+        return
+    with open(args.baseline) as file:
+        regressions = compare(results, json.load(file))
+    for name, metric, expected, current in regressions:
+        print(f"REGRESSION {name} {metric}: baseline {expected:,.4g}, now {current:,.4g}")
+    if regressions:
+        sys.exit(1)
+    print("No regressions against the baseline.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import os
+import threading
+from collections import OrderedDict
+
+class LRUCache:
+    """
+    Bounded least-recently-used cache shared by all sessions of a process.
+    Keeps hit/miss/eviction counters so the size can be tuned under real traffic.
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        """
+        Return the cached value for key, calling compute() and storing its result on a miss.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        value = compute()
+
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Return the current size and the hit/miss/eviction counters.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+# Results shared by every session of this process, keyed on the normalized page inputs.
+# It lives here rather than in main.py because Streamlit re-executes the main script on
+# every rerun, which would start each rerun with an empty cache.
+results_cache = LRUCache(maxsize=int(os.environ.get("RESULTS_CACHE_SIZE", "512")))
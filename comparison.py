@@ -0,0 +1,109 @@
+"""
+Cross-country comparison of one lifestyle profile.
+
+Amounts in the profile are converted from its currency into every country's currency.
+The home country (the one the profile was entered for) keeps the entered interest,
+property tax and income tax rates; every other country uses its own default rates,
+since those follow the local market. All countries are then evaluated as one batch and
+the results converted to the display currency. Exchange rates come from a local snapshot
+file that is read once per process.
+"""
+import functools
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from countries import COUNTRIES
+from engine import EXPENSE_CATEGORIES, INPUT_FIELDS, OPTIONAL_FIELDS, calculate_batch
+
+FX_SNAPSHOT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fx_rates.json")
+
+# Inputs that follow the local market rather than the lifestyle
+LOCAL_FIELDS = ("mortgage_rate", "vehicle_loan_rate", "property_tax_rate", "tax_rate")
+
+# Inputs that are not amounts of money and are used as entered
+UNITLESS_FIELDS = ("down_payment_percent", "mortgage_years", "vehicle_loan_years") + LOCAL_FIELDS
+
+@functools.lru_cache(maxsize=None)
+def load_fx_rates(path=FX_SNAPSHOT_PATH):
+    """
+    Read the FX snapshot: {'base': ..., 'date': ..., 'rates': {code: units per base}}.
+    """
+    with open(path) as file:
+        return json.load(file)
+
+def fx_factor(from_code, to_code, snapshot=None):
+    """
+    Amount of to_code currency per unit of from_code currency.
+    """
+    rates = (snapshot or load_fx_rates())["rates"]
+    return rates[to_code] / rates[from_code]
+
+def _calculate_by_tax_system(columns, tax_systems):
+    """
+    calculate_batch with a different bracket table per row: one batch per table over the
+    rows that use it, merged back into row order.
+    """
+    tax_systems = np.asarray(tax_systems)
+    results = None
+    for tax_system in dict.fromkeys(tax_systems.tolist()):
+        rows = tax_systems == tax_system
+        part = calculate_batch({field: values[rows] for field, values in columns.items()}, tax_system)
+        if results is None:
+            results = {
+                "monthly_expenses": {category: np.empty(rows.size) for category in part["monthly_expenses"]},
+                **{key: np.empty(rows.size) for key in part if key != "monthly_expenses"},
+            }
+        for category, amounts in part["monthly_expenses"].items():
+            results["monthly_expenses"][category][rows] = amounts
+        for key, values in part.items():
+            if key != "monthly_expenses":
+                results[key][rows] = values
+    return results
+
+def compare_countries(profile, profile_currency, display_currency, progressive_tax=False,
+                      home_country=None, countries=None):
+    """
+    Evaluate one lifestyle profile for every country in a single batch.
+    profile: scalar value per engine.INPUT_FIELDS field, amounts in profile_currency
+    home_country: country the profile was entered for; it keeps the profile's rates and
+    country specific expenses, every other country uses its own defaults for those
+    Returns a DataFrame indexed by country with the expense categories, the total and
+    the required monthly and annual income, all in display_currency.
+    """
+    countries = list((countries or COUNTRIES).values())
+    snapshot = load_fx_rates()
+    to_local = np.array([fx_factor(profile_currency, country["currency_code"], snapshot) for country in countries])
+    to_display = np.array([fx_factor(country["currency_code"], display_currency, snapshot) for country in countries])
+
+    home = np.array([country["name"] == home_country for country in countries])
+
+    columns = {}
+    for field in INPUT_FIELDS:
+        if field in LOCAL_FIELDS:
+            defaults = np.array([country["defaults"][field] for country in countries], dtype=np.float64)
+            columns[field] = np.where(home, profile[field], defaults)
+        elif field in UNITLESS_FIELDS:
+            columns[field] = np.full(len(countries), profile[field], dtype=np.float64)
+        else:
+            columns[field] = profile[field] * to_local
+    for field in OPTIONAL_FIELDS:
+        defaults = np.array([country["defaults"].get(field, 0) for country in countries], dtype=np.float64)
+        columns[field] = np.where(home, profile[field], defaults) if field in profile else defaults
+
+    if progressive_tax:
+        results = _calculate_by_tax_system(columns, [country["name"] for country in countries])
+    else:
+        results = calculate_batch(columns)
+
+    table = pd.DataFrame(
+        {category: results["monthly_expenses"][category] * to_display for category in EXPENSE_CATEGORIES},
+        index=pd.Index([country["name"] for country in countries], name="Country"),
+    )
+    table = table.loc[:, (table != 0).any()]
+    table["Total Monthly Expenses"] = results["total_monthly_expenses"] * to_display
+    table["Required Monthly Income"] = results["required_monthly_income"] * to_display
+    table["Required Annual Income"] = results["required_annual_income"] * to_display
+    return table
@@ -0,0 +1,270 @@
+"""
+Country specifications for the lifestyle cost calculator.
+
+Every country shares the same inputs and layout; a specification only lists the
+defaults, ranges, currency (symbol and ISO code) and extra expense categories. The specifications are
+compiled into ready-to-render widget lists once, when the module is first imported.
+"""
+
+# Input layout shared by all countries: column -> sections -> (field, widget, label).
+# Labels containing {currency} get the country's currency symbol.
+LAYOUT = [
+    [
+        ("Housing Costs", [
+            ("house_cost", "number", "Cost of desired house ({currency})"),
+            ("down_payment_percent", "slider", "Down payment percentage"),
+            ("mortgage_years", "slider", "Mortgage term (years)"),
+            ("mortgage_rate", "slider", "Mortgage interest rate (%)"),
+            ("property_tax_rate", "slider", "Annual property tax rate (%)"),
+            ("house_maintenance", "number", "Monthly house maintenance costs ({currency})"),
+            ("homeowners_insurance", "number", "Monthly homeowners insurance ({currency})"),
+        ]),
+        ("Vehicle Expenses", [
+            ("vehicle_cost", "number", "Total vehicle costs ({currency})"),
+            ("vehicle_loan_years", "slider", "Vehicle loan term (years)"),
+            ("vehicle_loan_rate", "slider", "Vehicle loan interest rate (%)"),
+            ("vehicle_insurance", "number", "Monthly vehicle insurance ({currency})"),
+            ("vehicle_maintenance", "number", "Monthly vehicle maintenance ({currency})"),
+            ("fuel_costs", "number", "Monthly fuel costs ({currency})"),
+        ]),
+    ],
+    [
+        ("Daily Expenses", [
+            ("daily_food", "number", "Daily food expenses ({currency})"),
+            ("daily_transport", "number", "Daily transport expenses ({currency})"),
+            ("entertainment", "number", "Monthly entertainment expenses ({currency})"),
+            ("personal_care", "number", "Monthly personal care expenses ({currency})"),
+        ]),
+        ("Financial Goals", [
+            ("savings_goal", "number", "Monthly savings goal ({currency})"),
+            ("investment_goal", "number", "Monthly investment goal ({currency})"),
+            ("retirement_savings", "number", "Monthly retirement savings ({currency})"),
+        ]),
+        ("Other Expenses", [
+            ("utilities", "number", "Monthly utilities ({currency})"),
+            ("health_insurance", "number", "Monthly health insurance ({currency})"),
+            ("life_insurance", "number", "Monthly life insurance ({currency})"),
+            ("travel_budget", "number", "Monthly travel budget ({currency})"),
+            ("misc_expenses", "number", "Miscellaneous monthly expenses ({currency})"),
+        ]),
+        # Country specific expenses are inserted here
+        ("Income Tax", [
+            ("tax_rate", "slider", "Estimated income tax rate (%)"),
+            ("progressive_tax", "toggle", "Use progressive tax brackets instead"),
+        ]),
+    ],
+]
+
+# Number inputs take (value, step), sliders (min, max, value) or (min, max, value, step),
+# toggles (value,)
+COUNTRY_SPECS = [
+    {
+        "name": "USA",
+        "title": "the USA",
+        "currency": "$",
+        "currency_code": "USD",
+        "decimals": 2,
+        "inputs": {
+            "house_cost": (500000, 10000),
+            "down_payment_percent": (0, 100, 20),
+            "mortgage_years": (5, 30, 30),
+            "mortgage_rate": (0.0, 10.0, 3.5, 0.1),
+            "property_tax_rate": (0.0, 5.0, 1.2, 0.1),
+            "house_maintenance": (300, 50),
+            "homeowners_insurance": (150, 50),
+            "vehicle_cost": (35000, 5000),
+            "vehicle_loan_years": (1, 7, 5),
+            "vehicle_loan_rate": (0.0, 10.0, 4.5, 0.1),
+            "vehicle_insurance": (150, 50),
+            "vehicle_maintenance": (100, 50),
+            "fuel_costs": (200, 50),
+            "daily_food": (40, 5),
+            "daily_transport": (10, 5),
+            "entertainment": (300, 50),
+            "personal_care": (150, 50),
+            "savings_goal": (500, 100),
+            "investment_goal": (500, 100),
+            "retirement_savings": (500, 100),
+            "utilities": (250, 50),
+            "health_insurance": (400, 50),
+            "life_insurance": (100, 50),
+            "travel_budget": (300, 100),
+            "misc_expenses": (300, 50),
+            "progressive_tax": (False,),
+            "tax_rate": (0, 50, 25),
+        },
+        "extra_expenses": [],
+    },
+    {
+        "name": "Netherlands",
+        "title": "the Netherlands",
+        "currency": "€",
+        "currency_code": "EUR",
+        "decimals": 2,
+        "inputs": {
+            "house_cost": (400000, 10000),
+            "down_payment_percent": (0, 100, 10),
+            "mortgage_years": (5, 30, 30),
+            "mortgage_rate": (0.0, 5.0, 2.0, 0.1),
+            "property_tax_rate": (0.0, 1.0, 0.1, 0.01),
+            "house_maintenance": (200, 50),
+            "homeowners_insurance": (50, 10),
+            "vehicle_cost": (25000, 5000),
+            "vehicle_loan_years": (1, 7, 5),
+            "vehicle_loan_rate": (0.0, 10.0, 3.5, 0.1),
+            "vehicle_insurance": (100, 25),
+            "vehicle_maintenance": (75, 25),
+            "fuel_costs": (150, 25),
+            "daily_food": (20, 5),
+            "daily_transport": (5, 1),
+            "entertainment": (200, 50),
+            "personal_care": (100, 25),
+            "savings_goal": (500, 100),
+            "investment_goal": (300, 100),
+            "retirement_savings": (300, 100),
+            "utilities": (200, 50),
+            "health_insurance": (120, 10),
+            "life_insurance": (50, 10),
+            "travel_budget": (200, 50),
+            "misc_expenses": (200, 50),
+            "progressive_tax": (False,),
+            "tax_rate": (0, 60, 40),
+        },
+        "extra_expenses": [],
+    },
+    {
+        "name": "South Africa",
+        "title": "South Africa",
+        "currency": "R",
+        "currency_code": "ZAR",
+        "decimals": 2,
+        "inputs": {
+            "house_cost": (2000000, 100000),
+            "down_payment_percent": (0, 100, 10),
+            "mortgage_years": (5, 30, 20),
+            "mortgage_rate": (0.0, 15.0, 7.0, 0.1),
+            "property_tax_rate": (0.0, 3.0, 1.5, 0.1),
+            "house_maintenance": (3000, 500),
+            "homeowners_insurance": (1000, 100),
+            "vehicle_cost": (300000, 50000),
+            "vehicle_loan_years": (1, 7, 5),
+            "vehicle_loan_rate": (0.0, 15.0, 9.0, 0.1),
+            "vehicle_insurance": (1500, 100),
+            "vehicle_maintenance": (1000, 100),
+            "fuel_costs": (2000, 100),
+            "daily_food": (200, 10),
+            "daily_transport": (50, 10),
+            "entertainment": (2000, 100),
+            "personal_care": (1000, 100),
+            "savings_goal": (3000, 500),
+            "investment_goal": (2000, 500),
+            "retirement_savings": (2000, 500),
+            "utilities": (2000, 100),
+            "health_insurance": (1500, 100),
+            "life_insurance": (500, 100),
+            "travel_budget": (2000, 500),
+            "misc_expenses": (1500, 100),
+            "progressive_tax": (False,),
+            "tax_rate": (0, 45, 30),
+        },
+        # (field, label, expense category, (value, step))
+        "extra_expenses": [
+            ("private_security", "Monthly private security costs ({currency})", "Private Security", (1500, 100)),
+        ],
+    },
+    {
+        "name": "South Korea",
+        "title": "South Korea",
+        "currency": "₩",
+        "currency_code": "KRW",
+        "decimals": 0,
+        "inputs": {
+            "house_cost": (500000000, 10000000),
+            "down_payment_percent": (0, 100, 20),
+            "mortgage_years": (5, 30, 20),
+            "mortgage_rate": (0.0, 10.0, 3.0, 0.1),
+            "property_tax_rate": (0.0, 1.0, 0.3, 0.01),
+            "house_maintenance": (300000, 50000),
+            "homeowners_insurance": (50000, 10000),
+            "vehicle_cost": (30000000, 1000000),
+            "vehicle_loan_years": (1, 7, 5),
+            "vehicle_loan_rate": (0.0, 10.0, 4.0, 0.1),
+            "vehicle_insurance": (100000, 10000),
+            "vehicle_maintenance": (100000, 10000),
+            "fuel_costs": (200000, 50000),
+            "daily_food": (20000, 1000),
+            "daily_transport": (3000, 500),
+            "entertainment": (300000, 50000),
+            "personal_care": (100000, 10000),
+            "savings_goal": (500000, 100000),
+            "investment_goal": (300000, 50000),
+            "retirement_savings": (300000, 50000),
+            "utilities": (200000, 10000),
+            "health_insurance": (100000, 10000),
+            "life_insurance": (50000, 10000),
+            "travel_budget": (300000, 50000),
+            "misc_expenses": (200000, 50000),
+            "progressive_tax": (False,),
+            "tax_rate": (0, 50, 25),
+        },
+        "extra_expenses": [
+            ("public_transportation", "Monthly public transportation costs ({currency})", "Public Transportation", (100000, 10000)),
+        ],
+    },
+]
+
+def _compile_widget(code, currency, field, widget, label, params):
+    """
+    Build the (field, widget, label, kwargs) entry for one input.
+    """
+    label = label.format(currency=currency)
+    if widget == "number":
+        value, step = params
+        kwargs = {"min_value": 0, "value": value, "step": step}
+    elif widget == "toggle":
+        kwargs = {"value": params[0]}
+    else:
+        min_value, max_value, value = params[:3]
+        kwargs = {"min_value": min_value, "max_value": max_value, "value": value}
+        if len(params) == 4:
+            kwargs["step"] = params[3]
+    kwargs["key"] = f"{code}_{field}"
+    return (field, widget, label, kwargs)
+
+def compile_country(spec):
+    """
+    Resolve a country specification into everything the page needs to render.
+    """
+    code = spec["name"].lower().replace(" ", "_")
+    currency = spec["currency"]
+    columns = []
+    for column in LAYOUT:
+        sections = []
+        for subheader, fields in column:
+            if subheader == "Income Tax" and spec["extra_expenses"]:
+                sections.append((f"{spec['name']} Specific Expenses", [
+                    _compile_widget(code, currency, field, "number", label, params)
+                    for field, label, _, params in spec["extra_expenses"]
+                ]))
+            sections.append((subheader, [
+                _compile_widget(code, currency, field, widget, label, spec["inputs"][field])
+                for field, widget, label in fields
+            ]))
+        columns.append(sections)
+
+    return {
+        "name": spec["name"],
+        "code": code,
+        "title": spec["title"],
+        "currency": currency,
+        "currency_code": spec["currency_code"],
+        "decimals": spec["decimals"],
+        "columns": columns,
+        "extra_categories": {field: category for field, _, category, _ in spec["extra_expenses"]},
+        "defaults": {
+            **{field: params[2] if len(params) > 2 else params[0] for field, params in spec["inputs"].items()},
+            **{field: params[0] for field, _, _, params in spec["extra_expenses"]},
+        },
+    }
+
+COUNTRIES = {spec["name"]: compile_country(spec) for spec in COUNTRY_SPECS}
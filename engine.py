@@ -0,0 +1,174 @@
+import numpy as np
+from tax import gross_up
+from utils import calculate_monthly_income, calculate_annual_income
+
+# Input columns, named after the variables in the page functions of main.py
+INPUT_FIELDS = [
+    "house_cost",
+    "down_payment_percent",
+    "mortgage_years",
+    "mortgage_rate",
+    "property_tax_rate",
+    "house_maintenance",
+    "homeowners_insurance",
+    "vehicle_cost",
+    "vehicle_loan_years",
+    "vehicle_loan_rate",
+    "vehicle_insurance",
+    "vehicle_maintenance",
+    "fuel_costs",
+    "daily_food",
+    "daily_transport",
+    "entertainment",
+    "personal_care",
+    "savings_goal",
+    "investment_goal",
+    "retirement_savings",
+    "utilities",
+    "health_insurance",
+    "life_insurance",
+    "travel_budget",
+    "misc_expenses",
+    "tax_rate",
+]
+
+# Country specific inputs, treated as zero when a batch does not provide them
+OPTIONAL_FIELDS = [
+    "private_security",
+    "public_transportation",
+]
+
+# Expense categories in the order the pages add them up
+EXPENSE_CATEGORIES = [
+    "Mortgage",
+    "Property Tax",
+    "House Maintenance",
+    "Homeowners Insurance",
+    "Vehicle Payment",
+    "Vehicle Insurance",
+    "Vehicle Maintenance",
+    "Fuel",
+    "Food",
+    "Transport",
+    "Entertainment",
+    "Personal Care",
+    "Utilities",
+    "Health Insurance",
+    "Life Insurance",
+    "Travel",
+    "Miscellaneous",
+    "Private Security",
+    "Public Transportation",
+    "Savings",
+    "Investments",
+    "Retirement Savings",
+]
+
+# Categories taken directly from a single monthly input
+DIRECT_CATEGORIES = {
+    "House Maintenance": "house_maintenance",
+    "Homeowners Insurance": "homeowners_insurance",
+    "Vehicle Insurance": "vehicle_insurance",
+    "Vehicle Maintenance": "vehicle_maintenance",
+    "Fuel": "fuel_costs",
+    "Entertainment": "entertainment",
+    "Personal Care": "personal_care",
+    "Utilities": "utilities",
+    "Health Insurance": "health_insurance",
+    "Life Insurance": "life_insurance",
+    "Travel": "travel_budget",
+    "Miscellaneous": "misc_expenses",
+    "Private Security": "private_security",
+    "Public Transportation": "public_transportation",
+    "Savings": "savings_goal",
+    "Investments": "investment_goal",
+    "Retirement Savings": "retirement_savings",
+}
+
+def calculate_mortgage_payment_batch(P, r, n):
+    """
+    Calculate monthly loan payments for arrays of loans.
+    Matches utils.calculate_mortgage_payment element by element,
+    including a zero interest rate.
+    """
+    P = np.asarray(P, dtype=np.float64)
+    r = np.asarray(r, dtype=np.float64)
+    n = np.asarray(n, dtype=np.float64)
+    # float_power follows the C pow() used by Python floats, unlike the SIMD
+    # kernels of np.power, so results stay bit for bit identical
+    growth = np.float_power(1 + r, n)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        payment = P * (r * growth) / (growth - 1)
+        return np.where(r == 0, P / n, payment)
+
+def _column(inputs, field, size=None):
+    """
+    Fetch an input column as a float array, filling missing optional fields with zeros.
+    """
+    if field not in inputs:
+        if field in OPTIONAL_FIELDS:
+            return np.zeros(size)
+        raise KeyError(f"Missing input column: {field}")
+    values = np.asarray(inputs[field], dtype=np.float64)
+    if field in OPTIONAL_FIELDS:
+        values = np.nan_to_num(values)
+    return values
+
+def calculate_batch(inputs, tax_system=None):
+    """
+    Calculate the monthly expense breakdown and required income for a batch of scenarios.
+    inputs: mapping (dict, DataFrame, ...) of column name to array, see INPUT_FIELDS
+    tax_system: country name from tax.TAX_BRACKETS to gross up with progressive brackets
+    instead of the flat tax_rate column (which is then not needed)
+    Returns a dict with the per-category 'monthly_expenses', 'total_monthly_expenses',
+    'required_monthly_income' and 'required_annual_income' arrays.
+    """
+    columns = {
+        field: _column(inputs, field)
+        for field in INPUT_FIELDS
+        if field != "tax_rate" or tax_system is None
+    }
+    size = len(columns["house_cost"])
+    for field in OPTIONAL_FIELDS:
+        columns[field] = _column(inputs, field, size)
+
+    loan_amount = columns["house_cost"] * (1 - columns["down_payment_percent"] / 100)
+    monthly_mortgage = calculate_mortgage_payment_batch(
+        loan_amount, columns["mortgage_rate"] / 100 / 12, columns["mortgage_years"] * 12)
+    monthly_property_tax = columns["house_cost"] * (columns["property_tax_rate"] / 100) / 12
+    monthly_vehicle_payment = calculate_mortgage_payment_batch(
+        columns["vehicle_cost"], columns["vehicle_loan_rate"] / 100 / 12, columns["vehicle_loan_years"] * 12)
+
+    monthly_expenses = {}
+    for category in EXPENSE_CATEGORIES:
+        if category == "Mortgage":
+            monthly_expenses[category] = monthly_mortgage
+        elif category == "Property Tax":
+            monthly_expenses[category] = monthly_property_tax
+        elif category == "Vehicle Payment":
+            monthly_expenses[category] = monthly_vehicle_payment
+        elif category == "Food":
+            monthly_expenses[category] = columns["daily_food"] * 30
+        elif category == "Transport":
+            monthly_expenses[category] = columns["daily_transport"] * 30
+        else:
+            monthly_expenses[category] = columns[DIRECT_CATEGORIES[category]]
+
+    # Accumulate in page order so totals match sum(monthly_expenses.values())
+    total_monthly_expenses = np.zeros(size)
+    for amount in monthly_expenses.values():
+        total_monthly_expenses = total_monthly_expenses + amount
+
+    if tax_system is None:
+        required_monthly_income = calculate_monthly_income(total_monthly_expenses, columns["tax_rate"])
+        required_annual_income = calculate_annual_income(required_monthly_income)
+    else:
+        required_annual_income = gross_up(calculate_annual_income(total_monthly_expenses), tax_system)
+        required_monthly_income = required_annual_income / 12
+
+    return {
+        "monthly_expenses": monthly_expenses,
+        "total_monthly_expenses": total_monthly_expenses,
+        "required_monthly_income": required_monthly_income,
+        "required_annual_income": required_annual_income,
+    }
@@ -0,0 +1,234 @@
+"""
+Opt-in timing and profiling of page reruns.
+
+Set METRICS_FILE to enable it. A path ending in .prom is rewritten after every rerun
+as a Prometheus textfile (for the node exporter textfile collector); any other path
+gets one JSON line per rerun. While enabled, opening the app with ?profile=1 profiles
+that single rerun with cProfile (?profile=pyinstrument uses pyinstrument if it is
+installed) and saves the report next to METRICS_FILE. Measuring the session state size
+pickles every value, so it is separately opt-in: METRICS_SESSION_BYTES_EVERY=N records
+it on every Nth rerun of a session.
+
+When METRICS_FILE is not set, section() and rerun() return a shared no-op context
+manager, so the instrumented code pays one function call per phase. rerun() and
+profile() may be nested (a fragment runs inside them on a full rerun and on its own
+otherwise); only the outermost one records.
+"""
+import contextlib
+import io
+import json
+import os
+import pickle
+import sys
+import threading
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows
+    resource = None
+
+METRICS_FILE = os.environ.get("METRICS_FILE")
+ENABLED = bool(METRICS_FILE)
+SESSION_BYTES_EVERY = int(os.environ.get("METRICS_SESSION_BYTES_EVERY", "0"))
+
+if ENABLED and resource is None and not tracemalloc.is_tracing():
+    # Without getrusage the peak memory comes from tracemalloc (Python allocations only)
+    tracemalloc.start()
+
+_NULL_CONTEXT = contextlib.nullcontext()
+_current = threading.local()
+_lock = threading.Lock()
+
+# Process-wide aggregates: page -> count, (page, section) -> [seconds, count]
+_rerun_counts = {}
+_section_totals = {}
+_last_session_bytes = None
+
+class _Section:
+    """
+    Time one phase of the current rerun.
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        timings = getattr(_current, "timings", None)
+        if timings is not None:
+            timings[self.name] = timings.get(self.name, 0.0) + time.perf_counter() - self.start
+
+def section(name):
+    """
+    Context manager timing one phase (inputs, calculation, metrics, ...) of a rerun.
+    """
+    if not ENABLED:
+        return _NULL_CONTEXT
+    return _Section(name)
+
+def _session_bytes(session_state):
+    """
+    Approximate memory held by a session, measured as the pickled size of its state.
+    """
+    total = 0
+    for key in list(session_state.keys()):
+        try:
+            total += len(pickle.dumps(session_state[key]))
+        except Exception:
+            total += sys.getsizeof(session_state[key])
+    return total
+
+def _max_rss_bytes():
+    if resource is None:
+        return tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else None
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+@contextlib.contextmanager
+def _rerun(page, session_state):
+    global _last_session_bytes
+    _current.timings = {}
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        total = time.perf_counter() - start
+        timings, _current.timings = _current.timings, None
+        session_reruns = None
+        session_bytes = None
+        if session_state is not None:
+            session_reruns = session_state.get("_rerun_count", 0) + 1
+            session_state["_rerun_count"] = session_reruns
+            if SESSION_BYTES_EVERY and session_reruns % SESSION_BYTES_EVERY == 0:
+                session_bytes = _session_bytes(session_state)
+        record = {
+            "timestamp": time.time(),
+            "page": page,
+            "total_seconds": total,
+            "sections": timings,
+            "session_reruns": session_reruns,
+            "session_bytes": session_bytes,
+            "max_rss_bytes": _max_rss_bytes(),
+        }
+        with _lock:
+            if session_bytes is not None:
+                _last_session_bytes = session_bytes
+            _rerun_counts[page] = _rerun_counts.get(page, 0) + 1
+            for name, seconds in [("total", total), *timings.items()]:
+                aggregate = _section_totals.setdefault((page, name), [0.0, 0])
+                aggregate[0] += seconds
+                aggregate[1] += 1
+            write_metrics(record)
+
+def rerun(page, session_state=None):
+    """
+    Context manager recording the phases, duration and session memory of one page rerun.
+    """
+    if not ENABLED or getattr(_current, "timings", None) is not None:
+        return _NULL_CONTEXT
+    return _rerun(page, session_state)
+
+def _prometheus_text(record):
+    lines = [
+        "# HELP dreamlife_reruns_total Page reruns handled by this process.",
+        "# TYPE dreamlife_reruns_total counter",
+    ]
+    for page, count in sorted(_rerun_counts.items()):
+        lines.append(f'dreamlife_reruns_total{{page="{page}"}} {count}')
+    lines += [
+        "# HELP dreamlife_rerun_section_seconds Time spent per phase of a page rerun.",
+        "# TYPE dreamlife_rerun_section_seconds summary",
+    ]
+    for (page, name), (seconds, count) in sorted(_section_totals.items()):
+        lines.append(f'dreamlife_rerun_section_seconds_sum{{page="{page}",section="{name}"}} {seconds:.6f}')
+        lines.append(f'dreamlife_rerun_section_seconds_count{{page="{page}",section="{name}"}} {count}')
+    if record["max_rss_bytes"] is not None:
+        lines += [
+            "# HELP dreamlife_process_max_rss_bytes Peak resident memory of the process.",
+            "# TYPE dreamlife_process_max_rss_bytes gauge",
+            f"dreamlife_process_max_rss_bytes {record['max_rss_bytes']}",
+        ]
+    if _last_session_bytes is not None:
+        lines += [
+            "# HELP dreamlife_last_session_state_bytes Pickled session state size at the last sampled rerun.",
+            "# TYPE dreamlife_last_session_state_bytes gauge",
+            f"dreamlife_last_session_state_bytes {_last_session_bytes}",
+        ]
+    return "\n".join(lines) + "\n"
+
+def write_metrics(record):
+    """
+    Export a rerun record to METRICS_FILE. Must be called with _lock held.
+    """
+    if METRICS_FILE.endswith(".prom"):
+        # Write to a temporary file and rename so the collector never reads half a file
+        temporary = f"{METRICS_FILE}.{os.getpid()}.tmp"
+        with open(temporary, "w") as file:
+            file.write(_prometheus_text(record))
+        os.replace(temporary, METRICS_FILE)
+    else:
+        with open(METRICS_FILE, "a") as file:
+            file.write(json.dumps(record) + "\n")
+
+@contextlib.contextmanager
+def _profile(mode, report):
+    _current.profiling = True
+    try:
+        with _profile_run(mode, report):
+            yield
+    finally:
+        _current.profiling = False
+
+@contextlib.contextmanager
+def _profile_run(mode, report):
+    directory = os.path.dirname(os.path.abspath(METRICS_FILE))
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    if mode == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            mode = "cprofile"
+    if mode == "pyinstrument":
+        profiler = Profiler()
+        profiler.start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+        path = os.path.join(directory, f"profile-{stamp}.html")
+        with open(path, "w") as file:
+            file.write(profiler.output_html())
+        report(path, profiler.output_text())
+    else:
+        import cProfile
+        import pstats
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+        path = os.path.join(directory, f"profile-{stamp}.prof")
+        profiler.dump_stats(path)
+        text = io.StringIO()
+        pstats.Stats(profiler, stream=text).sort_stats("cumulative").print_stats(30)
+        report(path, text.getvalue())
+
+def profile(mode, report):
+    """
+    Context manager profiling a single rerun when mode is set (from ?profile=...).
+    report(path, text) is called with the saved report file and a text summary once the
+    rerun completes. A rerun cut short by an exception, including the one st.rerun()
+    raises, is neither saved nor reported: the report would be wiped by the rerun, and
+    leaving ?profile=... in place profiles the rerun that replaces it instead.
+    """
+    if not ENABLED or not mode or getattr(_current, "profiling", False):
+        return _NULL_CONTEXT
+    return _profile(mode, report)
@@ -1,505 +1,623 @@
+import contextlib
+import datetime
+import json
+import os
 import streamlit as st
 import pandas as pd
 import plotly.express as px
+import plotly.graph_objects as go
 from streamlit_option_menu import option_menu
-from utils import calculate_monthly_income, calculate_annual_income
-
-def calculate_mortgage_payment(P, r, n):
-    """
-    Calculate the monthly mortgage payment.
-    P: loan amount
-    r: monthly interest rate (annual rate / 12)
-    n: total number of months
-    """
-    return P * (r * (1 + r)**n) / ((1 + r)**n - 1)
-
-def usa_page():
-    st.title("Lifestyle Cost Calculator - USA")
-    st.subheader("Determine the income needed for your dream life in the USA")
-    
-    # Input sections
-    col1, col2 = st.columns(2)
-
-    with col1:
-        st.subheader("Housing Costs")
-        house_cost = st.number_input("Cost of desired house ($)", min_value=0, value=500000, step=10000)
-        down_payment_percent = st.slider("Down payment percentage", 0, 100, 20)
-        mortgage_years = st.slider("Mortgage term (years)", 5, 30, 30)
-        mortgage_rate = st.slider("Mortgage interest rate (%)", 0.0, 10.0, 3.5, 0.1)
-        property_tax_rate = st.slider("Annual property tax rate (%)", 0.0, 5.0, 1.2, 0.1)
-        house_maintenance = st.number_input("Monthly house maintenance costs ($)", min_value=0, value=300, step=50)
-        homeowners_insurance = st.number_input("Monthly homeowners insurance ($)", min_value=0, value=150, step=50)
-
-        st.subheader("Vehicle Expenses")
-        vehicle_cost = st.number_input("Total vehicle costs ($)", min_value=0, value=35000, step=5000)
-        vehicle_loan_years = st.slider("Vehicle loan term (years)", 1, 7, 5)
-        vehicle_loan_rate = st.slider("Vehicle loan interest rate (%)", 0.0, 10.0, 4.5, 0.1)
-        vehicle_insurance = st.number_input("Monthly vehicle insurance ($)", min_value=0, value=150, step=50)
-        vehicle_maintenance = st.number_input("Monthly vehicle maintenance ($)", min_value=0, value=100, step=50)
-        fuel_costs = st.number_input("Monthly fuel costs ($)", min_value=0, value=200, step=50)
-
-    with col2:
-        st.subheader("Daily Expenses")
-        daily_food = st.number_input("Daily food expenses ($)", min_value=0, value=40, step=5)
-        daily_transport = st.number_input("Daily transport expenses ($)", min_value=0, value=10, step=5)
-        entertainment = st.number_input("Monthly entertainment expenses ($)", min_value=0, value=300, step=50)
-        personal_care = st.number_input("Monthly personal care expenses ($)", min_value=0, value=150, step=50)
-        
-        st.subheader("Financial Goals")
-        savings_goal = st.number_input("Monthly savings goal ($)", min_value=0, value=500, step=100)
-        investment_goal = st.number_input("Monthly investment goal ($)", min_value=0, value=500, step=100)
-        retirement_savings = st.number_input("Monthly retirement savings ($)", min_value=0, value=500, step=100)
-        
-        st.subheader("Other Expenses")
-        utilities = st.number_input("Monthly utilities ($)", min_value=0, value=250, step=50)
-        health_insurance = st.number_input("Monthly health insurance ($)", min_value=0, value=400, step=50)
-        life_insurance = st.number_input("Monthly life insurance ($)", min_value=0, value=100, step=50)
-        travel_budget = st.number_input("Monthly travel budget ($)", min_value=0, value=300, step=100)
-        misc_expenses = st.number_input("Miscellaneous monthly expenses ($)", min_value=0, value=300, step=50)
-
-        st.subheader("Income Tax")
-        tax_rate = st.slider("Estimated income tax rate (%)", 0, 50, 25)
-
-    # Calculations
-    loan_amount = house_cost * (1 - down_payment_percent / 100)
-    monthly_mortgage = calculate_mortgage_payment(loan_amount, mortgage_rate / 100 / 12, mortgage_years * 12)
-    monthly_property_tax = house_cost * (property_tax_rate / 100) / 12
-
-    vehicle_loan_amount = vehicle_cost
-    monthly_vehicle_payment = calculate_mortgage_payment(vehicle_loan_amount, vehicle_loan_rate / 100 / 12, vehicle_loan_years * 12)
-
-    monthly_expenses = {
-        "Mortgage": monthly_mortgage,
-        "Property Tax": monthly_property_tax,
-        "House Maintenance": house_maintenance,
-        "Homeowners Insurance": homeowners_insurance,
-        "Vehicle Payment": monthly_vehicle_payment,
-        "Vehicle Insurance": vehicle_insurance,
-        "Vehicle Maintenance": vehicle_maintenance,
-        "Fuel": fuel_costs,
-        "Food": daily_food * 30,
-        "Transport": daily_transport * 30,
-        "Entertainment": entertainment,
-        "Personal Care": personal_care,
-        "Utilities": utilities,
-        "Health Insurance": health_insurance,
-        "Life Insurance": life_insurance,
-        "Travel": travel_budget,
-        "Miscellaneous": misc_expenses,
-        "Savings": savings_goal,
-        "Investments": investment_goal,
-        "Retirement Savings": retirement_savings
-    }
-
-    total_monthly_expenses = sum(monthly_expenses.values())
-    required_monthly_income = calculate_monthly_income(total_monthly_expenses, tax_rate)
-    required_annual_income = calculate_annual_income(required_monthly_income)
-
-    # Results display
-    st.header("Results")
-    col3, col4 = st.columns(2)
-
-    with col3:
-        st.subheader("Required Income")
-        st.metric("Monthly Income Needed", f"${required_monthly_income:,.2f}")
-        st.metric("Annual Income Needed", f"${required_annual_income:,.2f}")
-
-        st.subheader("Expense Breakdown")
-        expenses_df = pd.DataFrame(list(monthly_expenses.items()), columns=["Category", "Amount"])
-        fig = px.pie(expenses_df, values="Amount", names="Category", title="Monthly Expenses")
-        st.plotly_chart(fig)
-
-    with col4:
-        st.subheader("Monthly Expenses Summary")
-        col_left, col_right = st.columns(2)
-        expenses_items = list(monthly_expenses.items())
-        mid_point = len(expenses_items) // 2
-
-        with col_left:
-            for category, amount in expenses_items[:mid_point]:
-                st.metric(category, f"${amount:,.2f}")
-
-        with col_right:
-            for category, amount in expenses_items[mid_point:]:
-                st.metric(category, f"${amount:,.2f}")
-
-        st.subheader("Total Monthly Expenses")
-        st.metric("Total", f"${total_monthly_expenses:,.2f}")
+from affordability import max_affordable
+from amortization import payoff_month, schedule_arrays, total_interest
+from cache import results_cache
+from comparison import compare_countries, load_fx_rates
+from countries import COUNTRIES
+import instrumentation
+from scenarios import apply_scenario, decode_scenario, encode_scenario, get_store, widget_specs
+from projection import INFLATION_GROUPS, Projection
+from sensitivity import SensitivityGrid, axis_fields, axis_values
+from simulation import percentile_bands, probability_below, run_simulation
+from tax import gross_up
+from utils import calculate_mortgage_payment, calculate_monthly_income, calculate_annual_income
+
+def normalize_inputs(inputs, extra_expenses):
+    """
+    Turn the page inputs into a hashable key; 20 and 20.0 map to the same entry.
+    """
+    return (
+        tuple(sorted((field, float(value)) for field, value in inputs.items())),
+        tuple((category, float(amount)) for category, amount in extra_expenses.items()),
+    )
 
-    st.info("Adjust the inputs to see real-time updates in the required income and expense breakdown.")
+def _calculate_results(inputs, extra_expenses, tax_system=None):
+    """
+    Calculate the expense breakdown, required income and pie chart for one scenario.
+    tax_system: country whose progressive tax brackets replace the flat tax rate
+    """
+    loan_amount = inputs["house_cost"] * (1 - inputs["down_payment_percent"] / 100)
+    mortgage_monthly_rate = inputs["mortgage_rate"] / 100 / 12
+    mortgage_months = inputs["mortgage_years"] * 12
+    monthly_mortgage = calculate_mortgage_payment(loan_amount, mortgage_monthly_rate, mortgage_months)
+    monthly_property_tax = inputs["house_cost"] * (inputs["property_tax_rate"] / 100) / 12
 
-def netherlands_page():
-    st.title("Lifestyle Cost Calculator - Netherlands")
-    st.subheader("Determine the income needed for your dream life in the Netherlands")
-    
-    # Input sections
-    col1, col2 = st.columns(2)
-
-    with col1:
-        st.subheader("Housing Costs")
-        house_cost = st.number_input("Cost of desired house (€)", min_value=0, value=400000, step=10000)
-        down_payment_percent = st.slider("Down payment percentage", 0, 100, 10)
-        mortgage_years = st.slider("Mortgage term (years)", 5, 30, 30)
-        mortgage_rate = st.slider("Mortgage interest rate (%)", 0.0, 5.0, 2.0, 0.1)
-        property_tax_rate = st.slider("Annual property tax rate (%)", 0.0, 1.0, 0.1, 0.01)
-        house_maintenance = st.number_input("Monthly house maintenance costs (€)", min_value=0, value=200, step=50)
-        homeowners_insurance = st.number_input("Monthly homeowners insurance (€)", min_value=0, value=50, step=10)
-
-        st.subheader("Vehicle Expenses")
-        vehicle_cost = st.number_input("Total vehicle costs (€)", min_value=0, value=25000, step=5000)
-        vehicle_loan_years = st.slider("Vehicle loan term (years)", 1, 7, 5)
-        vehicle_loan_rate = st.slider("Vehicle loan interest rate (%)", 0.0, 10.0, 3.5, 0.1)
-        vehicle_insurance = st.number_input("Monthly vehicle insurance (€)", min_value=0, value=100, step=25)
-        vehicle_maintenance = st.number_input("Monthly vehicle maintenance (€)", min_value=0, value=75, step=25)
-        fuel_costs = st.number_input("Monthly fuel costs (€)", min_value=0, value=150, step=25)
-
-    with col2:
-        st.subheader("Daily Expenses")
-        daily_food = st.number_input("Daily food expenses (€)", min_value=0, value=20, step=5)
-        daily_transport = st.number_input("Daily transport expenses (€)", min_value=0, value=5, step=1)
-        entertainment = st.number_input("Monthly entertainment expenses (€)", min_value=0, value=200, step=50)
-        personal_care = st.number_input("Monthly personal care expenses (€)", min_value=0, value=100, step=25)
-        
-        st.subheader("Financial Goals")
-        savings_goal = st.number_input("Monthly savings goal (€)", min_value=0, value=500, step=100)
-        investment_goal = st.number_input("Monthly investment goal (€)", min_value=0, value=300, step=100)
-        retirement_savings = st.number_input("Monthly retirement savings (€)", min_value=0, value=300, step=100)
-        
-        st.subheader("Other Expenses")
-        utilities = st.number_input("Monthly utilities (€)", min_value=0, value=200, step=50)
-        health_insurance = st.number_input("Monthly health insurance (€)", min_value=0, value=120, step=10)
-        life_insurance = st.number_input("Monthly life insurance (€)", min_value=0, value=50, step=10)
-        travel_budget = st.number_input("Monthly travel budget (€)", min_value=0, value=200, step=50)
-        misc_expenses = st.number_input("Miscellaneous monthly expenses (€)", min_value=0, value=200, step=50)
-
-        st.subheader("Income Tax")
-        tax_rate = st.slider("Estimated income tax rate (%)", 0, 60, 40)
-
-    # Calculations
-    loan_amount = house_cost * (1 - down_payment_percent / 100)
-    monthly_mortgage = calculate_mortgage_payment(loan_amount, mortgage_rate / 100 / 12, mortgage_years * 12)
-    monthly_property_tax = house_cost * (property_tax_rate / 100) / 12
-
-    vehicle_loan_amount = vehicle_cost
-    monthly_vehicle_payment = calculate_mortgage_payment(vehicle_loan_amount, vehicle_loan_rate / 100 / 12, vehicle_loan_years * 12)
+    vehicle_loan_amount = inputs["vehicle_cost"]
+    vehicle_monthly_rate = inputs["vehicle_loan_rate"] / 100 / 12
+    vehicle_months = inputs["vehicle_loan_years"] * 12
+    monthly_vehicle_payment = calculate_mortgage_payment(vehicle_loan_amount, vehicle_monthly_rate, vehicle_months)
 
     monthly_expenses = {
         "Mortgage": monthly_mortgage,
         "Property Tax": monthly_property_tax,
-        "House Maintenance": house_maintenance,
-        "Homeowners Insurance": homeowners_insurance,
+        "House Maintenance": inputs["house_maintenance"],
+        "Homeowners Insurance": inputs["homeowners_insurance"],
         "Vehicle Payment": monthly_vehicle_payment,
-        "Vehicle Insurance": vehicle_insurance,
-        "Vehicle Maintenance": vehicle_maintenance,
-        "Fuel": fuel_costs,
-        "Food": daily_food * 30,
-        "Transport": daily_transport * 30,
-        "Entertainment": entertainment,
-        "Personal Care": personal_care,
-        "Utilities": utilities,
-        "Health Insurance": health_insurance,
-        "Life Insurance": life_insurance,
-        "Travel": travel_budget,
-        "Miscellaneous": misc_expenses,
-        "Savings": savings_goal,
-        "Investments": investment_goal,
-        "Retirement Savings": retirement_savings
+        "Vehicle Insurance": inputs["vehicle_insurance"],
+        "Vehicle Maintenance": inputs["vehicle_maintenance"],
+        "Fuel": inputs["fuel_costs"],
+        "Food": inputs["daily_food"] * 30,
+        "Transport": inputs["daily_transport"] * 30,
+        "Entertainment": inputs["entertainment"],
+        "Personal Care": inputs["personal_care"],
+        "Utilities": inputs["utilities"],
+        "Health Insurance": inputs["health_insurance"],
+        "Life Insurance": inputs["life_insurance"],
+        "Travel": inputs["travel_budget"],
+        "Miscellaneous": inputs["misc_expenses"],
+        **extra_expenses,
+        "Savings": inputs["savings_goal"],
+        "Investments": inputs["investment_goal"],
+        "Retirement Savings": inputs["retirement_savings"]
     }
 
     total_monthly_expenses = sum(monthly_expenses.values())
-    required_monthly_income = calculate_monthly_income(total_monthly_expenses, tax_rate)
-    required_annual_income = calculate_annual_income(required_monthly_income)
-
-    # Results display
-    st.header("Results")
-    col3, col4 = st.columns(2)
-
-    with col3:
-        st.subheader("Required Income")
-        st.metric("Monthly Income Needed", f"€{required_monthly_income:,.2f}")
-        st.metric("Annual Income Needed", f"€{required_annual_income:,.2f}")
-
-        st.subheader("Expense Breakdown")
+    if tax_system is None:
+        required_monthly_income = calculate_monthly_income(total_monthly_expenses, inputs["tax_rate"])
+        required_annual_income = calculate_annual_income(required_monthly_income)
+    else:
+        required_annual_income = float(gross_up(calculate_annual_income(total_monthly_expenses), tax_system))
+        required_monthly_income = required_annual_income / 12
+
+    with instrumentation.section("dataframe"):
         expenses_df = pd.DataFrame(list(monthly_expenses.items()), columns=["Category", "Amount"])
+    with instrumentation.section("pie_chart"):
         fig = px.pie(expenses_df, values="Amount", names="Category", title="Monthly Expenses")
-        st.plotly_chart(fig)
-
-    with col4:
-        st.subheader("Monthly Expenses Summary")
-        col_left, col_right = st.columns(2)
-        expenses_items = list(monthly_expenses.items())
-        mid_point = len(expenses_items) // 2
-
-        with col_left:
-            for category, amount in expenses_items[:mid_point]:
-                st.metric(category, f"€{amount:,.2f}")
 
-        with col_right:
-            for category, amount in expenses_items[mid_point:]:
-                st.metric(category, f"€{amount:,.2f}")
-
-        st.subheader("Total Monthly Expenses")
-        st.metric("Total", f"€{total_monthly_expenses:,.2f}")
-
-    st.info("Adjust the inputs to see real-time updates in the required income and expense breakdown.")
-
-def south_africa_page():
-    st.title("Lifestyle Cost Calculator - South Africa")
-    st.subheader("Determine the income needed for your dream life in South Africa")
-    
-    # Input sections
-    col1, col2 = st.columns(2)
-
-    with col1:
-        st.subheader("Housing Costs")
-        house_cost = st.number_input("Cost of desired house (R)", min_value=0, value=2000000, step=100000)
-        down_payment_percent = st.slider("Down payment percentage", 0, 100, 10)
-        mortgage_years = st.slider("Mortgage term (years)", 5, 30, 20)
-        mortgage_rate = st.slider("Mortgage interest rate (%)", 0.0, 15.0, 7.0, 0.1)
-        property_tax_rate = st.slider("Annual property tax rate (%)", 0.0, 3.0, 1.5, 0.1)
-        house_maintenance = st.number_input("Monthly house maintenance costs (R)", min_value=0, value=3000, step=500)
-        homeowners_insurance = st.number_input("Monthly homeowners insurance (R)", min_value=0, value=1000, step=100)
-
-        st.subheader("Vehicle Expenses")
-        vehicle_cost = st.number_input("Total vehicle costs (R)", min_value=0, value=300000, step=50000)
-        vehicle_loan_years = st.slider("Vehicle loan term (years)", 1, 7, 5)
-        vehicle_loan_rate = st.slider("Vehicle loan interest rate (%)", 0.0, 15.0, 9.0, 0.1)
-        vehicle_insurance = st.number_input("Monthly vehicle insurance (R)", min_value=0, value=1500, step=100)
-        vehicle_maintenance = st.number_input("Monthly vehicle maintenance (R)", min_value=0, value=1000, step=100)
-        fuel_costs = st.number_input("Monthly fuel costs (R)", min_value=0, value=2000, step=100)
-
-    with col2:
-        st.subheader("Daily Expenses")
-        daily_food = st.number_input("Daily food expenses (R)", min_value=0, value=200, step=10)
-        daily_transport = st.number_input("Daily transport expenses (R)", min_value=0, value=50, step=10)
-        entertainment = st.number_input("Monthly entertainment expenses (R)", min_value=0, value=2000, step=100)
-        personal_care = st.number_input("Monthly personal care expenses (R)", min_value=0, value=1000, step=100)
-        
-        st.subheader("Financial Goals")
-        savings_goal = st.number_input("Monthly savings goal (R)", min_value=0, value=3000, step=500)
-        investment_goal = st.number_input("Monthly investment goal (R)", min_value=0, value=2000, step=500)
-        retirement_savings = st.number_input("Monthly retirement savings (R)", min_value=0, value=2000, step=500)
-        
-        st.subheader("Other Expenses")
-        utilities = st.number_input("Monthly utilities (R)", min_value=0, value=2000, step=100)
-        health_insurance = st.number_input("Monthly health insurance (R)", min_value=0, value=1500, step=100)
-        life_insurance = st.number_input("Monthly life insurance (R)", min_value=0, value=500, step=100)
-        travel_budget = st.number_input("Monthly travel budget (R)", min_value=0, value=2000, step=500)
-        misc_expenses = st.number_input("Miscellaneous monthly expenses (R)", min_value=0, value=1500, step=100)
-        
-        st.subheader("South Africa Specific Expenses")
-        private_security = st.number_input("Monthly private security costs (R)", min_value=0, value=1500, step=100)
-
-        st.subheader("Income Tax")
-        tax_rate = st.slider("Estimated income tax rate (%)", 0, 45, 30)
-
-    # Calculations
-    loan_amount = house_cost * (1 - down_payment_percent / 100)
-    monthly_mortgage = calculate_mortgage_payment(loan_amount, mortgage_rate / 100 / 12, mortgage_years * 12)
-    monthly_property_tax = house_cost * (property_tax_rate / 100) / 12
-
-    vehicle_loan_amount = vehicle_cost
-    monthly_vehicle_payment = calculate_mortgage_payment(vehicle_loan_amount, vehicle_loan_rate / 100 / 12, vehicle_loan_years * 12)
-
-    monthly_expenses = {
-        "Mortgage": monthly_mortgage,
-        "Property Tax": monthly_property_tax,
-        "House Maintenance": house_maintenance,
-        "Homeowners Insurance": homeowners_insurance,
-        "Vehicle Payment": monthly_vehicle_payment,
-        "Vehicle Insurance": vehicle_insurance,
-        "Vehicle Maintenance": vehicle_maintenance,
-        "Fuel": fuel_costs,
-        "Food": daily_food * 30,
-        "Transport": daily_transport * 30,
-        "Entertainment": entertainment,
-        "Personal Care": personal_care,
-        "Utilities": utilities,
-        "Health Insurance": health_insurance,
-        "Life Insurance": life_insurance,
-        "Travel": travel_budget,
-        "Miscellaneous": misc_expenses,
-        "Private Security": private_security,
-        "Savings": savings_goal,
-        "Investments": investment_goal,
-        "Retirement Savings": retirement_savings
+    # Both loans in one batch: closed-form totals and the month-by-month balances
+    with instrumentation.section("amortization"):
+        loan_names = ["Mortgage", "Vehicle Loan"]
+        loan_args = (
+            [loan_amount, vehicle_loan_amount],
+            [mortgage_monthly_rate, vehicle_monthly_rate],
+            [mortgage_months, vehicle_months],
+        )
+        interest_totals = total_interest(*loan_args)
+        payoff_months = payoff_month(*loan_args)
+        schedules = schedule_arrays(*loan_args)
+        loans = {
+            name: {"total_interest": float(interest_totals[i]), "payoff_month": int(payoff_months[i])}
+            for i, name in enumerate(loan_names)
+        }
+        balances_df = pd.DataFrame(schedules["balance"].T, columns=loan_names)
+        balances_df.index = balances_df.index + 1
+        balances_df.index.name = "Month"
+
+    return {
+        "monthly_expenses": monthly_expenses,
+        "total_monthly_expenses": total_monthly_expenses,
+        "required_monthly_income": required_monthly_income,
+        "required_annual_income": required_annual_income,
+        "figure": fig,
+        "loans": loans,
+        "balances": balances_df,
     }
 
-    total_monthly_expenses = sum(monthly_expenses.values())
-    required_monthly_income = calculate_monthly_income(total_monthly_expenses, tax_rate)
-    required_annual_income = calculate_annual_income(required_monthly_income)
+def calculate_results(inputs, extra_expenses, tax_system=None):
+    """
+    Return the results for one scenario, reusing them when the same inputs were seen before.
+    Cached results are shared between sessions and must not be modified.
+    """
+    key = (normalize_inputs(inputs, extra_expenses), tax_system)
+    return results_cache.get_or_compute(key, lambda: _calculate_results(inputs, extra_expenses, tax_system))
+
+def format_term(months):
+    """
+    Format a number of months as years and months.
+    """
+    years, months = divmod(months, 12)
+    parts = []
+    if years:
+        parts.append(f"{years} year{'s' if years != 1 else ''}")
+    if months or not years:
+        parts.append(f"{months} month{'s' if months != 1 else ''}")
+    return " ".join(parts)
+
+def render_results(results, currency, decimals):
+    """
+    Show the required income, the pie chart and the expense summary.
+    """
+    def money(amount):
+        return f"{currency}{amount:,.{decimals}f}"
 
-    # Results display
     st.header("Results")
     col3, col4 = st.columns(2)
 
     with col3:
         st.subheader("Required Income")
-        st.metric("Monthly Income Needed", f"R{required_monthly_income:,.2f}")
-        st.metric("Annual Income Needed", f"R{required_annual_income:,.2f}")
+        st.metric("Monthly Income Needed", money(results["required_monthly_income"]))
+        st.metric("Annual Income Needed", money(results["required_annual_income"]))
 
         st.subheader("Expense Breakdown")
-        expenses_df = pd.DataFrame(list(monthly_expenses.items()), columns=["Category", "Amount"])
-        fig = px.pie(expenses_df, values="Amount", names="Category", title="Monthly Expenses")
-        st.plotly_chart(fig)
+        with instrumentation.section("chart_render"):
+            st.plotly_chart(results["figure"])
 
     with col4:
         st.subheader("Monthly Expenses Summary")
         col_left, col_right = st.columns(2)
-        expenses_items = list(monthly_expenses.items())
+        expenses_items = list(results["monthly_expenses"].items())
         mid_point = len(expenses_items) // 2
 
-        with col_left:
-            for category, amount in expenses_items[:mid_point]:
-                st.metric(category, f"R{amount:,.2f}")
+        with instrumentation.section("expense_metrics"):
+            with col_left:
+                for category, amount in expenses_items[:mid_point]:
+                    st.metric(category, money(amount))
 
-        with col_right:
-            for category, amount in expenses_items[mid_point:]:
-                st.metric(category, f"R{amount:,.2f}")
+            with col_right:
+                for category, amount in expenses_items[mid_point:]:
+                    st.metric(category, money(amount))
 
         st.subheader("Total Monthly Expenses")
-        st.metric("Total", f"R{total_monthly_expenses:,.2f}")
+        st.metric("Total", money(results["total_monthly_expenses"]))
 
-    st.info("Adjust the inputs to see real-time updates in the required income and expense breakdown.")
+    st.subheader("Loan Summary")
+    loan_columns = st.columns(len(results["loans"]))
+    for column, (name, loan) in zip(loan_columns, results["loans"].items()):
+        with column:
+            st.metric(f"{name} Total Interest", money(loan["total_interest"]))
+            st.metric(f"{name} Paid Off After", format_term(loan["payoff_month"]))
+    with st.expander("Remaining loan balances"):
+        st.line_chart(results["balances"])
 
-def south_korea_page():
-    st.title("Lifestyle Cost Calculator - South Korea")
-    st.subheader("Determine the income needed for your dream life in South Korea")
-    
-    # Input sections
-    col1, col2 = st.columns(2)
-
-    with col1:
-        st.subheader("Housing Costs")
-        house_cost = st.number_input("Cost of desired house (₩)", min_value=0, value=500000000, step=10000000)
-        down_payment_percent = st.slider("Down payment percentage", 0, 100, 20)
-        mortgage_years = st.slider("Mortgage term (years)", 5, 30, 20)
-        mortgage_rate = st.slider("Mortgage interest rate (%)", 0.0, 10.0, 3.0, 0.1)
-        property_tax_rate = st.slider("Annual property tax rate (%)", 0.0, 1.0, 0.3, 0.01)
-        house_maintenance = st.number_input("Monthly house maintenance costs (₩)", min_value=0, value=300000, step=50000)
-        homeowners_insurance = st.number_input("Monthly homeowners insurance (₩)", min_value=0, value=50000, step=10000)
-
-        st.subheader("Vehicle Expenses")
-        vehicle_cost = st.number_input("Total vehicle costs (₩)", min_value=0, value=30000000, step=1000000)
-        vehicle_loan_years = st.slider("Vehicle loan term (years)", 1, 7, 5)
-        vehicle_loan_rate = st.slider("Vehicle loan interest rate (%)", 0.0, 10.0, 4.0, 0.1)
-        vehicle_insurance = st.number_input("Monthly vehicle insurance (₩)", min_value=0, value=100000, step=10000)
-        vehicle_maintenance = st.number_input("Monthly vehicle maintenance (₩)", min_value=0, value=100000, step=10000)
-        fuel_costs = st.number_input("Monthly fuel costs (₩)", min_value=0, value=200000, step=50000)
-
-    with col2:
-        st.subheader("Daily Expenses")
-        daily_food = st.number_input("Daily food expenses (₩)", min_value=0, value=20000, step=1000)
-        daily_transport = st.number_input("Daily transport expenses (₩)", min_value=0, value=3000, step=500)
-        entertainment = st.number_input("Monthly entertainment expenses (₩)", min_value=0, value=300000, step=50000)
-        personal_care = st.number_input("Monthly personal care expenses (₩)", min_value=0, value=100000, step=10000)
-        
-        st.subheader("Financial Goals")
-        savings_goal = st.number_input("Monthly savings goal (₩)", min_value=0, value=500000, step=100000)
-        investment_goal = st.number_input("Monthly investment goal (₩)", min_value=0, value=300000, step=50000)
-        retirement_savings = st.number_input("Monthly retirement savings (₩)", min_value=0, value=300000, step=50000)
-        
-        st.subheader("Other Expenses")
-        utilities = st.number_input("Monthly utilities (₩)", min_value=0, value=200000, step=10000)
-        health_insurance = st.number_input("Monthly health insurance (₩)", min_value=0, value=100000, step=10000)
-        life_insurance = st.number_input("Monthly life insurance (₩)", min_value=0, value=50000, step=10000)
-        travel_budget = st.number_input("Monthly travel budget (₩)", min_value=0, value=300000, step=50000)
-        misc_expenses = st.number_input("Miscellaneous monthly expenses (₩)", min_value=0, value=200000, step=50000)
-        
-        st.subheader("South Korea Specific Expenses")
-        public_transportation = st.number_input("Monthly public transportation costs (₩)", min_value=0, value=100000, step=10000)
-
-        st.subheader("Income Tax")
-        tax_rate = st.slider("Estimated income tax rate (%)", 0, 50, 25)
-
-    # Calculations
-    loan_amount = house_cost * (1 - down_payment_percent / 100)
-    monthly_mortgage = calculate_mortgage_payment(loan_amount, mortgage_rate / 100 / 12, mortgage_years * 12)
-    monthly_property_tax = house_cost * (property_tax_rate / 100) / 12
-
-    vehicle_loan_amount = vehicle_cost
-    monthly_vehicle_payment = calculate_mortgage_payment(vehicle_loan_amount, vehicle_loan_rate / 100 / 12, vehicle_loan_years * 12)
+    st.info("Adjust the inputs to see real-time updates in the required income and expense breakdown.")
 
-    monthly_expenses = {
-        "Mortgage": monthly_mortgage,
-        "Property Tax": monthly_property_tax,
-        "House Maintenance": house_maintenance,
-        "Homeowners Insurance": homeowners_insurance,
-        "Vehicle Payment": monthly_vehicle_payment,
-        "Vehicle Insurance": vehicle_insurance,
-        "Vehicle Maintenance": vehicle_maintenance,
-        "Fuel": fuel_costs,
-        "Food": daily_food * 30,
-        "Transport": daily_transport * 30,
-        "Entertainment": entertainment,
-        "Personal Care": personal_care,
-        "Utilities": utilities,
-        "Health Insurance": health_insurance,
-        "Life Insurance": life_insurance,
-        "Travel": travel_budget,
-        "Miscellaneous": misc_expenses,
-        "Public Transportation": public_transportation,
-        "Savings": savings_goal,
-        "Investments": investment_goal,
-        "Retirement Savings": retirement_savings
-    }
+@st.fragment(run_every=2)
+def render_cache_stats():
+    """
+    Show the results cache counters (in the sidebar with ?cache_stats=1).
+    The page's fragments do not rerun the sidebar, so the counters refresh every two seconds.
+    """
+    stats = results_cache.stats()
+    st.subheader("Results cache")
+    st.write(f"{stats['size']} / {stats['maxsize']} entries, {stats['evictions']} evicted")
+    st.write(f"{stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%} hit rate)")
 
-    total_monthly_expenses = sum(monthly_expenses.values())
-    required_monthly_income = calculate_monthly_income(total_monthly_expenses, tax_rate)
-    required_annual_income = calculate_annual_income(required_monthly_income)
+def render_affordability(country, inputs, results, tax_system=None):
+    """
+    Show the most expensive house and vehicle a given gross income can pay for.
+    """
+    code = country["code"]
+    currency = country["currency"]
+
+    def money(amount):
+        if amount == float("inf"):
+            return "No limit"
+        return f"{currency}{amount:,.{country['decimals']}f}"
+
+    with st.expander("What can I afford?", key=f"{code}_afford_open", on_change="rerun") as expander:
+        if not expander.open:
+            return
+        annual_income = st.number_input(
+            f"Gross annual income ({currency})", min_value=0,
+            value=int(results["required_annual_income"]), step=1000, key=f"{code}_afford_income")
+        st.caption("Keeps every other input as entered above and solves for the house or the vehicle cost.")
+        col_house, col_vehicle = st.columns(2)
+        with col_house:
+            st.metric("Maximum house cost", money(max_affordable(inputs, annual_income, "house_cost", tax_system)[0]))
+        with col_vehicle:
+            st.metric("Maximum vehicle cost", money(max_affordable(inputs, annual_income, "vehicle_cost", tax_system)[0]))
+
+def render_comparison(country, inputs, tax_system=None):
+    """
+    Evaluate the entered lifestyle in every country and show the results side by side.
+    """
+    code = country["code"]
+    with st.expander("Compare countries", key=f"{code}_compare_open", on_change="rerun") as expander:
+        if not expander.open:
+            return
+        currency_codes = [other["currency_code"] for other in COUNTRIES.values()]
+        display_currency = st.selectbox(
+            "Show amounts in", currency_codes, index=currency_codes.index(country["currency_code"]),
+            key=f"{code}_compare_currency")
+        snapshot = load_fx_rates()
+        st.caption(
+            f"Amounts are converted from {country['currency_code']} with the exchange rates of "
+            f"{snapshot['date']}; the other countries use their default interest, property tax and income tax rates.")
+
+        table = compare_countries(
+            inputs, country["currency_code"], display_currency, tax_system is not None, country["name"])
+        income_columns = st.columns(len(table))
+        for column, (name, row) in zip(income_columns, table.iterrows()):
+            with column:
+                st.metric(f"{name}: Annual Income Needed", f"{display_currency} {row['Required Annual Income']:,.0f}")
+
+        categories = table.columns[:-3]
+        breakdown = table[categories].reset_index().melt(id_vars="Country", var_name="Category", value_name="Amount")
+        fig = px.bar(breakdown, x="Country", y="Amount", color="Category",
+                     title=f"Monthly Expenses ({display_currency})")
+        st.plotly_chart(fig)
 
-    # Results display
-    st.header("Results")
-    col3, col4 = st.columns(2)
+def render_sensitivity(country, inputs, tax_system=None):
+    """
+    Show the required annual income over a grid of two inputs as a heatmap.
+    """
+    code = country["code"]
+    labels = axis_fields(country)
+    if tax_system is not None:
+        # The flat rate does not apply with progressive brackets
+        del labels["tax_rate"]
+    fields = list(labels)
+
+    with st.expander("Sensitivity heatmap", key=f"{code}_sensitivity_open", on_change="rerun") as expander:
+        if not expander.open:
+            return
+        col_x, col_y = st.columns(2)
+        with col_x:
+            x_field = st.selectbox("Horizontal axis", fields, index=fields.index("mortgage_rate"), format_func=labels.get, key=f"{code}_sensitivity_x")
+        with col_y:
+            y_field = st.selectbox("Vertical axis", fields, index=fields.index("house_cost"), format_func=labels.get, key=f"{code}_sensitivity_y")
+        if x_field == y_field:
+            st.warning("Pick two different inputs.")
+            return
+
+        # The grid keeps its intermediate results between reruns of this session
+        grid = st.session_state.get(f"{code}_sensitivity_grid")
+        if grid is None or (grid.x_field, grid.y_field) != (x_field, y_field):
+            grid = SensitivityGrid(x_field, axis_values(country, x_field), y_field, axis_values(country, y_field))
+            st.session_state[f"{code}_sensitivity_grid"] = grid
+        income = grid.compute(inputs, tax_system)
+
+        fig = px.imshow(
+            income, x=grid.x_values, y=grid.y_values, origin="lower", aspect="auto",
+            labels={"x": labels[x_field], "y": labels[y_field], "color": "Annual income"},
+            title="Required Annual Income",
+        )
+        st.plotly_chart(fig)
 
-    with col3:
-        st.subheader("Required Income")
-        st.metric("Monthly Income Needed", f"₩{required_monthly_income:,.0f}")
-        st.metric("Annual Income Needed", f"₩{required_annual_income:,.0f}")
+def render_projection(country, inputs, results, tax_system=None):
+    """
+    Project the expenses, required income and retirement savings over the coming years.
+    """
+    code = country["code"]
+
+    def money(amount):
+        return f"{country['currency']}{amount:,.{country['decimals']}f}"
+
+    with st.expander("Multi-year projection", key=f"{code}_proj_open", on_change="rerun") as expander:
+        if not expander.open:
+            return
+        col_a, col_b, col_c = st.columns(3)
+        with col_a:
+            years = st.slider("Years to project", 5, 40, 30, key=f"{code}_proj_years")
+            inflation = st.slider("General inflation (%)", 0.0, 15.0, 2.5, 0.1, key=f"{code}_proj_inflation")
+        with col_b:
+            group_rates = {
+                group: st.slider(f"{group} inflation (%)", 0.0, 15.0, 2.5, 0.1, key=f"{code}_proj_inflation_{group.lower()}")
+                for group in INFLATION_GROUPS
+            }
+        with col_c:
+            retirement_return = st.slider("Retirement savings return (%)", -5.0, 15.0, 5.0, 0.1, key=f"{code}_proj_return")
+            retirement_balance = st.number_input(
+                f"Current retirement savings ({country['currency']})", min_value=0, value=0,
+                step=widget_specs(country)["retirement_savings"][1]["step"] * 10, key=f"{code}_proj_balance")
+
+        parameters = {
+            "years": years,
+            "inflation": inflation,
+            "category_inflation": {
+                category: group_rates[group] for group, categories in INFLATION_GROUPS.items() for category in categories
+            },
+            "retirement_return": retirement_return,
+            "retirement_balance": retirement_balance,
+        }
+
+        # The projection keeps its intermediate series between reruns of this session
+        categories = list(results["monthly_expenses"])
+        projection = st.session_state.get(f"{code}_projection")
+        if projection is None or projection.categories != categories:
+            projection = Projection(categories)
+            st.session_state[f"{code}_projection"] = projection
+        result = projection.compute(inputs, parameters, tax_system)
+
+        start_year = datetime.date.today().year
+        calendar_years = pd.Index(range(start_year, start_year + years), name="Year")
+        col_income, col_retirement, col_loans = st.columns(3)
+        with col_income:
+            st.metric(f"Annual income needed in {calendar_years[-1]}", money(result["required_annual_income"][-1]))
+        with col_retirement:
+            st.metric(f"Retirement savings at the end of {calendar_years[-1]}", money(result["retirement_balance"][-1]))
+        with col_loans:
+            for name, months in result["payoff_months"].items():
+                st.metric(f"{name} paid off", f"{start_year + (months - 1) // 12}" if months else "No loan")
+
+        expenses_df = pd.DataFrame(result["annual_expenses"], index=calendar_years)
+        fig = px.area(expenses_df.loc[:, (expenses_df != 0).any()], title="Annual Expenses")
+        fig.add_scatter(x=calendar_years, y=result["required_annual_income"], name="Required annual income")
+        st.plotly_chart(fig)
+        st.line_chart(pd.DataFrame({"Retirement savings": result["retirement_balance"]}, index=calendar_years))
 
-        st.subheader("Expense Breakdown")
-        expenses_df = pd.DataFrame(list(monthly_expenses.items()), columns=["Category", "Amount"])
-        fig = px.pie(expenses_df, values="Amount", names="Category", title="Monthly Expenses")
+def render_simulation(country, inputs, results, tax_system=None):
+    """
+    Run the Monte Carlo uncertainty mode on request and show its percentile bands.
+    """
+    code = country["code"]
+
+    def money(amount):
+        return f"{country['currency']}{amount:,.{country['decimals']}f}"
+
+    with st.expander("Uncertainty (Monte Carlo simulation)", key=f"{code}_sim_open", on_change="rerun") as expander:
+        if not expander.open:
+            return
+        col_a, col_b, col_c = st.columns(3)
+        with col_a:
+            n_paths = st.number_input("Simulated paths", min_value=10000, max_value=1000000, value=100000, step=10000, key=f"{code}_sim_paths")
+            years = st.slider("Projection years", 1, 40, 10, key=f"{code}_sim_years")
+        with col_b:
+            rate_volatility = st.slider("Interest rate volatility (percentage points)", 0.0, 5.0, 1.0, 0.1, key=f"{code}_sim_rate_volatility")
+            inflation_mean = st.slider("Expected inflation (%)", 0.0, 15.0, 2.5, 0.1, key=f"{code}_sim_inflation_mean")
+            inflation_volatility = st.slider("Inflation volatility (percentage points)", 0.0, 5.0, 1.0, 0.1, key=f"{code}_sim_inflation_volatility")
+        with col_c:
+            growth_mean = st.slider("Expected expense growth above inflation (%)", -2.0, 5.0, 0.5, 0.1, key=f"{code}_sim_growth_mean")
+            growth_volatility = st.slider("Expense growth volatility (percentage points)", 0.0, 5.0, 1.0, 0.1, key=f"{code}_sim_growth_volatility")
+            income_level = st.number_input(f"Annual income to test ({country['currency']})", min_value=0, value=int(results["required_annual_income"] * 1.1), step=1000, key=f"{code}_sim_income")
+
+        parameters = {
+            "years": years,
+            "rate_volatility": rate_volatility,
+            "inflation_mean": inflation_mean,
+            "inflation_volatility": inflation_volatility,
+            "expense_growth_mean": growth_mean,
+            "expense_growth_volatility": growth_volatility,
+        }
+        simulation_key = (normalize_inputs(inputs, {}), tax_system, tuple(parameters.items()), n_paths)
+
+        st.caption("Changing any input while a simulation runs cancels it.")
+        if st.button("Run simulation", key=f"{code}_sim_run"):
+            progress_bar = st.progress(0.0, text="Simulating...")
+            result = run_simulation(
+                inputs, n_paths=n_paths, parameters=parameters,
+                workers=int(os.environ.get("SIMULATION_WORKERS", "1")), tax_system=tax_system,
+                progress=lambda done, total: progress_bar.progress(done / total, text=f"Simulated {done:,} of {total:,} paths"),
+            )
+            progress_bar.empty()
+            st.session_state[f"{code}_simulation"] = (simulation_key, result)
+
+        stored = st.session_state.get(f"{code}_simulation")
+        if stored is None or stored[0] != simulation_key:
+            return
+        result = stored[1]
+
+        bands = percentile_bands(result)
+        final_year = bands.iloc[-1]
+        band_columns = st.columns(len(bands.columns))
+        for column, (name, amount) in zip(band_columns, final_year.items()):
+            with column:
+                st.metric(f"{name} in year {years}", money(amount))
+        st.metric(
+            f"Probability the required income stays below {money(income_level)} in year {years}",
+            f"{probability_below(result, income_level, years):.1%}",
+        )
+
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(x=bands.index, y=bands["P95"], line={"width": 0}, showlegend=False, hoverinfo="skip"))
+        fig.add_trace(go.Scatter(x=bands.index, y=bands["P5"], fill="tonexty", line={"width": 0}, name="P5-P95"))
+        fig.add_trace(go.Scatter(x=bands.index, y=bands["P75"], line={"width": 0}, showlegend=False, hoverinfo="skip"))
+        fig.add_trace(go.Scatter(x=bands.index, y=bands["P25"], fill="tonexty", line={"width": 0}, name="P25-P75"))
+        fig.add_trace(go.Scatter(x=bands.index, y=bands["P50"], name="Median"))
+        fig.update_layout(title="Required Annual Income", xaxis_title="Year", yaxis_title="Annual income")
         st.plotly_chart(fig)
 
-    with col4:
-        st.subheader("Monthly Expenses Summary")
-        col_left, col_right = st.columns(2)
-        expenses_items = list(monthly_expenses.items())
-        mid_point = len(expenses_items) // 2
+def _load_scenario(country, owner, scenario_id):
+    # Runs as a widget callback, before the page renders its widgets
+    scenario = get_store().load(scenario_id, owner)
+    if scenario is not None:
+        apply_scenario(st.session_state, country, scenario["inputs"])
 
-        with col_left:
-            for category, amount in expenses_items[:mid_point]:
-                st.metric(category, f"₩{amount:,.0f}")
+def _save_scenario(country, owner, inputs):
+    name = st.session_state[f"{country['code']}_scenario_name"].strip()
+    if name:
+        get_store().save(owner, country["code"], name, inputs)
 
-        with col_right:
-            for category, amount in expenses_items[mid_point:]:
-                st.metric(category, f"₩{amount:,.0f}")
+def _share_scenario(token):
+    st.query_params["scenario"] = token
+    st.session_state["_shared_scenario"] = token
 
-        st.subheader("Total Monthly Expenses")
-        st.metric("Total", f"₩{total_monthly_expenses:,.0f}")
+def render_scenarios(country, entered):
+    """
+    Save, load, share and bulk import/export the scenarios of one country page.
+    entered: the value of every input widget on the page
+    """
+    code = country["code"]
+    with st.expander("Saved scenarios", key=f"{code}_scenario_open", on_change="rerun") as expander:
+        if not expander.open:
+            return
+        token = encode_scenario(country, entered)
+        st.caption("Link to the inputs above (add it to the app's address):")
+        st.code(f"?scenario={token}", language=None)
+        st.button("Put the link in the address bar", key=f"{code}_scenario_share", on_click=_share_scenario, args=(token,))
+
+        owner = st.text_input("Your name", key="scenario_owner").strip()
+        if not owner:
+            st.caption("Enter your name to save and load scenarios.")
+            return
+        st.caption("Scenarios are filed under this name without a password: anyone using this app can open them.")
+        store = get_store()
+
+        col_save, col_load = st.columns(2)
+        with col_save:
+            st.text_input("Scenario name", key=f"{code}_scenario_name")
+            st.button("Save", key=f"{code}_scenario_save", on_click=_save_scenario, args=(country, owner, entered))
+        with col_load:
+            saved = store.list(owner, code)
+            if saved:
+                names = {scenario["id"]: scenario["name"] for scenario in saved}
+                scenario_id = st.selectbox("Saved scenario", list(names), format_func=names.get, key=f"{code}_scenario_id")
+                if st.button("Load", key=f"{code}_scenario_load", on_click=_load_scenario, args=(country, owner, scenario_id)):
+                    # The inputs are in another fragment
+                    st.rerun()
+                st.button("Delete", key=f"{code}_scenario_delete", on_click=store.delete, args=(scenario_id, owner))
+            else:
+                st.caption("No saved scenarios for this country yet.")
+
+        exported = "".join(
+            json.dumps({key: scenario[key] for key in ("owner", "country", "name", "inputs", "updated")}) + "\n"
+            for scenario in store.export_scenarios(owner)
+        )
+        st.download_button("Export my scenarios", exported, file_name="scenarios.jsonl", key=f"{code}_scenario_export")
+        uploaded = st.file_uploader("Import scenarios (JSON lines)", type=["jsonl"], key=f"{code}_scenario_import")
+        if uploaded is not None and st.button("Import", key=f"{code}_scenario_import_run"):
+            try:
+                scenarios = [json.loads(line) for line in uploaded.getvalue().decode().splitlines() if line.strip()]
+                count = store.import_scenarios({**scenario, "owner": owner} for scenario in scenarios)
+            except (ValueError, KeyError, TypeError) as error:
+                st.error(f"Could not import the file: {error}")
+            else:
+                st.success(f"Imported {count} scenarios.")
+
+# Panel -> prefix of its widget keys; its expander's open state is kept under "<code>_<prefix>_open"
+PANELS = {
+    "affordability": "afford",
+    "comparison": "compare",
+    "sensitivity": "sensitivity",
+    "projection": "proj",
+    "simulation": "sim",
+    "scenarios": "scenario",
+}
+
+@contextlib.contextmanager
+def instrumented(country):
+    """
+    Time, and with ?profile=... profile, the page or the fragment being rerun.
+    """
+    with instrumentation.profile(st.query_params.get("profile"), render_profile_report):
+        with instrumentation.rerun(country["name"], st.session_state):
+            yield
 
-    st.info("Adjust the inputs to see real-time updates in the required income and expense breakdown.")
+@st.fragment
+def render_inputs(country):
+    """
+    Render the inputs and results of a country page and store them for its panels.
+    """
+    code = country["code"]
+    with instrumented(country):
+        # Input sections
+        with instrumentation.section("inputs"):
+            values = {}
+            for column, sections in zip(st.columns(2), country["columns"]):
+                with column:
+                    for subheader, widgets in sections:
+                        st.subheader(subheader)
+                        for field, widget, label, kwargs in widgets:
+                            if widget == "number":
+                                values[field] = st.number_input(label, **kwargs)
+                            elif widget == "toggle":
+                                values[field] = st.toggle(label, **kwargs)
+                            else:
+                                values[field] = st.slider(label, **kwargs)
+            entered = dict(values)
+
+        # Calculations
+        with instrumentation.section("calculation"):
+            tax_system = country["name"] if values.pop("progressive_tax") else None
+            inputs = dict(values)
+            extra_expenses = {category: values.pop(field) for field, category in country["extra_categories"].items()}
+            results = calculate_results(values, extra_expenses, tax_system)
+
+        # The panels are fragments of their own and read the page from the session state
+        st.session_state[f"{code}_page"] = {
+            "entered": entered, "inputs": inputs, "results": results, "tax_system": tax_system,
+        }
+        full_rerun = st.session_state.pop(f"{code}_full_rerun", False)
+        if not full_rerun and any(st.session_state.get(f"{code}_{prefix}_open") for prefix in PANELS.values()):
+            # Only the inputs reran, an open panel still shows the previous ones
+            st.rerun()
+
+        with instrumentation.section("results"):
+            render_results(results, country["currency"], country["decimals"])
+
+@st.fragment
+def render_panel(country, name):
+    """
+    Render one panel of a country page; its own widgets rerun only the panel.
+    """
+    page = st.session_state[f"{country['code']}_page"]
+    inputs, results, tax_system = page["inputs"], page["results"], page["tax_system"]
+    with instrumented(country), instrumentation.section(name):
+        if name == "affordability":
+            render_affordability(country, inputs, results, tax_system)
+        elif name == "comparison":
+            render_comparison(country, inputs, tax_system)
+        elif name == "sensitivity":
+            render_sensitivity(country, inputs, tax_system)
+        elif name == "projection":
+            render_projection(country, inputs, results, tax_system)
+        elif name == "simulation":
+            render_simulation(country, inputs, results, tax_system)
+        else:
+            render_scenarios(country, page["entered"])
+
+def country_page(country):
+    """
+    Render the inputs, results and panels for one compiled country specification.
+    """
+    with instrumented(country):
+        st.title(f"Lifestyle Cost Calculator - {country['name']}")
+        st.subheader(f"Determine the income needed for your dream life in {country['title']}")
+
+        # Changing an input reruns only the inputs and results, changing a panel's
+        # widget reruns only that panel. The panels track their expander and do no
+        # work while it is collapsed.
+        st.session_state[f"{country['code']}_full_rerun"] = True
+        render_inputs(country)
+        for name in PANELS:
+            render_panel(country, name)
+
+def render_profile_report(path, text):
+    """
+    Show the profile captured for this rerun and drop the query parameter that requested it.
+    """
+    with st.expander("Profile of this rerun", expanded=True):
+        st.caption(f"Saved to {path}")
+        st.code(text)
+    del st.query_params["profile"]
 
 def main():
     st.set_page_config(page_title="Lifestyle Cost Calculator", page_icon="💰", layout="wide")
 
+    # A ?scenario=... link opens its country and fills in its inputs once per session
+    shared_country = None
+    token = st.query_params.get("scenario")
+    if token:
+        try:
+            shared_country, shared_inputs = decode_scenario(token)
+        except ValueError as error:
+            st.warning(str(error))
+        else:
+            if st.session_state.get("_shared_scenario") != token:
+                apply_scenario(st.session_state, COUNTRIES[shared_country], shared_inputs)
+                st.session_state["_shared_scenario"] = token
+
     selected_country = option_menu(
         menu_title=None,
-        options=["USA", "Netherlands", "South Africa", "South Korea"],
-        icons=["flag-fill", "flag-fill", "flag-fill", "flag-fill"],
-        default_index=0,
+        options=list(COUNTRIES),
+        icons=["flag-fill"] * len(COUNTRIES),
+        default_index=list(COUNTRIES).index(shared_country) if shared_country else 0,
         orientation="horizontal",
     )
 
-    if selected_country == "USA":
-        usa_page()
-    elif selected_country == "Netherlands":
-        netherlands_page()
-    elif selected_country == "South Africa":
-        south_africa_page()
-    elif selected_country == "South Korea":
-        south_korea_page()
+    country_page(COUNTRIES[selected_country])
+
+    if st.query_params.get("cache_stats") == "1":
+        with st.sidebar:
+            render_cache_stats()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,213 @@
+"""
+Fixed-point money: amounts as int64 minor units (cents, or won for KRW).
+
+The float engine adds up unrounded amounts and only rounds when formatting, so a
+total can differ by a cent from the sum of the lines shown, and the difference
+depends on the order of the additions. In fixed-point mode the money inputs are
+converted once to int64 minor units (to_minor_inputs), the computed lines (loan
+payments, property tax, income) are rounded with the currency's rounding rule, and
+everything is added as integers, so totals are exact and identical on every run and
+machine. Amounts that are already integers are not touched again, which keeps
+calculate_batch_minor as fast as the float engine. Rounding is exact for any amount
+that fits in int64 minor units (about 9.2e16 dollars); larger amounts raise ValueError.
+"""
+import numpy as np
+
+from engine import DIRECT_CATEGORIES, EXPENSE_CATEGORIES, INPUT_FIELDS, OPTIONAL_FIELDS, calculate_mortgage_payment_batch
+from tax import gross_up
+
+# ISO code -> (digits of the minor unit, rounding of amounts between two minor units)
+# half_even: ties go to the even minor unit (no upward drift over many lines)
+# half_up: ties go away from zero, the usual commercial rule
+CURRENCIES = {
+    "USD": (2, "half_even"),
+    "EUR": (2, "half_even"),
+    "ZAR": (2, "half_up"),
+    "KRW": (0, "half_up"),
+}
+
+# Inputs that are amounts of money; rates, percentages and terms stay floats
+MONEY_FIELDS = [
+    field for field in INPUT_FIELDS + OPTIONAL_FIELDS
+    if field not in ("down_payment_percent", "mortgage_years", "mortgage_rate", "property_tax_rate",
+                     "vehicle_loan_years", "vehicle_loan_rate", "tax_rate")
+]
+
+def _round(minor, rounding):
+    """
+    Round float amounts in minor units to int64 with the given rule.
+    Raises ValueError for amounts that are not finite or do not fit in int64.
+    """
+    minor = np.asarray(minor, dtype=np.float64)
+    if not (np.abs(minor) < 2.0**63).all():
+        if not np.isfinite(minor).all():
+            raise ValueError("Amounts must be finite to convert them to minor units")
+        raise ValueError("Amounts are too large for int64 minor units")
+    # 0.145 * 100 is 14.499999999999998; snap the fraction to 6 decimals of the minor
+    # unit first so the binary representation error does not decide which way a tie is
+    # rounded. floor() and the subtraction are exact and the snapped fraction is a whole
+    # number of millionths, so amounts of any size keep every minor unit.
+    whole = np.floor(minor)
+    micros = np.rint((minor - whole) * 1e6)
+    whole = whole.astype(np.int64)
+    if rounding == "half_even":
+        tie_up = (whole & 1) == 1
+    else:
+        # whole is the floor, so ties away from zero round up only for positive amounts
+        tie_up = whole >= 0
+    # A fraction that snaps to 1e6 millionths rounds up like any fraction above one half
+    return whole + ((micros > 500_000) | ((micros == 500_000) & tie_up))
+
+def round_minor(amounts, currency):
+    """
+    Round amounts in major units (dollars, euros, ...) to int64 minor units.
+    Raises ValueError for infinite or NaN amounts, which have no fixed-point value, and for
+    amounts that do not fit in int64 minor units.
+    """
+    digits, rounding = CURRENCIES[currency]
+    return _round(np.multiply(amounts, 10**digits, dtype=np.float64), rounding)
+
+def to_major(minor, currency):
+    """
+    Minor units back to float major units, e.g. for charts.
+    """
+    return np.asarray(minor, dtype=np.float64) / 10**CURRENCIES[currency][0]
+
+def format_minor(minor, currency, symbol=""):
+    """
+    Format one amount in minor units exactly, e.g. 123456 USD -> '$1,234.56'.
+    """
+    digits = CURRENCIES[currency][0]
+    sign = "-" if minor < 0 else ""
+    major, fraction = divmod(abs(int(minor)), 10**digits)
+    text = f"{sign}{symbol}{major:,}"
+    return f"{text}.{fraction:0{digits}d}" if digits else text
+
+def to_minor_inputs(inputs, currency):
+    """
+    Convert the money columns of inputs (in major units) to int64 minor units.
+    Other columns are returned as float arrays; missing optional fields stay missing.
+    """
+    columns = {}
+    for field in INPUT_FIELDS + OPTIONAL_FIELDS:
+        if field not in inputs:
+            continue
+        if field in MONEY_FIELDS:
+            values = np.asarray(inputs[field], dtype=np.float64)
+            if field in OPTIONAL_FIELDS:
+                values = np.nan_to_num(values)
+            columns[field] = round_minor(values, currency)
+        else:
+            columns[field] = np.asarray(inputs[field], dtype=np.float64)
+    return columns
+
+def _scale(values, factor):
+    """
+    values * factor for int64 values and a positive integer factor.
+    Raises ValueError instead of wrapping around when a product does not fit in int64.
+    """
+    limit = np.iinfo(np.int64).max // factor
+    if values.size and (values.max() > limit or values.min() < -limit):
+        raise ValueError("Amounts are too large for int64 minor units")
+    return values * factor
+
+def _sum(lines, size):
+    """
+    Exact int64 sum of the lines, one value per scenario.
+    Integer additions wrap around silently. When the largest magnitudes of the lines add
+    up to less than 2**63 no scenario can overflow; otherwise a float64 shadow of the sum
+    picks out the scenarios that may not fit, those are added up again with Python
+    integers and ValueError is raised if a total does not fit in int64.
+    """
+    total = np.zeros(size, dtype=np.int64)
+    for amount in lines:
+        total += amount
+    if not size or sum(max(int(amount.max()), -int(amount.min())) for amount in lines) < 2**63:
+        return total
+
+    shadow = np.zeros(size)
+    for amount in lines:
+        shadow += amount
+    # The shadow is off by less than len(lines)**2 float64 epsilons of 2**63
+    for row in np.flatnonzero(np.abs(shadow) >= 2.0**63 * (1 - 1e-12)):
+        if not -2**63 <= sum(int(amount[row]) for amount in lines) < 2**63:
+            raise ValueError("Total monthly expenses are too large for int64 minor units")
+    return total
+
+def _minor_column(inputs, field, size=None):
+    """
+    Fetch a money column, which must already be in integer minor units.
+    """
+    if field not in inputs:
+        if field in OPTIONAL_FIELDS:
+            return np.zeros(size, dtype=np.int64)
+        raise KeyError(f"Missing input column: {field}")
+    values = np.asarray(inputs[field])
+    if not np.issubdtype(values.dtype, np.integer):
+        raise TypeError(f"Input column {field} must hold integer minor units; convert it with to_minor_inputs()")
+    return values.astype(np.int64, copy=False)
+
+def calculate_batch_minor(inputs, currency, tax_system=None):
+    """
+    Fixed-point version of engine.calculate_batch for amounts in the given currency.
+    inputs: columns as for calculate_batch, with the MONEY_FIELDS in int64 minor units
+    The loan payments and property tax are rounded to minor units; every other line is
+    exact and the totals are integer sums. The required monthly income is rounded and the
+    annual income is twelve times that; with tax_system the annual income is rounded and
+    the monthly income is derived from it.
+    Returns the same keys as calculate_batch with int64 arrays in minor units.
+    Raises ValueError when an amount or a total does not fit in int64 minor units.
+    """
+    digits, rounding = CURRENCIES[currency]
+    columns = {}
+    for field in INPUT_FIELDS:
+        if field == "tax_rate" and tax_system is not None:
+            continue
+        if field in MONEY_FIELDS:
+            columns[field] = _minor_column(inputs, field)
+        elif field not in inputs:
+            raise KeyError(f"Missing input column: {field}")
+        else:
+            columns[field] = np.asarray(inputs[field], dtype=np.float64)
+    size = len(columns["house_cost"])
+    for field in OPTIONAL_FIELDS:
+        columns[field] = _minor_column(inputs, field, size)
+
+    loan_amount = columns["house_cost"] * (1 - columns["down_payment_percent"] / 100)
+    monthly_expenses = {}
+    for category in EXPENSE_CATEGORIES:
+        if category == "Mortgage":
+            monthly_expenses[category] = _round(calculate_mortgage_payment_batch(
+                loan_amount, columns["mortgage_rate"] / 100 / 12, columns["mortgage_years"] * 12), rounding)
+        elif category == "Property Tax":
+            monthly_expenses[category] = _round(
+                columns["house_cost"] * (columns["property_tax_rate"] / 100) / 12, rounding)
+        elif category == "Vehicle Payment":
+            monthly_expenses[category] = _round(calculate_mortgage_payment_batch(
+                columns["vehicle_cost"], columns["vehicle_loan_rate"] / 100 / 12, columns["vehicle_loan_years"] * 12), rounding)
+        elif category == "Food":
+            monthly_expenses[category] = _scale(columns["daily_food"], 30)
+        elif category == "Transport":
+            monthly_expenses[category] = _scale(columns["daily_transport"], 30)
+        else:
+            monthly_expenses[category] = columns[DIRECT_CATEGORIES[category]]
+
+    total_monthly_expenses = _sum(list(monthly_expenses.values()), size)
+
+    if tax_system is None:
+        with np.errstate(divide="ignore"):
+            required_monthly_income = _round(total_monthly_expenses / (1 - columns["tax_rate"] / 100), rounding)
+        required_annual_income = _scale(required_monthly_income, 12)
+    else:
+        scale = 10**digits
+        # The brackets are in major units; multiply as floats, twelve totals may not fit in int64
+        annual_expenses = total_monthly_expenses.astype(np.float64) * 12 / scale
+        required_annual_income = _round(gross_up(annual_expenses, tax_system) * scale, rounding)
+        required_monthly_income = _round(required_annual_income / 12, rounding)
+
+    return {
+        "monthly_expenses": monthly_expenses,
+        "total_monthly_expenses": total_monthly_expenses,
+        "required_monthly_income": required_monthly_income,
+        "required_annual_income": required_annual_income,
+    }
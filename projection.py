@@ -0,0 +1,190 @@
+"""
+Multi-year cash-flow projection of the monthly expense breakdown.
+
+Every expense category grows with its own inflation rate, loan payments stay fixed
+until the loan is paid off, retirement contributions compound at an expected return,
+and the required income is grossed up year by year. The projection is an explicit
+dependency graph: each node (a loan payment, one category's series, the total, ...)
+lists the inputs and nodes it depends on and is only recomputed when one of them
+changed, so moving one slider recomputes one branch of the graph instead of every
+series.
+"""
+import numpy as np
+
+from amortization import payoff_month
+from engine import DIRECT_CATEGORIES
+from tax import gross_up
+from utils import calculate_mortgage_payment
+
+DEFAULT_PARAMETERS = {
+    "years": 30,
+    "inflation": 2.5,                 # % per year for categories without their own rate
+    "category_inflation": {},         # category -> % per year
+    "retirement_return": 5.0,         # % per year
+    "retirement_balance": 0.0,        # savings at the start of the projection
+}
+
+# Loan payments are fixed once the loans are taken out and do not grow with inflation
+LOANS = {
+    "Mortgage": ("mortgage_payment", "mortgage_years"),
+    "Vehicle Payment": ("vehicle_payment", "vehicle_loan_years"),
+}
+
+# Categories that usually follow their own price index, for grouped inflation inputs
+INFLATION_GROUPS = {
+    "Housing": ("Property Tax", "House Maintenance", "Homeowners Insurance"),
+    "Transport": ("Vehicle Insurance", "Vehicle Maintenance", "Fuel", "Transport", "Public Transportation"),
+    "Food": ("Food",),
+    "Insurance": ("Health Insurance", "Life Insurance"),
+}
+
+class DependencyGraph:
+    """
+    Named computations over source values, cached until one of their dependencies changes.
+    Nodes must be added after the nodes they depend on. A node whose recomputed value is
+    equal to the cached one does not invalidate the nodes that depend on it.
+    """
+
+    def __init__(self):
+        self._nodes = {}
+        self._cache = {}
+        self._versions = {}
+        self.computed = []
+
+    def add(self, name, dependencies, compute):
+        """
+        Add a node: compute(*values of dependencies); a dependency is a node or a source.
+        """
+        self._nodes[name] = (tuple(dependencies), compute)
+
+    def evaluate(self, sources):
+        """
+        Return the value of every node for the given source values.
+        """
+        self.computed = []
+        values = dict(sources)
+        for name, (dependencies, compute) in self._nodes.items():
+            key = tuple(
+                ("node", self._versions[dependency]) if dependency in self._nodes else ("source", sources[dependency])
+                for dependency in dependencies
+            )
+            cached = self._cache.get(name)
+            if cached is None or cached[0] != key:
+                value = compute(*(values[dependency] for dependency in dependencies))
+                if cached is None or not np.array_equal(cached[1], value):
+                    self._versions[name] = self._versions.get(name, 0) + 1
+                self._cache[name] = (key, value)
+                self.computed.append(name)
+            values[name] = self._cache[name][1]
+        return values
+
+def _months_per_year(offsets, years):
+    """
+    Number of monthly payments made in each projected year of a loan over `years` years.
+    """
+    return np.clip(years * 12 - offsets * 12, 0, 12)
+
+def _retirement_balance(contributions, annual_return, starting_balance):
+    """
+    Year-end retirement savings: last year's balance grows by the return, then this year's
+    contributions are added.
+    """
+    growth = 1 + annual_return / 100
+    balance = np.empty(len(contributions))
+    current = starting_balance
+    for year, contribution in enumerate(contributions):
+        current = current * growth + contribution
+        balance[year] = current
+    return balance
+
+class Projection:
+    """
+    Year-by-year projection for the expense categories of one page, recomputed incrementally.
+    categories: expense category names in page order
+    """
+
+    def __init__(self, categories):
+        self.categories = list(categories)
+        self.graph = graph = DependencyGraph()
+
+        graph.add("offsets", ["years"], lambda years: np.arange(int(years), dtype=np.float64))
+        graph.add("mortgage_payment", ["house_cost", "down_payment_percent", "mortgage_rate", "mortgage_years"],
+                  lambda cost, down, rate, years: calculate_mortgage_payment(cost * (1 - down / 100), rate / 100 / 12, years * 12))
+        graph.add("vehicle_payment", ["vehicle_cost", "vehicle_loan_rate", "vehicle_loan_years"],
+                  lambda cost, rate, years: calculate_mortgage_payment(cost, rate / 100 / 12, years * 12))
+        graph.add("mortgage_payoff_month", ["house_cost", "down_payment_percent", "mortgage_rate", "mortgage_years"],
+                  lambda cost, down, rate, years: int(payoff_month(cost * (1 - down / 100), rate / 100 / 12, years * 12)))
+        graph.add("vehicle_payoff_month", ["vehicle_cost", "vehicle_loan_rate", "vehicle_loan_years"],
+                  lambda cost, rate, years: int(payoff_month(cost, rate / 100 / 12, years * 12)))
+
+        for category in self.categories:
+            if category in LOANS:
+                payment, years = LOANS[category]
+                graph.add(f"expense:{category}", [payment, years, "offsets"],
+                          lambda payment, years, offsets: payment * _months_per_year(offsets, years))
+                continue
+
+            graph.add(f"growth:{category}", ["offsets", f"inflation:{category}"],
+                      lambda offsets, rate: np.float_power(1 + rate / 100, offsets))
+            if category == "Property Tax":
+                graph.add(f"expense:{category}", ["house_cost", "property_tax_rate", f"growth:{category}"],
+                          lambda cost, rate, growth: cost * (rate / 100) * growth)
+            elif category in ("Food", "Transport"):
+                field = "daily_food" if category == "Food" else "daily_transport"
+                graph.add(f"expense:{category}", [field, f"growth:{category}"],
+                          lambda daily, growth: daily * 30 * 12 * growth)
+            else:
+                graph.add(f"expense:{category}", [DIRECT_CATEGORIES[category], f"growth:{category}"],
+                          lambda monthly, growth: monthly * 12 * growth)
+
+        def total(*series):
+            # Accumulate in page order, like the monthly total
+            result = np.zeros_like(series[0])
+            for amounts in series:
+                result = result + amounts
+            return result
+
+        graph.add("total_expenses", [f"expense:{category}" for category in self.categories], total)
+        graph.add("required_income", ["total_expenses", "tax_rate", "tax_system"],
+                  lambda expenses, tax_rate, tax_system: (
+                      expenses / (1 - tax_rate / 100) if tax_system is None else gross_up(expenses, tax_system)))
+        graph.add("retirement_balance", ["expense:Retirement Savings", "retirement_return", "retirement_start"],
+                  _retirement_balance)
+
+    @property
+    def computed(self):
+        """
+        Nodes recomputed by the last compute() call.
+        """
+        return self.graph.computed
+
+    def compute(self, inputs, parameters=None, tax_system=None):
+        """
+        Project the inputs of a page over parameters['years'] years.
+        Returns a dict with 'annual_expenses' ({category: array}), 'total_annual_expenses',
+        'required_annual_income' and 'retirement_balance' arrays (one value per year, year 1
+        being the amounts entered) and the loans' 'payoff_months'.
+        """
+        parameters = {**DEFAULT_PARAMETERS, **(parameters or {})}
+        sources = {field: float(value) for field, value in inputs.items()}
+        sources.update({
+            "years": parameters["years"],
+            "tax_system": tax_system,
+            "retirement_return": float(parameters["retirement_return"]),
+            "retirement_start": float(parameters["retirement_balance"]),
+        })
+        for category in self.categories:
+            rate = parameters["category_inflation"].get(category, parameters["inflation"])
+            sources[f"inflation:{category}"] = float(rate)
+
+        values = self.graph.evaluate(sources)
+        return {
+            "annual_expenses": {category: values[f"expense:{category}"] for category in self.categories},
+            "total_annual_expenses": values["total_expenses"],
+            "required_annual_income": values["required_income"],
+            "retirement_balance": values["retirement_balance"],
+            "payoff_months": {
+                "Mortgage": values["mortgage_payoff_month"],
+                "Vehicle Loan": values["vehicle_payoff_month"],
+            },
+        }
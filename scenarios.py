@@ -0,0 +1,295 @@
+"""
+Saved scenarios: an embedded SQLite store and compact shareable links.
+
+    python scenarios.py export scenarios.jsonl --owner alice
+    python scenarios.py import scenarios.jsonl
+
+A scenario is the value of every input widget on one country page, stored as JSON
+together with its owner, country code and name. The table is indexed on country and
+on owner, and bulk import runs in a single transaction. Set SCENARIO_DB to choose the
+database file (default: scenarios.db next to this module).
+
+The store has no accounts: the owner is the name typed on the page, not an identity,
+so anyone using the app can list, load or delete the scenarios saved under any name.
+It is meant for one user or a trusted team; put the app behind authentication and pass
+the authenticated user as the owner before sharing it more widely.
+
+For links, encode_scenario() keeps only the inputs that differ from the country's
+defaults and packs them into a short URL-safe token; decode_scenario() validates the
+token against the country's widgets so a hand-edited link cannot break the page.
+"""
+import argparse
+import base64
+import functools
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+from countries import COUNTRIES
+
+SCENARIO_DB = os.environ.get(
+    "SCENARIO_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), "scenarios.db"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scenarios (
+    id INTEGER PRIMARY KEY,
+    owner TEXT NOT NULL,
+    country TEXT NOT NULL,
+    name TEXT NOT NULL,
+    inputs TEXT NOT NULL,
+    updated REAL NOT NULL,
+    UNIQUE (owner, country, name)
+);
+CREATE INDEX IF NOT EXISTS scenarios_country ON scenarios (country, updated);
+CREATE INDEX IF NOT EXISTS scenarios_owner ON scenarios (owner, updated);
+"""
+
+COLUMNS = ("id", "owner", "country", "name", "inputs", "updated")
+
+# Upper bound for number inputs without a max_value: the largest integer the browser
+# represents exactly (Streamlit rejects larger widget values)
+MAX_INPUT_VALUE = 2**53 - 1
+
+# Toggle values as they appear in hand-edited links and imported files
+TOGGLE_VALUES = {"true": True, "false": False, "yes": True, "no": False, "on": True, "off": False, "1": True, "0": False}
+
+class ScenarioStore:
+    """
+    Scenarios persisted in one SQLite file, shared by all sessions of a process.
+    """
+
+    def __init__(self, path=SCENARIO_DB):
+        self.path = path
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._connection:
+            if path != ":memory:":
+                # Readers in other processes (CLI exports) do not block the app's writes
+                self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.executescript(SCHEMA)
+
+    def save(self, owner, country, name, inputs):
+        """
+        Insert or replace the scenario called name and return its id.
+        """
+        with self._lock, self._connection:
+            cursor = self._connection.execute(
+                "INSERT INTO scenarios (owner, country, name, inputs, updated) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (owner, country, name) DO UPDATE SET inputs = excluded.inputs, updated = excluded.updated "
+                "RETURNING id",
+                (owner, country, name, json.dumps(inputs, separators=(",", ":")), time.time()),
+            )
+            return cursor.fetchone()[0]
+
+    def list(self, owner=None, country=None):
+        """
+        Scenarios without their inputs, most recently saved first.
+        """
+        return [
+            {"id": row[0], "owner": row[1], "country": row[2], "name": row[3], "updated": row[4]}
+            for row in self._select("id, owner, country, name, updated", owner, country)
+        ]
+
+    def load(self, scenario_id, owner=None):
+        """
+        Return the scenario with its inputs, or None when it does not exist
+        (or, when owner is given, belongs to someone else).
+        """
+        where, params = _by_id(scenario_id, owner)
+        with self._lock:
+            row = self._connection.execute(f"SELECT {', '.join(COLUMNS)} FROM scenarios WHERE {where}", params).fetchone()
+        return _scenario(row) if row else None
+
+    def delete(self, scenario_id, owner=None):
+        """
+        Delete a scenario; when owner is given, only if it belongs to that owner.
+        """
+        where, params = _by_id(scenario_id, owner)
+        with self._lock, self._connection:
+            self._connection.execute(f"DELETE FROM scenarios WHERE {where}", params)
+
+    def import_scenarios(self, scenarios):
+        """
+        Save many scenarios ({'owner', 'country', 'name', 'inputs'}) in one transaction.
+        The inputs are validated like a shared link; a scenario for an unknown country or
+        without a name raises ValueError and nothing is written.
+        Returns the number of scenarios written.
+        """
+        now = time.time()
+        rows = []
+        for scenario in scenarios:
+            country = country_by_code(scenario["country"])
+            if not isinstance(scenario["name"], str) or not scenario["name"].strip():
+                raise ValueError("Every scenario needs a name")
+            if not isinstance(scenario["inputs"], dict):
+                raise ValueError(f"Scenario {scenario['name']!r} has no inputs")
+            inputs = validate_inputs(country, scenario["inputs"])
+            rows.append((scenario["owner"], scenario["country"], scenario["name"],
+                         json.dumps(inputs, separators=(",", ":")), scenario.get("updated", now)))
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT INTO scenarios (owner, country, name, inputs, updated) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (owner, country, name) DO UPDATE SET inputs = excluded.inputs, updated = excluded.updated",
+                rows,
+            )
+        return len(rows)
+
+    def export_scenarios(self, owner=None, country=None):
+        """
+        Return every matching scenario with its inputs, most recently saved first.
+        """
+        return [_scenario(row) for row in self._select(", ".join(COLUMNS), owner, country)]
+
+    def _select(self, columns, owner, country):
+        conditions = []
+        params = []
+        if owner is not None:
+            conditions.append("owner = ?")
+            params.append(owner)
+        if country is not None:
+            conditions.append("country = ?")
+            params.append(country)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._lock:
+            return self._connection.execute(
+                f"SELECT {columns} FROM scenarios{where} ORDER BY updated DESC", params).fetchall()
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+def _by_id(scenario_id, owner):
+    if owner is None:
+        return "id = ?", (scenario_id,)
+    return "id = ? AND owner = ?", (scenario_id, owner)
+
+def _scenario(row):
+    scenario = dict(zip(COLUMNS, row))
+    scenario["inputs"] = json.loads(scenario["inputs"])
+    return scenario
+
+@functools.lru_cache(maxsize=None)
+def get_store(path=SCENARIO_DB):
+    """
+    The store for path, opened once per process.
+    """
+    return ScenarioStore(path)
+
+def widget_specs(country):
+    """
+    Map every input field of a compiled country to its (widget, kwargs).
+    """
+    return {
+        field: (widget, kwargs)
+        for sections in country["columns"] for _, widgets in sections for field, widget, _, kwargs in widgets
+    }
+
+def country_by_code(code):
+    """
+    The compiled country with the given code; raises ValueError for unknown codes.
+    """
+    country = next((country for country in COUNTRIES.values() if country["code"] == code), None)
+    if country is None:
+        raise ValueError(f"Unknown country: {code!r}")
+    return country
+
+def validate_inputs(country, inputs):
+    """
+    Keep the known fields of inputs, clamped to the widget's range and converted to its type.
+    Values that are not finite numbers are dropped, and so are toggle values that are
+    neither booleans nor one of the TOGGLE_VALUES spellings.
+    """
+    specs = widget_specs(country)
+    values = {}
+    for field, value in inputs.items():
+        if field not in specs:
+            continue
+        widget, kwargs = specs[field]
+        if widget == "toggle":
+            if isinstance(value, str):
+                value = TOGGLE_VALUES.get(value.strip().lower())
+            if isinstance(value, bool):
+                values[field] = value
+            continue
+        if not isinstance(value, (int, float)) or isinstance(value, bool):
+            continue
+        if isinstance(value, float) and not math.isfinite(value):
+            continue
+        # Clamp before converting: a huge JSON integer cannot be converted to a float
+        value = min(max(value, kwargs["min_value"]), kwargs.get("max_value", MAX_INPUT_VALUE))
+        values[field] = type(kwargs["value"])(value)
+    return values
+
+def apply_scenario(session_state, country, inputs):
+    """
+    Set every widget of the country page, so the next render shows the scenario at once.
+    Fields missing from inputs go back to their defaults.
+    """
+    for field, value in validate_inputs(country, {**country["defaults"], **inputs}).items():
+        session_state[f"{country['code']}_{field}"] = value
+
+def encode_scenario(country, inputs):
+    """
+    Pack the inputs that differ from the country's defaults into a URL-safe token.
+    """
+    changed = {field: value for field, value in inputs.items() if country["defaults"].get(field) != value}
+    payload = json.dumps(changed, separators=(",", ":")).encode()
+    packed = base64.urlsafe_b64encode(zlib.compress(payload, 9)).rstrip(b"=").decode()
+    return f"{country['code']}.{packed}"
+
+def decode_scenario(token):
+    """
+    Return (country name, inputs) for a token from encode_scenario().
+    Raises ValueError when the token is malformed or names an unknown country.
+    """
+    code, _, packed = token.partition(".")
+    try:
+        country = country_by_code(code)
+    except ValueError:
+        raise ValueError(f"Unknown country in scenario link: {code!r}") from None
+    try:
+        payload = zlib.decompress(base64.urlsafe_b64decode(packed + "=" * (-len(packed) % 4)))
+        inputs = json.loads(payload)
+    except (ValueError, zlib.error) as error:
+        raise ValueError("Malformed scenario link") from error
+    if not isinstance(inputs, dict):
+        raise ValueError("Malformed scenario link")
+    return country["name"], validate_inputs(country, inputs)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import and export saved scenarios as JSON lines.")
+    parser.add_argument("--db", default=SCENARIO_DB, help="SQLite database file")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_parser = commands.add_parser("export", help="write scenarios to a JSON lines file")
+    export_parser.add_argument("output")
+    export_parser.add_argument("--owner")
+    export_parser.add_argument("--country", help="country code, e.g. south_africa")
+    import_parser = commands.add_parser("import", help="save the scenarios of a JSON lines file")
+    import_parser.add_argument("input")
+    args = parser.parse_args(argv)
+
+    store = ScenarioStore(args.db)
+    try:
+        if args.command == "export":
+            scenarios = store.export_scenarios(args.owner, args.country)
+            with open(args.output, "w") as file:
+                for scenario in scenarios:
+                    del scenario["id"]
+                    file.write(json.dumps(scenario) + "\n")
+            print(f"Exported {len(scenarios)} scenarios to {args.output}")
+        else:
+            try:
+                with open(args.input) as file:
+                    count = store.import_scenarios(json.loads(line) for line in file if line.strip())
+            except (KeyError, TypeError, ValueError) as error:
+                parser.exit(1, f"error: could not import {args.input}: {error}\n")
+            print(f"Imported {count} scenarios into {args.db}")
+    finally:
+        store.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Two-dimensional sensitivity sweeps of the required annual income.
+
+The grid is computed in one broadcasted pass: the swept inputs are an (1, nx) and an
+(ny, 1) array and every other input is a scalar. Intermediate results (the two annuity
+factors, the monthly total and the tax gross-up) are cached on the inputs they depend
+on, so changing e.g. only tax_rate rescales the cached monthly totals instead of
+recomputing the annuity factors. With progressive tax brackets the monthly totals are
+grossed up through the bracket table instead of a flat factor.
+"""
+import numpy as np
+
+from engine import DIRECT_CATEGORIES, OPTIONAL_FIELDS
+from tax import gross_up
+
+MAX_AXIS_POINTS = 201
+
+# Inputs each intermediate result depends on
+MORTGAGE_FACTOR_FIELDS = ("mortgage_rate", "mortgage_years")
+VEHICLE_FACTOR_FIELDS = ("vehicle_loan_rate", "vehicle_loan_years")
+TAX_FIELDS = ("tax_rate",)
+
+def annuity_factor(annual_rate, years):
+    """
+    Monthly payment per unit of loan for an annual rate in % and a term in years.
+    """
+    r = np.asarray(annual_rate, dtype=np.float64) / 100 / 12
+    n = np.asarray(years, dtype=np.float64) * 12
+    growth = np.float_power(1 + r, n)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(r == 0, 1 / n, r * growth / (growth - 1))
+
+def axis_fields(country):
+    """
+    Inputs that can be swept, as {field: label}: every slider and number input of the page.
+    """
+    return {
+        field: label
+        for sections in country["columns"] for _, widgets in sections
+        for field, widget, label, _ in widgets if widget in ("slider", "number")
+    }
+
+def axis_values(country, field, points=None):
+    """
+    Values to sweep for a field: the full slider range in slider steps, or 0 to twice the
+    default in input steps for number inputs. At most MAX_AXIS_POINTS (or points) values.
+    """
+    for sections in country["columns"]:
+        for _, widgets in sections:
+            for widget_field, widget, _, kwargs in widgets:
+                if widget_field != field:
+                    continue
+                if widget == "slider":
+                    low, high = kwargs["min_value"], kwargs["max_value"]
+                    step = kwargs.get("step", 1)
+                elif widget == "number":
+                    low, high, step = 0, 2 * kwargs["value"], kwargs["step"]
+                else:
+                    raise ValueError(f"Cannot sweep the {widget} input {field}")
+                count = int(round((high - low) / step)) + 1
+                count = min(count, points or MAX_AXIS_POINTS)
+                return np.linspace(low, high, count)
+    raise KeyError(f"Unknown input: {field}")
+
+class SensitivityGrid:
+    """
+    Required annual income over a grid of two inputs, recomputed incrementally.
+    """
+
+    def __init__(self, x_field, x_values, y_field, y_values):
+        self.x_field = x_field
+        self.y_field = y_field
+        self.x_values = np.asarray(x_values, dtype=np.float64)
+        self.y_values = np.asarray(y_values, dtype=np.float64)
+        self._cache = {}
+        self.computed = []
+
+    def _value(self, inputs, field):
+        if field == self.x_field:
+            return self.x_values[None, :]
+        if field == self.y_field:
+            return self.y_values[:, None]
+        return np.float64(inputs.get(field, 0))
+
+    def _node(self, name, inputs, fields, compute, tax_system=None):
+        """
+        Return the cached value of an intermediate result unless one of its inputs changed.
+        """
+        key = tuple(
+            "axis" if field in (self.x_field, self.y_field) else float(inputs.get(field, 0))
+            for field in fields
+        ) + (tax_system,)
+        cached = self._cache.get(name)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        value = compute()
+        self._cache[name] = (key, value)
+        self.computed.append(name)
+        return value
+
+    def compute(self, inputs, tax_system=None):
+        """
+        Required annual income with shape (len(y_values), len(x_values)).
+        tax_system: country whose progressive tax brackets replace the flat tax_rate
+        """
+        self.computed = []
+        value = lambda field: self._value(inputs, field)
+
+        mortgage_factor = self._node(
+            "mortgage_factor", inputs, MORTGAGE_FACTOR_FIELDS,
+            lambda: annuity_factor(value("mortgage_rate"), value("mortgage_years")))
+        vehicle_factor = self._node(
+            "vehicle_factor", inputs, VEHICLE_FACTOR_FIELDS,
+            lambda: annuity_factor(value("vehicle_loan_rate"), value("vehicle_loan_years")))
+
+        expense_fields = (
+            "house_cost", "down_payment_percent", "property_tax_rate", "vehicle_cost",
+            "daily_food", "daily_transport", *DIRECT_CATEGORIES.values(),
+        )
+
+        def monthly_total():
+            house_cost = value("house_cost")
+            total = (
+                house_cost * (1 - value("down_payment_percent") / 100) * mortgage_factor
+                + house_cost * (value("property_tax_rate") / 100) / 12
+                + value("vehicle_cost") * vehicle_factor
+                + (value("daily_food") + value("daily_transport")) * 30
+            )
+            for field in DIRECT_CATEGORIES.values():
+                if field in OPTIONAL_FIELDS and field not in inputs and field not in (self.x_field, self.y_field):
+                    continue
+                total = total + value(field)
+            return np.broadcast_to(total, (self.y_values.size, self.x_values.size))
+
+        total_fields = expense_fields + MORTGAGE_FACTOR_FIELDS + VEHICLE_FACTOR_FIELDS
+        total = self._node("monthly_total", inputs, total_fields, monthly_total)
+        if tax_system is not None:
+            # The brackets are not a constant factor; gross up the annual totals directly
+            return self._node(
+                "progressive_income", inputs, total_fields,
+                lambda: gross_up(total * 12, tax_system), tax_system)
+        factor = self._node(
+            "gross_up", inputs, TAX_FIELDS,
+            lambda: 12 / (1 - value("tax_rate") / 100))
+        return total * factor
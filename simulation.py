@@ -0,0 +1,193 @@
+"""
+Monte Carlo uncertainty mode for the required income.
+
+Each path draws a shift of the mortgage and vehicle loan rates (fixed for the life of
+the loans) and a yearly inflation and expense growth rate. Loan payments stay fixed
+while every other expense category compounds, and the required annual income of every
+projected year is collected in a mergeable histogram, so quantiles are aggregated as a
+stream and chunks can be spread over a process pool. Chunk seeds are spawned from one
+SeedSequence, which makes the results independent of the number of workers.
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from engine import calculate_batch
+from tax import gross_up
+
+DEFAULT_PARAMETERS = {
+    "years": 10,
+    "rate_volatility": 1.0,           # percentage points
+    "inflation_mean": 2.5,            # % per year
+    "inflation_volatility": 1.0,
+    "expense_growth_mean": 0.5,       # % per year on top of inflation
+    "expense_growth_volatility": 1.0,
+}
+
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+
+# Loan payments are fixed once the loans are taken out and do not grow with inflation
+FIXED_CATEGORIES = ("Mortgage", "Vehicle Payment")
+
+HISTOGRAM_BINS = 10_000
+
+class QuantileSketch:
+    """
+    Fixed-bin histogram used as a mergeable streaming quantile estimate.
+    Values outside [low, high) are counted in an under/overflow bin.
+    """
+
+    def __init__(self, low, high, bins=HISTOGRAM_BINS):
+        self.edges = np.linspace(low, high, bins + 1)
+        self.counts = np.zeros(bins + 2, dtype=np.int64)
+
+    @property
+    def count(self):
+        return int(self.counts.sum())
+
+    def add(self, values):
+        indices = np.searchsorted(self.edges, values, side="right")
+        self.counts += np.bincount(indices, minlength=self.counts.size)
+
+    def merge(self, counts):
+        self.counts += counts
+
+    def quantile(self, q):
+        """
+        Estimate the q-th quantile (0-1), interpolating linearly within a bin.
+        """
+        total = self.count
+        if total == 0:
+            return float("nan")
+        cumulative = np.cumsum(self.counts)
+        index = int(np.searchsorted(cumulative, q * total, side="left"))
+        if index == 0:
+            return float(self.edges[0])
+        if index >= self.counts.size - 1:
+            return float(self.edges[-1])
+        before = cumulative[index - 1]
+        fraction = (q * total - before) / self.counts[index]
+        low, high = self.edges[index - 1], self.edges[index]
+        return float(low + fraction * (high - low))
+
+    def fraction_below(self, value):
+        """
+        Estimate the share of values below value.
+        """
+        total = self.count
+        if total == 0:
+            return float("nan")
+        index = int(np.searchsorted(self.edges, value, side="right"))
+        below = self.counts[:index].sum()
+        if 0 < index < self.edges.size:
+            low, high = self.edges[index - 1], self.edges[index]
+            below += self.counts[index] * (value - low) / (high - low)
+        return float(below / total)
+
+def _histogram_range(inputs, parameters, tax_system=None):
+    """
+    Histogram range wide enough for the required income of every projected year.
+    """
+    baseline = calculate_batch({field: [value] for field, value in inputs.items()}, tax_system)
+    years = parameters["years"]
+    worst_growth = (
+        parameters["inflation_mean"] + 4 * parameters["inflation_volatility"]
+        + parameters["expense_growth_mean"] + 4 * parameters["expense_growth_volatility"]
+    )
+    high = float(baseline["required_annual_income"][0]) * 2 * (1 + max(worst_growth, 0) / 100) ** years
+    return 0.0, max(high, 1.0)
+
+def _simulate_chunk(inputs, parameters, size, seed, histogram_range, tax_system=None):
+    """
+    Simulate size paths and return the histogram counts of every projected year.
+    """
+    rng = np.random.default_rng(seed)
+    years = parameters["years"]
+    columns = {field: np.full(size, value, dtype=np.float64) for field, value in inputs.items()}
+
+    rate_shift = rng.normal(0.0, parameters["rate_volatility"], size)
+    columns["mortgage_rate"] = np.maximum(columns["mortgage_rate"] + rate_shift, 0.0)
+    columns["vehicle_loan_rate"] = np.maximum(columns["vehicle_loan_rate"] + rate_shift, 0.0)
+    growth = (
+        rng.normal(parameters["inflation_mean"], parameters["inflation_volatility"], size)
+        + rng.normal(parameters["expense_growth_mean"], parameters["expense_growth_volatility"], size)
+    ) / 100
+
+    results = calculate_batch(columns, tax_system)
+    expenses = results["monthly_expenses"]
+    fixed = sum(expenses[category] for category in FIXED_CATEGORIES)
+    growing = results["total_monthly_expenses"] - fixed
+
+    counts = []
+    for year in range(years + 1):
+        sketch = QuantileSketch(*histogram_range)
+        total = fixed + growing * (1 + growth) ** year
+        if tax_system is None:
+            sketch.add(total / (1 - columns["tax_rate"] / 100) * 12)
+        else:
+            sketch.add(gross_up(total * 12, tax_system))
+        counts.append(sketch.counts)
+    return np.array(counts)
+
+def run_simulation(inputs, n_paths=100_000, seed=0, parameters=None, chunk_size=25_000,
+                   workers=1, progress=None, tax_system=None):
+    """
+    Simulate the required annual income over the projection years.
+    inputs: scalar value per field of engine.INPUT_FIELDS (optional fields allowed)
+    progress: optional callback(paths_done, n_paths); an exception raised by it (e.g. the
+    page being rerun) stops the simulation without waiting for the chunks still running
+    tax_system: country whose progressive tax brackets replace the flat tax_rate
+    Returns a dict with the yearly 'sketches' and the number of 'paths' simulated.
+    """
+    parameters = {**DEFAULT_PARAMETERS, **(parameters or {})}
+    histogram_range = _histogram_range(inputs, parameters, tax_system)
+    sketches = [QuantileSketch(*histogram_range) for _ in range(parameters["years"] + 1)]
+
+    sizes = [min(chunk_size, n_paths - start) for start in range(0, n_paths, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    done = 0
+
+    def collect(counts, size):
+        nonlocal done
+        for sketch, year_counts in zip(sketches, counts):
+            sketch.merge(year_counts)
+        done += size
+        if progress is not None:
+            progress(done, n_paths)
+
+    if workers <= 1:
+        for size, chunk_seed in zip(sizes, seeds):
+            collect(_simulate_chunk(inputs, parameters, size, chunk_seed, histogram_range, tax_system), size)
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        finished = False
+        try:
+            futures = [
+                pool.submit(_simulate_chunk, inputs, parameters, size, chunk_seed, histogram_range, tax_system)
+                for size, chunk_seed in zip(sizes, seeds)
+            ]
+            for future, size in zip(futures, sizes):
+                collect(future.result(), size)
+            finished = True
+        finally:
+            # Leaving a `with` block would wait for every submitted chunk; when interrupted,
+            # drop the queued chunks and let the running ones finish in the background
+            pool.shutdown(wait=finished, cancel_futures=True)
+
+    return {"sketches": sketches, "paths": done}
+
+def percentile_bands(result, percentiles=DEFAULT_PERCENTILES):
+    """
+    Required annual income percentiles per projected year as a DataFrame.
+    """
+    rows = [[sketch.quantile(p / 100) for p in percentiles] for sketch in result["sketches"]]
+    bands = pd.DataFrame(rows, columns=[f"P{p}" for p in percentiles])
+    bands.index.name = "Year"
+    return bands
+
+def probability_below(result, income, year=0):
+    """
+    Estimated probability that the required annual income of a year stays below income.
+    """
+    return result["sketches"][year].fraction_below(income)
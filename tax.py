@@ -0,0 +1,96 @@
+"""
+Progressive income tax brackets and the gross-up from net to gross income.
+
+Every table is turned into a piecewise-linear net(gross) curve once at import. Net
+income is increasing in gross income, so the gross-up inverts it with a binary search
+over the precomputed breakpoints (np.searchsorted) and one linear step: O(log brackets)
+per scenario and no Python loop over the scenarios of a batch.
+"""
+import numpy as np
+
+# Annual taxable income brackets in local currency as (upper bound, marginal rate %).
+# Simplified 2024 tables for a single resident employee; tax-free allowances are
+# expressed as a 0% first bracket.
+TAX_BRACKETS = {
+    # Federal income tax with the standard deduction; no state tax or FICA
+    "USA": [
+        (14600, 0),
+        (26200, 10),
+        (61750, 12),
+        (115125, 22),
+        (206550, 24),
+        (258325, 32),
+        (623950, 35),
+        (float("inf"), 37),
+    ],
+    # Box 1 rates below state pension age, national insurance included
+    "Netherlands": [
+        (75518, 36.97),
+        (float("inf"), 49.5),
+    ],
+    # 2024/25 rates; the primary rebate equals a tax-free threshold of R95,750
+    "South Africa": [
+        (95750, 0),
+        (237100, 18),
+        (370500, 26),
+        (512800, 31),
+        (673000, 36),
+        (857900, 39),
+        (1817000, 41),
+        (float("inf"), 45),
+    ],
+    # National rates plus the 10% local income tax surcharge
+    "South Korea": [
+        (14000000, 6.6),
+        (50000000, 16.5),
+        (88000000, 26.4),
+        (150000000, 38.5),
+        (300000000, 41.8),
+        (500000000, 44),
+        (1000000000, 46.2),
+        (float("inf"), 49.5),
+    ],
+}
+
+def compile_brackets(brackets):
+    """
+    Precompute the breakpoints of the tax and net income curves for a bracket table.
+    """
+    lower_bounds = [0.0]
+    cumulative_tax = [0.0]
+    rates = []
+    for upper, rate in brackets:
+        rates.append(rate / 100)
+        if upper != float("inf"):
+            cumulative_tax.append(cumulative_tax[-1] + (upper - lower_bounds[-1]) * rate / 100)
+            lower_bounds.append(float(upper))
+    lower_bounds = np.array(lower_bounds)
+    cumulative_tax = np.array(cumulative_tax)
+    return {
+        "gross": lower_bounds,
+        "tax": cumulative_tax,
+        "net": lower_bounds - cumulative_tax,
+        "rates": np.array(rates),
+    }
+
+TAX_SYSTEMS = {country: compile_brackets(brackets) for country, brackets in TAX_BRACKETS.items()}
+
+def income_tax(gross_annual, country):
+    """
+    Annual income tax owed on a gross annual income (scalar or array).
+    """
+    system = TAX_SYSTEMS[country]
+    gross_annual = np.asarray(gross_annual, dtype=np.float64)
+    segment = np.searchsorted(system["gross"], gross_annual, side="right") - 1
+    segment = np.clip(segment, 0, None)
+    return system["tax"][segment] + (gross_annual - system["gross"][segment]) * system["rates"][segment]
+
+def gross_up(net_annual, country):
+    """
+    Gross annual income that leaves net_annual after income tax (scalar or array).
+    """
+    system = TAX_SYSTEMS[country]
+    net_annual = np.asarray(net_annual, dtype=np.float64)
+    segment = np.searchsorted(system["net"], net_annual, side="right") - 1
+    segment = np.clip(segment, 0, None)
+    return system["gross"][segment] + (net_annual - system["net"][segment]) / (1 - system["rates"][segment])
@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+from affordability import max_affordable, max_affordable_bisect
+from countries import COUNTRIES
+from engine import INPUT_FIELDS, calculate_batch
+
+def _inputs(without=()):
+    defaults = COUNTRIES["USA"]["defaults"]
+    return {field: np.array([defaults[field]], dtype=np.float64) for field in INPUT_FIELDS if field not in without}
+
+@pytest.mark.parametrize("field", ["house_cost", "vehicle_cost"])
+@pytest.mark.parametrize("tax_system", [None, "USA"])
+def test_closed_form_matches_bisection(field, tax_system):
+    inputs = _inputs()
+    income = np.array([150000.0, 250000.0, 400000.0])
+    closed_form = max_affordable(inputs, income, field, tax_system)
+    assert closed_form == pytest.approx(max_affordable_bisect(inputs, income, field, tax_system=tax_system), rel=1e-9)
+
+@pytest.mark.parametrize("field", ["house_cost", "vehicle_cost"])
+def test_tax_system_does_not_need_tax_rate(field):
+    inputs = _inputs(without=("tax_rate",))
+    amount = max_affordable(inputs, 250000.0, field, "USA")
+    solved = dict(inputs, **{field: amount})
+    assert calculate_batch(solved, "USA")["required_annual_income"] == pytest.approx(250000.0)
+
+def test_unaffordable_income_is_zero():
+    assert max_affordable(_inputs(), 1000.0)[0] == 0.0
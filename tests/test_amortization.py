@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from amortization import iter_schedule, payoff_month, schedule_arrays, total_interest
+
+LOANS = [
+    (400000.0, 0.065 / 12, 360),
+    (35000.0, 0.049 / 12, 60),
+    (12000.0, 0.0, 48),
+    (250000.0, 0.001, 12),
+]
+
+@pytest.mark.parametrize("P, r, n", LOANS)
+def test_closed_form_matches_iteration(P, r, n):
+    rows = list(iter_schedule(P, r, n))
+
+    assert payoff_month(P, r, n) == len(rows)
+    assert total_interest(P, r, n) == pytest.approx(sum(row[3] for row in rows), rel=1e-9, abs=1e-6)
+
+@pytest.mark.parametrize("P, r, n", LOANS)
+@pytest.mark.parametrize("extra_payment", [100.0, 1000.0])
+def test_extra_payment_matches_iteration(P, r, n, extra_payment):
+    rows = list(iter_schedule(P, r, n, extra_payment=extra_payment))
+
+    assert payoff_month(P, r, n, extra_payment) == len(rows)
+    assert total_interest(P, r, n, extra_payment) == pytest.approx(sum(row[3] for row in rows), rel=1e-9, abs=1e-6)
+
+def test_rate_reset_reamortizes_the_remaining_balance():
+    # 200,000 over 30 years at 6%, reset to 4.5% from month 61:
+    #   payment at 6%:         200000 * r(1+r)^360 / ((1+r)^360 - 1)          = 1199.10
+    #   balance after 60:      200000 (1+r)^60 - 1199.10 ((1+r)^60 - 1) / r   = 186108.71
+    #   payment at 4.5%:       186108.71 * s(1+s)^300 / ((1+s)^300 - 1)       = 1034.45
+    # with r = 0.06 / 12 and s = 0.045 / 12
+    rows = list(iter_schedule(200000.0, 0.06 / 12, 360, rate_resets={61: 0.045 / 12}))
+    months, payments, principal, interest, balances = map(np.array, zip(*rows))
+
+    assert len(rows) == 360 and balances[-1] == pytest.approx(0.0, abs=1e-6)
+    assert payments[:60] == pytest.approx(1199.10, abs=0.005)
+    assert balances[59] == pytest.approx(186108.71, abs=0.005)
+    assert payments[60:] == pytest.approx(1034.45, abs=0.005)
+    assert interest[60] == pytest.approx(186108.71 * 0.045 / 12, abs=0.005)
+    assert principal.sum() == pytest.approx(200000.0)
+
+def test_schedule_arrays_match_iteration():
+    P, r, n = zip(*LOANS)
+    schedules = schedule_arrays(P, r, n)
+
+    for index, loan in enumerate(LOANS):
+        rows = np.array(list(iter_schedule(*loan)))
+        months = len(rows)
+        assert schedules["balance"][index, :months] == pytest.approx(rows[:, 4], abs=1e-6)
+        assert schedules["interest"][index, :months] == pytest.approx(rows[:, 3], abs=1e-6)
+        assert schedules["principal"][index, :months] == pytest.approx(rows[:, 2], abs=1e-6)
+        assert not schedules["balance"][index, months:].any()
+
+def test_zero_loan_is_paid_off_immediately():
+    assert payoff_month(0.0, 0.005, 360) == 0
+    assert total_interest(0.0, 0.005, 360) == 0.0
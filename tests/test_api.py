@@ -0,0 +1,104 @@
+import asyncio
+import json
+
+import numpy as np
+import pytest
+
+from api import CalculatorAPI
+from countries import COUNTRIES
+from engine import calculate_batch
+
+HUGE = "1" + "0" * 400
+
+@pytest.fixture(scope="module")
+def api():
+    api = CalculatorAPI(workers=1, window=0.05)
+    yield api
+    api.close()
+
+def _post(api, path, body):
+    status, response = asyncio.run(api.dispatch("POST", path, body.encode()))
+    return status, json.loads(response)
+
+@pytest.mark.parametrize("body", [
+    "{not json",
+    "[]",
+    '{"country": "Atlantis"}',
+    '{"tax_system": "Atlantis"}',
+    '{"country": "USA", "inputs": []}',
+    '{"country": "USA", "inputs": {"house_cost": "a lot"}}',
+    '{"country": "USA", "inputs": {"house_cost": true}}',
+    '{"inputs": {"house_cost": 1}}',
+    pytest.param('{"country": "USA", "inputs": {"house_cost": %s}}' % HUGE, id="huge-integer"),
+])
+def test_single_request_errors(api, body):
+    status, response = _post(api, "/v1/required-income", body)
+    assert status == 400
+    assert response["error"]
+
+@pytest.mark.parametrize("body", [
+    "{not json",
+    '{"country": "USA"}',
+    '{"country": "USA", "scenarios": {}}',
+    '{"country": "USA", "columns": {"house_cost": [1, 2], "vehicle_cost": [1]}}',
+    '{"country": "USA", "columns": {"house_cost": ["a", "b"]}}',
+    pytest.param('{"country": "USA", "columns": {"house_cost": [%s]}}' % HUGE, id="huge-integer-column"),
+    pytest.param('{"country": "USA", "scenarios": [{"house_cost": %s}]}' % HUGE, id="huge-integer-scenario"),
+    '{"country": "USA", "columns": {"house_cost": [[1, 2], [3, 4]]}}',
+    '{"country": "USA", "scenarios": [{"house_cost": [1, 2]}, {"house_cost": [3, 4]}]}',
+])
+def test_batch_request_errors(api, body):
+    status, response = _post(api, "/v1/required-income/batch", body)
+    assert status == 400
+    assert response["error"]
+
+def test_batch_matches_engine(api):
+    defaults = COUNTRIES["USA"]["defaults"]
+    house_costs = [250000, 500000, 750000]
+    status, response = _post(api, "/v1/required-income/batch", json.dumps(
+        {"country": "USA", "breakdown": True, "columns": {"house_cost": house_costs}}))
+    assert status == 200
+
+    columns = {field: np.full(3, float(value)) for field, value in defaults.items() if field != "progressive_tax"}
+    columns["house_cost"] = np.array(house_costs, dtype=np.float64)
+    expected = calculate_batch(columns)
+    assert response["count"] == 3
+    assert response["required_annual_income"] == pytest.approx(expected["required_annual_income"].tolist())
+    assert response["monthly_expenses"]["Mortgage"] == pytest.approx(expected["monthly_expenses"]["Mortgage"].tolist())
+
+def test_single_requests_are_coalesced(api):
+    house_costs = [300000, 400000, 400000, 500000]
+
+    async def requests():
+        before = api.coalescer.stats()
+        responses = await asyncio.gather(*(
+            api.dispatch("POST", "/v1/required-income",
+                         json.dumps({"country": "USA", "inputs": {"house_cost": cost}}).encode())
+            for cost in house_costs
+        ))
+        return before, api.coalescer.stats(), responses
+
+    before, after, responses = asyncio.run(requests())
+    assert after["requests"] - before["requests"] == 4
+    assert after["batches"] - before["batches"] == 1
+    assert after["duplicates"] - before["duplicates"] == 1
+    incomes = [json.loads(body)["required_annual_income"] for status, body in responses]
+    assert all(status == 200 for status, body in responses)
+    assert incomes[1] == incomes[2]
+    assert incomes[0] < incomes[1] < incomes[3]
+
+def test_overflow_is_answered_over_http(api):
+    async def request():
+        server = await asyncio.start_server(api.handle_connection, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            body = ('{"country": "USA", "columns": {"house_cost": [%s]}}' % HUGE).encode()
+            writer.write(b"POST /v1/required-income/batch HTTP/1.1\r\nConnection: close\r\n"
+                         b"Content-Length: %d\r\n\r\n" % len(body) + body)
+            await writer.drain()
+            response = await asyncio.wait_for(reader.read(), 10)
+            writer.close()
+        return response
+
+    assert asyncio.run(request()).startswith(b"HTTP/1.1 400 ")
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import batch
+from countries import COUNTRIES
+from engine import INPUT_FIELDS, calculate_batch
+from money import calculate_batch_minor, to_minor_inputs
+
+def _scenarios(size, seed=0):
+    rng = np.random.default_rng(seed)
+    defaults = COUNTRIES["USA"]["defaults"]
+    frame = pd.DataFrame({field: np.round(rng.uniform(0.5, 1.5, size) * defaults[field], 2) for field in INPUT_FIELDS})
+    frame["mortgage_years"] = rng.integers(1, 41, size)
+    frame.insert(0, "id", [f"scenario-{index}" for index in range(size)])
+    return frame
+
+def _write(frame, path):
+    if str(path).endswith(".parquet"):
+        frame.to_parquet(path, index=False)
+    else:
+        frame.to_csv(path, index=False)
+
+def _read(path):
+    return pd.read_parquet(path) if str(path).endswith(".parquet") else pd.read_csv(path)
+
+@pytest.mark.parametrize("input_name", ["scenarios.csv", "scenarios.parquet"])
+@pytest.mark.parametrize("output_name", ["results.csv", "results.parquet"])
+def test_results_match_the_engine(tmp_path, input_name, output_name):
+    scenarios = _scenarios(1000)
+    _write(scenarios, tmp_path / input_name)
+
+    rows = batch.run(str(tmp_path / input_name), str(tmp_path / output_name), chunk_size=300)
+    output = _read(tmp_path / output_name)
+    expected = calculate_batch(scenarios)
+    assert rows == len(output) == 1000
+    assert "id" not in output
+    np.testing.assert_allclose(output["Required Annual Income"], expected["required_annual_income"], rtol=1e-12)
+    np.testing.assert_allclose(output["Mortgage"], expected["monthly_expenses"]["Mortgage"], rtol=1e-12)
+
+@pytest.mark.parametrize("input_name", ["scenarios.csv", "scenarios.parquet"])
+def test_keep_inputs_passes_every_column_through(tmp_path, input_name):
+    scenarios = _scenarios(500)
+    _write(scenarios, tmp_path / input_name)
+
+    batch.run(str(tmp_path / input_name), str(tmp_path / "results.parquet"), chunk_size=200, keep_inputs=True)
+    output = pd.read_parquet(tmp_path / "results.parquet")
+    assert output["id"].tolist() == scenarios["id"].tolist()
+    assert output["house_cost"].tolist() == scenarios["house_cost"].tolist()
+    assert output["mortgage_years"].dtype == np.float64
+
+def test_worker_pool_keeps_the_input_order(tmp_path):
+    scenarios = _scenarios(2000)
+    _write(scenarios, tmp_path / "scenarios.parquet")
+
+    batch.run(str(tmp_path / "scenarios.parquet"), str(tmp_path / "serial.parquet"), chunk_size=150, keep_inputs=True)
+    rows = batch.run(str(tmp_path / "scenarios.parquet"), str(tmp_path / "pool.parquet"), chunk_size=150, workers=2,
+                     keep_inputs=True)
+    assert rows == 2000
+    pd.testing.assert_frame_equal(pd.read_parquet(tmp_path / "pool.parquet"), pd.read_parquet(tmp_path / "serial.parquet"))
+
+def test_fixed_point_writes_exact_minor_units(tmp_path):
+    scenarios = _scenarios(1000)
+    _write(scenarios, tmp_path / "scenarios.csv")
+
+    assert batch.main([str(tmp_path / "scenarios.csv"), str(tmp_path / "results.parquet"),
+                       "--fixed-point", "USD", "--chunk-size", "400", "--workers", "2"]) is None
+    output = pd.read_parquet(tmp_path / "results.parquet")
+    expected = calculate_batch_minor(to_minor_inputs(scenarios, "USD"), "USD")
+    assert output["Required Annual Income"].dtype == np.int64
+    np.testing.assert_array_equal(output["Required Annual Income"], expected["required_annual_income"])
+    np.testing.assert_array_equal(output["Total Monthly Expenses"], expected["total_monthly_expenses"])
+
+def test_missing_input_column_exits_with_an_error(tmp_path, capsys):
+    _write(_scenarios(10).drop(columns="house_cost"), tmp_path / "scenarios.csv")
+    with pytest.raises(SystemExit) as exit_info:
+        batch.main([str(tmp_path / "scenarios.csv"), str(tmp_path / "results.csv")])
+    assert exit_info.value.code == 1
+    assert "house_cost" in capsys.readouterr().err
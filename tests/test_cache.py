@@ -0,0 +1,53 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from cache import LRUCache
+
+def _fill(cache, keys):
+    return [cache.get_or_compute(key, lambda key=key: key * 10) for key in keys]
+
+def test_hits_return_the_stored_value_without_computing():
+    cache = LRUCache(maxsize=4)
+    assert cache.get_or_compute("a", lambda: [1]) == [1]
+    stored = cache.get_or_compute("a", lambda: pytest.fail("computed again"))
+    assert stored == [1]
+    assert cache.stats() == {"size": 1, "maxsize": 4, "hits": 1, "misses": 1, "evictions": 0, "hit_rate": 0.5}
+
+def test_least_recently_used_entry_is_evicted_first():
+    cache = LRUCache(maxsize=3)
+    _fill(cache, [1, 2, 3])
+    _fill(cache, [1])         # 2 is now the least recently used
+    _fill(cache, [4])
+    assert len(cache) == 3
+    assert cache.stats()["evictions"] == 1
+
+    computed = []
+    for key in [1, 3, 4, 2]:
+        cache.get_or_compute(key, lambda key=key: computed.append(key))
+    # 2 was evicted; bringing it back evicts 1, the least recently used by then
+    assert computed == [2]
+    assert cache.stats()["evictions"] == 2
+    cache.get_or_compute(1, lambda: computed.append(1))
+    assert computed == [2, 1]
+
+def test_counters_and_clear():
+    cache = LRUCache(maxsize=2)
+    _fill(cache, [1, 2, 1, 3, 1, 2])
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (2, 4, 2)
+    assert stats["hit_rate"] == pytest.approx(2 / 6)
+
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.stats()["hits"] == 2
+    assert LRUCache().stats()["hit_rate"] == 0.0
+
+def test_results_cache_size_comes_from_the_environment():
+    environment = dict(os.environ, RESULTS_CACHE_SIZE="7")
+    output = subprocess.run([sys.executable, "-c", "import cache; print(cache.results_cache.maxsize)"],
+                            env=environment, capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    assert output.stdout.strip() == "7"
@@ -0,0 +1,34 @@
+import pytest
+
+from comparison import compare_countries
+from countries import COUNTRIES
+from main import _calculate_results
+
+def _profile(country, **changes):
+    profile = {field: value for field, value in country["defaults"].items() if field != "progressive_tax"}
+    profile.update(changes)
+    return profile
+
+@pytest.mark.parametrize("name", list(COUNTRIES))
+@pytest.mark.parametrize("progressive_tax", [False, True])
+def test_home_row_matches_page_results(name, progressive_tax):
+    country = COUNTRIES[name]
+    # Rates that differ from the defaults must be used for the home country
+    profile = _profile(country, mortgage_rate=9.9, vehicle_loan_rate=0.0, property_tax_rate=2.5, tax_rate=41)
+    table = compare_countries(profile, country["currency_code"], country["currency_code"], progressive_tax, name)
+
+    values = dict(profile)
+    extra_expenses = {category: values.pop(field) for field, category in country["extra_categories"].items()}
+    expected = _calculate_results(values, extra_expenses, name if progressive_tax else None)
+    row = table.loc[name]
+    assert row["Total Monthly Expenses"] == pytest.approx(expected["total_monthly_expenses"], rel=1e-12)
+    assert row["Required Annual Income"] == pytest.approx(expected["required_annual_income"], rel=1e-12)
+
+@pytest.mark.parametrize("progressive_tax", [False, True])
+def test_other_countries_use_their_default_rates(progressive_tax):
+    home = COUNTRIES["USA"]
+    entered = compare_countries(_profile(home, mortgage_rate=9.9, tax_rate=45), "USD", "USD", progressive_tax, "USA")
+    defaults = compare_countries(_profile(home), "USD", "USD", progressive_tax, "USA")
+    others = [name for name in COUNTRIES if name != "USA"]
+    assert entered.loc[others].equals(defaults.loc[others])
+    assert entered.loc["USA", "Mortgage"] > defaults.loc["USA", "Mortgage"]
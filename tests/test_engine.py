@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from countries import COUNTRIES
+from engine import INPUT_FIELDS, OPTIONAL_FIELDS, calculate_batch, calculate_mortgage_payment_batch
+from main import _calculate_results
+from utils import calculate_mortgage_payment
+
+def _page_inputs(country, **changes):
+    """
+    Split a country's defaults into the inputs and extra expenses of the page calculation.
+    """
+    values = {field: value for field, value in country["defaults"].items() if field != "progressive_tax"}
+    values.update(changes)
+    extra_expenses = {category: values.pop(field) for field, category in country["extra_categories"].items()}
+    return values, extra_expenses
+
+def _random_scenarios(size, seed=0):
+    rng = np.random.default_rng(seed)
+    defaults = COUNTRIES["USA"]["defaults"]
+    scenarios = []
+    for _ in range(size):
+        scenario = {field: float(defaults[field] * rng.uniform(0.5, 1.5)) for field in INPUT_FIELDS}
+        scenario["mortgage_years"] = float(rng.integers(1, 41))
+        scenario["mortgage_rate"] = float(rng.integers(0, 101) / 10)
+        scenario["vehicle_loan_rate"] = float(rng.choice([0.0, 4.5, 9.9]))
+        scenarios.append(scenario)
+    return scenarios
+
+@pytest.mark.parametrize("name", list(COUNTRIES))
+@pytest.mark.parametrize("tax_system", [False, True])
+def test_batch_matches_page_calculation(name, tax_system):
+    country = COUNTRIES[name]
+    values, extra_expenses = _page_inputs(country)
+    tax_system = name if tax_system else None
+    expected = _calculate_results(values, extra_expenses, tax_system)
+
+    inputs = {field: [value] for field, value in values.items()}
+    inputs.update({field: [country["defaults"][field]] for field in country["extra_categories"]})
+    results = calculate_batch(inputs, tax_system)
+
+    for category, amount in expected["monthly_expenses"].items():
+        assert results["monthly_expenses"][category][0] == amount
+    for key in ("total_monthly_expenses", "required_monthly_income", "required_annual_income"):
+        assert results[key][0] == expected[key]
+
+def test_batch_matches_page_calculation_row_by_row():
+    scenarios = _random_scenarios(200)
+    columns = {field: [scenario[field] for scenario in scenarios] for field in INPUT_FIELDS}
+    results = calculate_batch(columns)
+
+    for index, scenario in enumerate(scenarios):
+        expected = _calculate_results(scenario, {})
+        assert results["total_monthly_expenses"][index] == expected["total_monthly_expenses"]
+        assert results["required_annual_income"][index] == expected["required_annual_income"]
+
+def test_missing_optional_fields_are_zero():
+    inputs = {field: [COUNTRIES["USA"]["defaults"][field]] for field in INPUT_FIELDS}
+    results = calculate_batch(inputs)
+    for field in OPTIONAL_FIELDS:
+        with_zero = calculate_batch({**inputs, field: [0.0]})
+        assert with_zero["required_annual_income"][0] == results["required_annual_income"][0]
+
+def test_missing_required_field_raises():
+    inputs = {field: [1.0] for field in INPUT_FIELDS if field != "house_cost"}
+    with pytest.raises(KeyError, match="house_cost"):
+        calculate_batch(inputs)
+
+def test_tax_rate_not_needed_with_tax_system():
+    inputs = {field: [COUNTRIES["USA"]["defaults"][field]] for field in INPUT_FIELDS if field != "tax_rate"}
+    assert calculate_batch(inputs, "USA")["required_annual_income"][0] > 0
+
+@pytest.mark.parametrize("rate", [0.0, 0.0025, 0.005, 0.01])
+@pytest.mark.parametrize("months", [12, 60, 360])
+def test_mortgage_payment_batch_matches_scalar(rate, months):
+    assert calculate_mortgage_payment_batch([250000.0], [rate], [months])[0] == calculate_mortgage_payment(250000.0, rate, months)
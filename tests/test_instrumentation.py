@@ -0,0 +1,97 @@
+import json
+import os
+
+import pytest
+
+import instrumentation
+
+class Rerun(Exception):
+    """
+    Stands in for the exception st.rerun() raises to stop the script.
+    """
+
+@pytest.fixture
+def metrics(tmp_path, monkeypatch):
+    """
+    Enable instrumentation with fresh aggregates; returns a function setting METRICS_FILE.
+    """
+    monkeypatch.setattr(instrumentation, "ENABLED", True)
+    monkeypatch.setattr(instrumentation, "_rerun_counts", {})
+    monkeypatch.setattr(instrumentation, "_section_totals", {})
+    monkeypatch.setattr(instrumentation, "_last_session_bytes", None)
+
+    def use(name):
+        path = str(tmp_path / name)
+        monkeypatch.setattr(instrumentation, "METRICS_FILE", path)
+        return path
+    return use
+
+def _rerun(page, session_state):
+    with instrumentation.rerun(page, session_state):
+        with instrumentation.section("inputs"):
+            pass
+        # Nested reruns, as when a fragment runs inside the full page, record nothing
+        with instrumentation.rerun(page, session_state):
+            with instrumentation.section("calculation"):
+                pass
+
+def test_prometheus_file_is_replaced_after_every_rerun(metrics, tmp_path):
+    path = metrics("metrics.prom")
+    session_state = {}
+    _rerun("USA", session_state)
+    _rerun("USA", session_state)
+    _rerun("Netherlands", {})
+
+    with open(path) as file:
+        text = file.read()
+    assert sorted(os.listdir(tmp_path)) == ["metrics.prom"]
+    assert text.count("# TYPE dreamlife_reruns_total counter") == 1
+    assert 'dreamlife_reruns_total{page="USA"} 2' in text
+    assert 'dreamlife_reruns_total{page="Netherlands"} 1' in text
+    assert 'dreamlife_rerun_section_seconds_count{page="USA",section="calculation"} 2' in text
+    assert 'dreamlife_rerun_section_seconds_count{page="USA",section="total"} 2' in text
+    assert session_state["_rerun_count"] == 2
+
+def test_other_files_get_one_json_line_per_rerun(metrics):
+    path = metrics("metrics.jsonl")
+    session_state = {}
+    _rerun("USA", session_state)
+    _rerun("USA", session_state)
+
+    with open(path) as file:
+        records = [json.loads(line) for line in file]
+    assert [record["session_reruns"] for record in records] == [1, 2]
+    assert all(record["page"] == "USA" for record in records)
+    assert all(set(record["sections"]) == {"inputs", "calculation"} for record in records)
+    assert all(record["total_seconds"] >= sum(record["sections"].values()) for record in records)
+
+def test_disabled_instrumentation_is_a_no_op(monkeypatch):
+    monkeypatch.setattr(instrumentation, "ENABLED", False)
+    assert instrumentation.rerun("USA") is instrumentation.section("inputs")
+    assert instrumentation.profile("cprofile", None) is instrumentation.section("inputs")
+
+def test_profile_is_reported_when_the_rerun_completes(metrics, tmp_path):
+    metrics("metrics.jsonl")
+    reports = []
+    with instrumentation.profile("cprofile", lambda path, text: reports.append((path, text))):
+        # Nested profiles, as when a fragment runs inside the full page, are no-ops
+        with instrumentation.profile("cprofile", lambda path, text: pytest.fail("nested profile reported")):
+            sum(range(1000))
+
+    [(path, text)] = reports
+    assert os.path.dirname(path) == str(tmp_path)
+    assert path.endswith(".prof") and os.path.exists(path)
+    assert "cumulative" in text
+
+def test_interrupted_rerun_is_not_reported(metrics, tmp_path):
+    metrics("metrics.jsonl")
+    with pytest.raises(Rerun):
+        with instrumentation.profile("cprofile", lambda path, text: pytest.fail("interrupted rerun reported")):
+            raise Rerun
+    assert not [name for name in os.listdir(tmp_path) if name.startswith("profile-")]
+
+    # The next rerun is profiled and reported
+    reports = []
+    with instrumentation.profile("cprofile", lambda path, text: reports.append(path)):
+        pass
+    assert len(reports) == 1
@@ -0,0 +1,98 @@
+from decimal import ROUND_HALF_EVEN, ROUND_HALF_UP, Decimal
+
+import numpy as np
+import pytest
+
+from countries import COUNTRIES
+from engine import INPUT_FIELDS, calculate_batch
+from money import _round, _sum, calculate_batch_minor, format_minor, round_minor, to_major, to_minor_inputs
+
+def _scenarios(size, seed=0):
+    rng = np.random.default_rng(seed)
+    defaults = COUNTRIES["USA"]["defaults"]
+    columns = {field: np.round(rng.uniform(0.5, 1.5, size) * defaults[field], 2) for field in INPUT_FIELDS}
+    columns["mortgage_years"] = rng.integers(5, 41, size).astype(np.float64)
+    columns["mortgage_rate"] = rng.integers(0, 101, size) / 10
+    columns["tax_rate"] = rng.integers(0, 51, size).astype(np.float64)
+    return columns
+
+@pytest.mark.parametrize("amount, currency, expected", [
+    (0.145, "ZAR", 15),
+    (0.125, "USD", 12),
+    (0.135, "USD", 14),
+    (-0.145, "ZAR", -15),
+    (-0.125, "EUR", -12),
+    (1234.5, "KRW", 1235),
+    (-1234.5, "KRW", -1235),
+])
+def test_ties_follow_the_currency_rule(amount, currency, expected):
+    assert round_minor(np.array([amount]), currency)[0] == expected
+
+@pytest.mark.parametrize("rounding, mode", [("half_even", ROUND_HALF_EVEN), ("half_up", ROUND_HALF_UP)])
+def test_large_amounts_keep_every_minor_unit(rounding, mode):
+    rng = np.random.default_rng(0)
+    # Quarters are exact in binary up to 2**51
+    minor = np.floor(rng.uniform(1e10, 1e15, 1000)) + rng.choice([0.25, 0.5, 0.75], 1000)
+    minor = np.concatenate([minor, -minor])
+    expected = [int(Decimal(value).quantize(Decimal(1), rounding=mode)) for value in minor.tolist()]
+    assert _round(minor, rounding).tolist() == expected
+
+@pytest.mark.parametrize("amount", [np.inf, np.nan, 1e17])
+def test_unrepresentable_amounts_raise(amount):
+    with pytest.raises(ValueError):
+        round_minor(np.array([1.0, amount]), "USD")
+
+@pytest.mark.parametrize("lines, expected", [
+    ([2**62, 2**62 - 1], 2**63 - 1),
+    ([-2**62, -2**62], -2**63),
+    ([2**62, 2**62, -2**62, 5], 2**62 + 5),
+])
+def test_sums_up_to_the_int64_limits_are_exact(lines, expected):
+    assert _sum([np.array([1, line], dtype=np.int64) for line in lines], 2).tolist() == [len(lines), expected]
+
+@pytest.mark.parametrize("lines", [
+    [2**62, 2**62],
+    [-2**62, -2**62, -1],
+    # Wraps around twice and lands on zero
+    [2**62] * 4,
+])
+def test_overflowing_sums_raise(lines):
+    with pytest.raises(ValueError):
+        _sum([np.array([1, line], dtype=np.int64) for line in lines], 2)
+
+@pytest.mark.parametrize("field, value", [
+    ("misc_expenses", 2**62),
+    ("daily_food", 2**60),
+    ("utilities", 2**59),
+])
+@pytest.mark.parametrize("tax_system", [None, "USA"])
+def test_totals_that_do_not_fit_raise(field, value, tax_system):
+    columns = to_minor_inputs(_scenarios(3), "USD")
+    columns[field] = np.array([1, value, 1], dtype=np.int64)
+    if field == "misc_expenses":
+        columns["entertainment"] = columns[field]
+    with pytest.raises(ValueError):
+        calculate_batch_minor(columns, "USD", tax_system)
+
+@pytest.mark.parametrize("tax_system", [None, "USA"])
+def test_totals_are_the_sum_of_the_lines(tax_system):
+    results = calculate_batch_minor(to_minor_inputs(_scenarios(1000), "USD"), "USD", tax_system)
+    lines = sum(results["monthly_expenses"].values())
+    assert results["total_monthly_expenses"].dtype == np.int64
+    assert (results["total_monthly_expenses"] == lines).all()
+    if tax_system is None:
+        assert (results["required_annual_income"] == results["required_monthly_income"] * 12).all()
+
+@pytest.mark.parametrize("tax_system", [None, "USA"])
+def test_fixed_point_matches_float_engine(tax_system):
+    columns = _scenarios(1000)
+    exact = calculate_batch_minor(to_minor_inputs(columns, "USD"), "USD", tax_system)
+    approximate = calculate_batch(columns, tax_system)
+    # Three rounded lines of at most half a cent each
+    assert to_major(exact["total_monthly_expenses"], "USD") == pytest.approx(
+        approximate["total_monthly_expenses"], abs=0.015)
+
+def test_format_minor():
+    assert format_minor(123456, "USD", "$") == "$1,234.56"
+    assert format_minor(-5, "EUR") == "-0.05"
+    assert format_minor(1234567, "KRW", "₩") == "₩1,234,567"
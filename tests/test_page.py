@@ -0,0 +1,24 @@
+from streamlit.testing.v1 import AppTest
+
+def _page(name):
+    return AppTest.from_string(f"import main\nmain.country_page(main.COUNTRIES[{name!r}])", default_timeout=60)
+
+def _projected_income(app):
+    return [metric.value for metric in app.metric if metric.label.startswith("Annual income needed in")]
+
+def test_open_panel_follows_the_inputs():
+    app = _page("USA").run()
+    assert not _projected_income(app)
+
+    # AppTest does not send an expander's state back, so it is opened before every run
+    app.session_state["usa_proj_open"] = True
+    app.run()
+    before = _projected_income(app)
+    assert len(before) == 1
+
+    app.session_state["usa_proj_open"] = True
+    app.slider(key="usa_down_payment_percent").set_value(50).run()
+    assert not app.exception
+    assert app.session_state["usa_page"]["inputs"]["down_payment_percent"] == 50
+    after = _projected_income(app)
+    assert len(after) == 1 and after != before
@@ -0,0 +1,53 @@
+import pytest
+
+from countries import COUNTRIES
+from main import _calculate_results
+from projection import Projection
+
+def _page(country):
+    """
+    The inputs of a page as the panels see them, and its results as the page calculates them.
+    """
+    inputs = {field: value for field, value in country["defaults"].items() if field != "progressive_tax"}
+    values = dict(inputs)
+    extra_expenses = {category: values.pop(field) for field, category in country["extra_categories"].items()}
+    return inputs, values, extra_expenses
+
+@pytest.mark.parametrize("progressive", [False, True])
+@pytest.mark.parametrize("name", list(COUNTRIES))
+def test_first_year_matches_the_page(name, progressive):
+    country = COUNTRIES[name]
+    tax_system = name if progressive else None
+    inputs, values, extra_expenses = _page(country)
+    results = _calculate_results(values, extra_expenses, tax_system)
+
+    projection = Projection(list(results["monthly_expenses"]))
+    result = projection.compute(inputs, {"years": 10}, tax_system)
+    assert len(result["required_annual_income"]) == 10
+    assert result["total_annual_expenses"][0] == pytest.approx(results["total_monthly_expenses"] * 12, rel=1e-12)
+    assert result["required_annual_income"][0] == pytest.approx(results["required_annual_income"], rel=1e-12)
+
+def _projection(country):
+    inputs, values, extra_expenses = _page(country)
+    categories = list(_calculate_results(values, extra_expenses)["monthly_expenses"])
+    projection = Projection(categories)
+    projection.compute(inputs)
+    return projection, inputs
+
+def test_food_inflation_recomputes_only_the_food_branch():
+    projection, inputs = _projection(COUNTRIES["USA"])
+    before = projection.compute(inputs)
+    after = projection.compute(inputs, {"category_inflation": {"Food": 6.0}})
+    assert sorted(projection.computed) == sorted(["growth:Food", "expense:Food", "total_expenses", "required_income"])
+    assert after["required_annual_income"][-1] > before["required_annual_income"][-1]
+    assert after["annual_expenses"]["Utilities"] is before["annual_expenses"]["Utilities"]
+
+def test_tax_rate_recomputes_only_the_required_income():
+    projection, inputs = _projection(COUNTRIES["USA"])
+    projection.compute(dict(inputs, tax_rate=inputs["tax_rate"] + 5))
+    assert projection.computed == ["required_income"]
+
+def test_unchanged_inputs_recompute_nothing():
+    projection, inputs = _projection(COUNTRIES["USA"])
+    projection.compute(inputs)
+    assert projection.computed == []
@@ -0,0 +1,80 @@
+import base64
+import zlib
+
+import pytest
+
+from countries import COUNTRIES
+from scenarios import MAX_INPUT_VALUE, ScenarioStore, decode_scenario, encode_scenario, validate_inputs, widget_specs
+
+USA = COUNTRIES["USA"]
+
+def test_round_trip():
+    inputs = {**USA["defaults"], "house_cost": 750000, "mortgage_rate": 5.5, "progressive_tax": True}
+    assert decode_scenario(encode_scenario(USA, inputs)) == ("USA", {
+        "house_cost": 750000, "mortgage_rate": 5.5, "progressive_tax": True})
+
+@pytest.mark.parametrize("value", [float("inf"), float("-inf"), float("nan"), "100", None, [1]])
+def test_invalid_values_are_dropped(value):
+    assert validate_inputs(USA, {"house_cost": value}) == {}
+
+@pytest.mark.parametrize("value", [1e300, 10**400, 2**60])
+def test_huge_numbers_are_clamped(value):
+    assert validate_inputs(USA, {"house_cost": value}) == {"house_cost": MAX_INPUT_VALUE}
+    assert validate_inputs(USA, {"mortgage_rate": value}) == {"mortgage_rate": 10.0}
+
+def test_values_take_the_widget_type_and_range():
+    values = validate_inputs(USA, {"house_cost": 123456.7, "mortgage_years": -5, "unknown": 1})
+    assert values == {"house_cost": 123456, "mortgage_years": widget_specs(USA)["mortgage_years"][1]["min_value"]}
+    assert isinstance(values["house_cost"], int)
+
+@pytest.mark.parametrize("value, expected", [
+    (True, True), (False, False), ("true", True), ("false", False), (" False ", False), ("yes", True),
+    ("off", False), ("1", True), ("0", False),
+])
+def test_toggles_accept_booleans_and_their_spellings(value, expected):
+    assert validate_inputs(USA, {"progressive_tax": value}) == {"progressive_tax": expected}
+
+@pytest.mark.parametrize("value", ["maybe", "", 1, 0, 2.5, None, [True]])
+def test_other_toggle_values_are_dropped(value):
+    assert validate_inputs(USA, {"progressive_tax": value}) == {}
+
+def test_hand_edited_links_decode_to_valid_inputs():
+    # JSON has no infinity, but Python's decoder accepts these tokens
+    for payload in ('{"house_cost": Infinity}', '{"house_cost": 1e300}', '{"house_cost": NaN}'):
+        token = "usa." + base64.urlsafe_b64encode(zlib.compress(payload.encode())).decode().rstrip("=")
+        name, inputs = decode_scenario(token)
+        assert name == "USA"
+        assert all(value <= MAX_INPUT_VALUE for value in inputs.values())
+
+@pytest.mark.parametrize("token", ["usa.!!!", "mars.eJyrrgUAAXUA-Q", "usa.eJwrSS0uAQAEXQHB"])
+def test_malformed_links_raise_value_error(token):
+    with pytest.raises(ValueError):
+        decode_scenario(token)
+
+def test_import_validates_inputs():
+    store = ScenarioStore(":memory:")
+    store.import_scenarios([{"owner": "a", "country": "usa", "name": "big", "inputs": {"house_cost": 1e300, "x": 1}}])
+    assert store.export_scenarios("a")[0]["inputs"] == {"house_cost": MAX_INPUT_VALUE}
+
+@pytest.mark.parametrize("scenario", [
+    {"owner": "a", "country": "mars", "name": "x", "inputs": {}},
+    {"owner": "a", "country": "usa", "name": "", "inputs": {}},
+    {"owner": "a", "country": "usa", "name": "x", "inputs": [1, 2]},
+])
+def test_import_rejects_invalid_scenarios(scenario):
+    store = ScenarioStore(":memory:")
+    valid = {"owner": "a", "country": "usa", "name": "ok", "inputs": {}}
+    with pytest.raises(ValueError):
+        store.import_scenarios([valid, scenario])
+    assert store.list() == []
+
+def test_owner_scoped_load_and_delete():
+    store = ScenarioStore(":memory:")
+    scenario_id = store.save("alice", "usa", "home", {"house_cost": 500000})
+    assert store.load(scenario_id, "bob") is None
+    assert store.load(scenario_id, "alice")["inputs"] == {"house_cost": 500000}
+
+    store.delete(scenario_id, "bob")
+    assert store.load(scenario_id) is not None
+    store.delete(scenario_id, "alice")
+    assert store.load(scenario_id) is None
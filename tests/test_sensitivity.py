@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from countries import COUNTRIES
+from engine import calculate_batch
+from sensitivity import SensitivityGrid, axis_fields, axis_values
+
+def _inputs(country):
+    return {field: value for field, value in country["defaults"].items() if field != "progressive_tax"}
+
+@pytest.mark.parametrize("name", list(COUNTRIES))
+def test_every_axis_field_has_values(name):
+    country = COUNTRIES[name]
+    fields = axis_fields(country)
+    assert "progressive_tax" not in fields
+    for field in fields:
+        values = axis_values(country, field)
+        assert 2 <= len(values) <= 201
+        assert np.all(np.diff(values) > 0)
+
+def test_toggle_is_not_an_axis():
+    with pytest.raises(ValueError):
+        axis_values(COUNTRIES["USA"], "progressive_tax")
+
+@pytest.mark.parametrize("tax_system", [None, "USA"])
+def test_grid_matches_batch_engine(tax_system):
+    country = COUNTRIES["USA"]
+    inputs = _inputs(country)
+    grid = SensitivityGrid("mortgage_rate", axis_values(country, "mortgage_rate", 11),
+                           "house_cost", axis_values(country, "house_cost", 7))
+    income = grid.compute(inputs, tax_system)
+
+    x, y = np.meshgrid(grid.x_values, grid.y_values)
+    columns = {field: np.full(x.size, value) for field, value in inputs.items()}
+    columns["mortgage_rate"] = x.ravel()
+    columns["house_cost"] = y.ravel()
+    expected = calculate_batch(columns, tax_system)["required_annual_income"].reshape(x.shape)
+    assert income == pytest.approx(expected, rel=1e-12)
+
+def test_switching_tax_system_recomputes_only_the_gross_up():
+    country = COUNTRIES["USA"]
+    grid = SensitivityGrid("mortgage_rate", axis_values(country, "mortgage_rate", 11),
+                           "house_cost", axis_values(country, "house_cost", 7))
+    grid.compute(_inputs(country))
+    grid.compute(_inputs(country), "USA")
+    assert grid.computed == ["progressive_income"]
+
+def test_tax_rate_change_reuses_the_expense_nodes():
+    country = COUNTRIES["USA"]
+    inputs = _inputs(country)
+    grid = SensitivityGrid("mortgage_rate", axis_values(country, "mortgage_rate", 11),
+                           "house_cost", axis_values(country, "house_cost", 7))
+    grid.compute(inputs)
+    assert sorted(grid.computed) == ["gross_up", "monthly_total", "mortgage_factor", "vehicle_factor"]
+    total = grid._cache["monthly_total"][1]
+
+    changed = dict(inputs, tax_rate=inputs["tax_rate"] + 10)
+    income = grid.compute(changed)
+    assert grid.computed == ["gross_up"]
+    assert grid._cache["monthly_total"][1] is total
+    expected = SensitivityGrid(grid.x_field, grid.x_values, grid.y_field, grid.y_values).compute(changed)
+    assert income == pytest.approx(expected, rel=1e-12)
+
+    # Progressive brackets replace the flat rate, so it changes nothing there
+    grid.compute(changed, "USA")
+    assert grid.computed == ["progressive_income"]
+    grid.compute(dict(changed, tax_rate=inputs["tax_rate"]), "USA")
+    assert grid.computed == []
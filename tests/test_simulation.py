@@ -0,0 +1,22 @@
+import pytest
+
+from countries import COUNTRIES
+from engine import calculate_batch
+from simulation import probability_below, run_simulation
+
+INPUTS = {field: value for field, value in COUNTRIES["USA"]["defaults"].items() if field != "progressive_tax"}
+
+@pytest.mark.parametrize("tax_system", [None, "USA"])
+def test_first_year_matches_required_income(tax_system):
+    # Without rate volatility every path starts at the page's required income
+    result = run_simulation(INPUTS, n_paths=1000, parameters={"rate_volatility": 0.0}, tax_system=tax_system)
+    income = calculate_batch({field: [value] for field, value in INPUTS.items()}, tax_system)["required_annual_income"][0]
+    assert probability_below(result, income * 1.001) == 1.0
+    assert probability_below(result, income * 0.999) == 0.0
+
+def test_results_do_not_depend_on_workers():
+    single = run_simulation(INPUTS, n_paths=60_000, chunk_size=20_000, workers=1)
+    pooled = run_simulation(INPUTS, n_paths=60_000, chunk_size=20_000, workers=2)
+    assert pooled["paths"] == single["paths"] == 60_000
+    for a, b in zip(single["sketches"], pooled["sketches"]):
+        assert (a.counts == b.counts).all()
@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+from tax import TAX_BRACKETS, TAX_SYSTEMS, gross_up, income_tax
+
+def _reference_tax(gross, brackets):
+    """
+    Income tax summed bracket by bracket.
+    """
+    tax, lower = 0.0, 0.0
+    for upper, rate in brackets:
+        tax += max(min(gross, upper) - lower, 0.0) * rate / 100
+        lower = upper
+    return tax
+
+@pytest.mark.parametrize("country", list(TAX_BRACKETS))
+def test_income_tax_matches_brackets(country):
+    gross = np.concatenate([TAX_SYSTEMS[country]["gross"], np.geomspace(1, 2e9, 200)])
+    expected = [_reference_tax(value, TAX_BRACKETS[country]) for value in gross]
+    assert income_tax(gross, country) == pytest.approx(expected, rel=1e-12, abs=1e-6)
+
+@pytest.mark.parametrize("country", list(TAX_BRACKETS))
+def test_gross_up_round_trip(country):
+    # Include the net income at every breakpoint, where the marginal rate changes
+    net = np.concatenate([[0.0], TAX_SYSTEMS[country]["net"], np.geomspace(1, 1e9, 500)])
+    gross = gross_up(net, country)
+    assert gross - income_tax(gross, country) == pytest.approx(net, rel=1e-12, abs=1e-6)
+    assert np.all(np.diff(gross_up(np.sort(net), country)) >= 0)
+
+def test_gross_up_scalar():
+    net = 80000.0
+    gross = float(gross_up(net, "USA"))
+    assert gross - float(income_tax(gross, "USA")) == pytest.approx(net)
+    assert 0 < float(income_tax(gross, "USA")) < gross * 0.37
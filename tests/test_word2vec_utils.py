@@ -0,0 +1,80 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import word2vec_utils
+from word2vec_utils import STAGES, checkpoint_keys, read_metadata, stage_key, write_metadata, writing
+
+PARAMETERS = {
+    "load": {"min_words": 10},
+    "preprocess": {"min_tokens": 5},
+    "word2vec": {"vectorSize": 200},
+    "vectors": {},
+    "classifier": {"seed": 42},
+}
+
+def test_stage_key_depends_on_parameters_upstream_and_version(monkeypatch):
+    key = stage_key("word2vec", {"vectorSize": 200, "minCount": 3}, "upstream")
+    assert key == stage_key("word2vec", {"minCount": 3, "vectorSize": 200}, "upstream")
+    assert key != stage_key("word2vec", {"vectorSize": 100, "minCount": 3}, "upstream")
+    assert key != stage_key("word2vec", {"vectorSize": 200, "minCount": 3}, "other")
+    assert key != stage_key("vectors", {"vectorSize": 200, "minCount": 3}, "upstream")
+    monkeypatch.setattr(word2vec_utils, "CHECKPOINT_VERSION", word2vec_utils.CHECKPOINT_VERSION + 1)
+    assert key != stage_key("word2vec", {"vectorSize": 200, "minCount": 3}, "upstream")
+
+def test_changing_a_stage_changes_only_its_key_and_the_ones_after_it():
+    keys = checkpoint_keys(PARAMETERS)
+    assert list(keys) == STAGES
+    assert len(set(keys.values())) == len(STAGES)
+    assert keys == checkpoint_keys(PARAMETERS)
+
+    changed = checkpoint_keys({**PARAMETERS, "word2vec": {"vectorSize": 100}})
+    position = STAGES.index("word2vec")
+    for stage in STAGES[:position]:
+        assert changed[stage] == keys[stage]
+    for stage in STAGES[position:]:
+        assert changed[stage] != keys[stage]
+
+def _entries(directory):
+    return sorted(os.listdir(directory))
+
+def test_writing_renames_the_finished_checkpoint(tmp_path):
+    path = str(tmp_path / "stage" / "key")
+    os.makedirs(os.path.dirname(path))
+    with writing(path) as temporary:
+        assert not os.path.exists(path)
+        write_metadata(temporary, {"documents": 3})
+    assert _entries(tmp_path / "stage") == ["key"]
+    assert read_metadata(path) == {"documents": 3}
+
+def test_writing_discards_an_interrupted_checkpoint(tmp_path):
+    path = str(tmp_path / "key")
+    with pytest.raises(KeyboardInterrupt):
+        with writing(path) as temporary:
+            write_metadata(temporary, {"documents": 3})
+            raise KeyboardInterrupt
+    assert _entries(tmp_path) == []
+
+def test_writing_keeps_a_checkpoint_finished_by_another_run(tmp_path):
+    path = str(tmp_path / "key")
+    with writing(path) as temporary:
+        write_metadata(temporary, {"run": "second"})
+        os.makedirs(path)
+        write_metadata(path, {"run": "first"})
+    assert _entries(tmp_path) == ["key"]
+    assert read_metadata(path) == {"run": "first"}
+
+def test_document_vectors_are_tf_weighted_averages():
+    pytest.importorskip("scipy")
+    word_index = pd.Index(["space", "orbit", "bike"])
+    matrix = np.array([[1, 0], [0, 1], [4, 4]], dtype=np.float32)
+    tokens = pd.Series([["space", "space", "orbit", "unknown"], None, ["unknown"], [], ["bike"]])
+
+    vectors = word2vec_utils.weighted_document_vectors(tokens, word_index, matrix)
+    assert vectors.dtype == np.float32
+    np.testing.assert_allclose(vectors, [[2 / 3, 1 / 3], [0, 0], [0, 0], [0, 0], [4, 4]], rtol=1e-6)
+
+    empty = word2vec_utils.weighted_document_vectors(pd.Series([None, []], dtype=object), word_index, matrix)
+    np.testing.assert_array_equal(empty, np.zeros((2, 2), dtype=np.float32))
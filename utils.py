@@ -1,3 +1,15 @@
+def calculate_mortgage_payment(P, r, n):
+    """
+    Calculate the monthly mortgage payment.
+    P: loan amount
+    r: monthly interest rate (annual rate / 12)
+    n: total number of months
+    A zero interest rate spreads the loan evenly over the term.
+    """
+    if r == 0:
+        return P / n
+    return P * (r * (1 + r)**n) / ((1 + r)**n - 1)
+
 def calculate_monthly_income(total_expenses, tax_rate):
     """
     Calculate the required monthly income based on expenses and tax rate.
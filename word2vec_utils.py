@@ -0,0 +1,112 @@
+"""
+Parts of the word2vec pipeline that do not need a Spark session: checkpoint keys,
+atomic checkpoint writes and the document-vector arithmetic. Importing this module
+only needs numpy and pandas; scipy and pyspark are imported by the functions that use
+them, so the notebook and the tests can share this code without a Spark install.
+"""
+import contextlib
+import hashlib
+import json
+import os
+import shutil
+import uuid
+
+import numpy as np
+
+# Bump when a stage's code changes in a way that invalidates existing checkpoints
+CHECKPOINT_VERSION = 1
+
+STAGES = ["load", "preprocess", "word2vec", "vectors", "classifier"]
+
+def stage_key(stage, parameters, upstream_key=None):
+    """
+    Hash of a stage's parameters and the key of the stage it reads from.
+    """
+    payload = json.dumps(
+        {"stage": stage, "version": CHECKPOINT_VERSION, "parameters": parameters, "upstream": upstream_key},
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+def checkpoint_keys(parameters):
+    """
+    The key of every stage, each chained to the key of the stage before it, so changing
+    one stage's parameters changes its key and the keys of every stage after it.
+    parameters: stage -> parameters of that stage
+    """
+    keys = {}
+    upstream_key = None
+    for stage in STAGES:
+        upstream_key = keys[stage] = stage_key(stage, parameters[stage], upstream_key)
+    return keys
+
+@contextlib.contextmanager
+def writing(path):
+    """
+    Yield a temporary directory that becomes `path` once the block completes.
+    """
+    temporary = f"{path}.tmp-{uuid.uuid4().hex}"
+    os.makedirs(temporary)
+    try:
+        yield temporary
+    except BaseException:
+        shutil.rmtree(temporary, ignore_errors=True)
+        raise
+    try:
+        os.rename(temporary, path)
+    except OSError:
+        # Another run finished the same checkpoint first
+        if not os.path.exists(path):
+            raise
+        shutil.rmtree(temporary, ignore_errors=True)
+
+def write_metadata(directory, metadata):
+    with open(os.path.join(directory, "metadata.json"), "w") as file:
+        json.dump(metadata, file, indent=2)
+
+def read_metadata(directory):
+    with open(os.path.join(directory, "metadata.json")) as file:
+        return json.load(file)
+
+def vocabulary_matrix(word2vec_model):
+    """
+    Collect the Word2Vec vocabulary as a word array and one contiguous float32 matrix.
+    """
+    from pyspark.ml.functions import vector_to_array
+
+    vectors = word2vec_model.getVectors().select(
+        "word", vector_to_array("vector", dtype="float32").alias("vector")).toPandas()
+    words = vectors["word"].to_numpy()
+    matrix = np.zeros((len(words), word2vec_model.getVectorSize()), dtype=np.float32)
+    if len(words):
+        matrix[:] = np.stack(vectors["vector"].to_numpy())
+    return words, matrix
+
+def weighted_document_vectors(tokens, word_index, matrix):
+    """
+    TF-weighted average word vector for a batch of token lists, as one matrix product.
+    tokens: pandas Series of token lists; word_index: pandas Index of the vocabulary,
+    in the row order of matrix
+    """
+    from scipy import sparse
+
+    n_docs = len(tokens)
+    # Null token arrays (none pass the min_tokens filter in preprocess) count as empty documents
+    lengths = tokens.map(len, na_action="ignore").fillna(0).to_numpy(dtype=np.int64)
+    if lengths.sum() == 0:
+        return np.zeros((n_docs, matrix.shape[1]), dtype=np.float32)
+
+    # One row index per token occurrence; -1 for words outside the vocabulary
+    doc_ids = np.repeat(np.arange(n_docs), lengths)
+    word_ids = word_index.get_indexer(np.concatenate([np.asarray(t, dtype=object) for t in tokens if t is not None]))
+    known = word_ids >= 0
+    doc_ids, word_ids = doc_ids[known], word_ids[known]
+
+    # The normalized TF weight of a word is its count over the known tokens of the
+    # document, so every known occurrence weighs 1 / known tokens
+    known_counts = np.bincount(doc_ids, minlength=n_docs)
+    weights = (1.0 / known_counts[doc_ids]).astype(np.float32)
+    term_weights = sparse.csr_matrix((weights, (doc_ids, word_ids)), shape=(n_docs, matrix.shape[0]))
+
+    # Documents without known words keep a zero vector
+    return np.asarray(term_weights @ matrix, dtype=np.float32)